@@ -1,2 +1,3 @@
 from . import grammar
+from . import lexer
 from . import parsers
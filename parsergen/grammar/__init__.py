@@ -1,10 +1,11 @@
 from abc import abstractmethod
-from types import MappingProxyType
-from typing import Collection, FrozenSet, Generic, Iterable, Protocol, Tuple, TypeVar, Union, overload
+from typing import Callable, Collection, Dict, FrozenSet, Generic, Iterable, Mapping, Protocol, Tuple, TypeVar, Union
+from typing import overload
 
-from .algorythms import get_firsts_follows
-from .nonterminals import NonTerminalBase, SpecialNonterminal, is_epsilon_generating
+from . import algorythms
+from .nonterminals import NonTerminalBase, SpecialNonterminal, epsilon
 from .productions import Production, Productions
+from .terminals import TerminalClass
 
 
 T = TypeVar("T")
@@ -24,6 +25,12 @@ class InvalidProduction(Exception):
         super().__init__(msg)
 
 
+class InvalidTerminalClass(Exception):
+    def __init__(self, production, member):
+        msg = f"Production {production} uses terminal {member} on its own and in a terminal class, or in two classes."
+        super().__init__(msg)
+
+
 class TerminalsSet(
     # TODO: fix mypy warning:
     #       Invariant type variable "Terminal" used in protocol where covariant
@@ -52,14 +59,41 @@ class TerminalSets(
     def __contains__(self, __o: object) -> bool: ...
 
 
+class analysis(Generic[T]):
+    """
+    Grammar property computed on first access and then stored in the
+    instance __dict__, which shadows this (non-data) descriptor.
+    """
+
+    def __init__(self, compute: Callable[..., T]) -> None:
+        self.compute = compute
+        self.name = compute.__name__
+        self.__doc__ = compute.__doc__
+
+    @overload
+    def __get__(self, grammar: None, owner: type) -> "analysis[T]": ...
+    @overload
+    def __get__(self, grammar: object, owner: type) -> T: ...
+    def __get__(self, grammar, owner):
+        if grammar is None:
+            return self
+        value = grammar.__dict__[self.name] = self.compute(grammar)
+        return value
+
+
 class Grammar(Generic[Terminal, Nonterminal]):
+    """
+    Grammars are immutable. Construction only validates symbols, every
+    analysis is computed on first access and cached on the instance.
+
+    Terminal classes used by productions replace their members in
+    `terminals`, members may be given instead of the class itself.
+    """
 
     terminals: FrozenSet[Terminal]
     nonterminals: FrozenSet[Nonterminal]
     start_symbol: Nonterminal
     productions: Productions[Terminal, Nonterminal]
-    firsts: TerminalSets[Terminal, Nonterminal]
-    follows: TerminalSets[Terminal, Nonterminal]
 
     def __init__(
         self,
@@ -74,34 +108,65 @@ class Grammar(Generic[Terminal, Nonterminal]):
         self.start_symbol = start_symbol
         self.productions = Productions(productions)
         self._validate()
-        firsts, follows = get_firsts_follows(self)
-        self.firsts = MappingProxyType(firsts)
-        self.follows = MappingProxyType(follows)
+        if self.member_classes:
+            self.terminals = frozenset(
+                self.member_classes.get(terminal, terminal) for terminal in self.terminals
+            ) | frozenset(self.member_classes.values())
 
     def _validate(self) -> None:
-        symbols = self.terminals | self.nonterminals
+        symbols = self.terminals | self.nonterminals | {epsilon}
         if self.start_symbol not in self.nonterminals:
             raise InvalidStartSymbol(self.start_symbol)
+        owners: Dict[object, object] = {}
         for production in self.productions:
             if production.left not in self.nonterminals:
                 raise InvalidProduction(production, production.left)
             for symbol in production.right:
-                if symbol not in symbols:
+                members = symbol.members if isinstance(symbol, TerminalClass) else (symbol, )
+                if symbol not in symbols and not all(member in symbols for member in members):
                     raise InvalidProduction(production, symbol)
+                if isinstance(symbol, NonTerminalBase):
+                    continue
+                for member in members:
+                    if owners.setdefault(member, symbol) != symbol:
+                        raise InvalidTerminalClass(production, member)
+
+    @analysis
+    def member_classes(self) -> Mapping[Terminal, TerminalClass[Terminal]]:
+        """
+        Terminal class of every member of the classes used by productions.
+        """
+        return {
+            member: symbol
+            for production in self.productions
+            for symbol in production.right if isinstance(symbol, TerminalClass)
+            for member in symbol.members
+        }
+
+    @property
+    def nullable(self) -> FrozenSet[Union[Nonterminal, SpecialNonterminal]]:
+        return self.productions.nullable
+
+    @analysis
+    def generating(self) -> FrozenSet[Nonterminal]:
+        return frozenset(algorythms.get_generating_nts(self))
+
+    @analysis
+    def reachable(self) -> FrozenSet[Nonterminal]:
+        return frozenset(algorythms.get_reachable_nts(self.start_symbol, self.productions))
+
+    @analysis
+    def firsts(self) -> TerminalSets[Terminal, Nonterminal]:
+        return algorythms.get_firsts(self)
+
+    @analysis
+    def follows(self) -> TerminalSets[Terminal, Nonterminal]:
+        return algorythms.get_follows(self, self.firsts)
+
+    @analysis
+    def left_recursive(self) -> FrozenSet[Nonterminal]:
+        return frozenset(algorythms.get_left_recursive_nts(self))
 
     @property
     def has_left_recursion(self) -> bool:
-        for nonterminal in self.nonterminals:
-            derivations_leads = []
-            for production in self.productions.lhs_filter(nonterminal):
-                for symbol in production.right:
-                    if isinstance(symbol, NonTerminalBase):
-                        if symbol not in derivations_leads:
-                            derivations_leads.append(symbol)
-                        if not is_epsilon_generating(symbol, self.productions):
-                            break
-                    else:
-                        break
-            if nonterminal in derivations_leads:
-                return True
-        return False
+        return bool(self.left_recursive)
@@ -1,48 +1,17 @@
 from __future__ import annotations
 
-from typing import Dict, Iterable, Optional, Set, Tuple, Union
+from typing import Dict, FrozenSet, Generic, Iterable, Iterator, List, Mapping, Optional, Sequence, Set, Tuple, TypeVar, Union
 
 from typing import TYPE_CHECKING
 
-from parsergen.grammar import TerminalsSet
-from parsergen.grammar.nonterminals import NonTerminalBase, SpecialNonterminal, epsilon
+from parsergen.grammar.nonterminals import NonTerminalBase, SpecialNonterminal, epsilon, eof
 from parsergen.grammar.productions import Production
 if TYPE_CHECKING:
     from . import Grammar, TerminalSets
-    from . import Terminal, Nonterminal
 
 
-def clean_grammar(
-    grammar: Grammar[Terminal, Nonterminal]
-) -> Grammar[Terminal, Nonterminal]:
-    productions = set(grammar.productions)
-    generating_nts = get_generating_nts(grammar)
-    nongenerating_nts = grammar.nonterminals.difference(generating_nts)
-    generating_productions = {
-        production for production in productions
-        if not (
-            any(symbol in nongenerating_nts for symbol in production.rule)
-            or
-            production.left in nongenerating_nts
-        )
-    }
-    reachable_nts = get_reachable_nts(grammar.start_symbol, generating_productions)
-    unreachable_nts = grammar.nonterminals.difference(reachable_nts)
-    reachable_productions = {
-        production for production in productions
-        if not (
-            any(symbol in unreachable_nts for symbol in production.rule)
-            or
-            production.left in unreachable_nts
-        )
-    }
-    cleaned_grammar = Grammar(
-        grammar.terminals,
-        reachable_nts,
-        grammar.start_symbol,
-        reachable_productions
-    )
-    return cleaned_grammar
+Terminal = TypeVar("Terminal")
+Nonterminal = TypeVar("Nonterminal", bound=NonTerminalBase)
 
 
 def get_epsilonless_grammar(
@@ -68,126 +37,169 @@ def get_generating_nts(
 ) -> Set[Nonterminal]:
     productions = grammar.productions
     counters = {
-        production: sum(not isinstance(s, NonTerminalBase) for s in production.rule)
+        production: len({
+            symbol for symbol in production.rule
+            if isinstance(symbol, NonTerminalBase) and symbol is not epsilon
+        })
         for production in productions
     }
-    concerned_productions = {
-        nt: [production for production in productions if nt in production.rule]
-        for nt in grammar.nonterminals
-    }
-    generating_nts = [
+    generating_nts = {
         production.left
         for production, counter in counters.items()
         if counter == 0
-    ]
-    for nt in generating_nts:
-        concerned = concerned_productions[nt]
-        for production in concerned:
+    }
+    queue = list(generating_nts)
+    for nt in queue:
+        for production in productions.rhs_filter(nt):
             counters[production] -= 1
-            if counters[production] == 0:
-                generating_nts.append(production.left)
-    return set(generating_nts)
+            if counters[production] == 0 and production.left not in generating_nts:
+                generating_nts.add(production.left)
+                queue.append(production.left)
+    return generating_nts
 
 
 def get_reachable_nts(
     start_symbol: Nonterminal, productions: Iterable[Production[Terminal, Nonterminal]]
 ) -> Set[Nonterminal]:
-    reachable_nts = [start_symbol]
-    for nt in reachable_nts:
-        new_reachables = [
-            symbol
-            for production in productions
-            for symbol in production.right
-            if production.left == nt and isinstance(symbol, NonTerminalBase)
-        ]
-        for reachable in new_reachables:
+    successors: Dict[Nonterminal, Set[Nonterminal]] = {}
+    for production in productions:
+        successors.setdefault(production.left, set()).update(
+            symbol for symbol in production.right
+            if isinstance(symbol, NonTerminalBase) and symbol is not epsilon
+        )
+    reachable_nts = {start_symbol}
+    queue = [start_symbol]
+    for nt in queue:
+        for reachable in successors.get(nt, ()):
             if reachable not in reachable_nts:
-                reachable_nts.append(reachable)
-    return set(reachable_nts)
+                reachable_nts.add(reachable)
+                queue.append(reachable)
+    return reachable_nts
 
 
 def get_epsilon_generatings(grammar: Grammar[Terminal, Nonterminal]) -> Set[Nonterminal]:
-    epsilon_generatings: Set[Nonterminal] = {epsilon}
-    changed = True
-    while changed:
-        changed = False
-        for production in grammar.productions:
-            if production.left in epsilon_generatings:
+    return set(grammar.productions.nullable)
+
+
+class TerminalBitsets(
+    Mapping[Nonterminal, FrozenSet[Union[Terminal, SpecialNonterminal]]],
+    Generic[Terminal, Nonterminal]
+):
+    """
+    Read-only nonterminal → terminals set mapping stored as int bitmasks
+    over a dense numbering of terminals. Sets are decoded on first access
+    and cached; `bits` gives the raw mask for bitset based consumers.
+    """
+
+    terminals: Tuple[Union[Terminal, SpecialNonterminal], ...]
+    terminal_index: Dict[Union[Terminal, SpecialNonterminal], int]
+
+    def __init__(
+        self,
+        terminals: Sequence[Union[Terminal, SpecialNonterminal]],
+        bits: Dict[Nonterminal, int]
+    ) -> None:
+        self.terminals = tuple(terminals)
+        self.terminal_index = {terminal: no for no, terminal in enumerate(self.terminals)}
+        self._bits = bits
+        self._sets: Dict[Nonterminal, FrozenSet[Union[Terminal, SpecialNonterminal]]] = {}
+
+    def bits(self, nt: Nonterminal) -> int:
+        return self._bits[nt]
+
+    def __getitem__(self, nt: Nonterminal) -> FrozenSet[Union[Terminal, SpecialNonterminal]]:
+        decoded = self._sets.get(nt)
+        if decoded is None:
+            mask = self._bits[nt]
+            terminals = self.terminals
+            members = []
+            while mask:
+                low = mask & -mask
+                members.append(terminals[low.bit_length() - 1])
+                mask ^= low
+            decoded = self._sets[nt] = frozenset(members)
+        return decoded
+
+    def __iter__(self) -> Iterator[Nonterminal]:
+        return iter(self._bits)
+
+    def __len__(self) -> int:
+        return len(self._bits)
+
+    def __contains__(self, nt: object) -> bool:
+        return nt in self._bits
+
+
+def get_left_recursive_nts(grammar: Grammar[Terminal, Nonterminal]) -> Set[Nonterminal]:
+    """
+    A is left recursive when A ⇒⁺ Aα. Left corners of A are nonterminals
+    B with A→βBγ ∈ P ∧ β⇒∗ε, A is left recursive iff it is among the
+    transitive left corners of itself.
+    """
+    nonterminals = tuple(grammar.nonterminals)
+    nt_index = {nt: no for no, nt in enumerate(nonterminals)}
+    epsilon_generatings = grammar.nullable
+    corners = [0] * len(nonterminals)
+    relation: List[List[int]] = [[] for _ in nonterminals]
+    for production in grammar.productions:
+        left = nt_index[production.left]
+        for symbol in production.rule:
+            if symbol is epsilon:
                 continue
-            if all(symbol in epsilon_generatings for symbol in production.rule):
-                changed = True
-                epsilon_generatings.add(production.left)
-    return epsilon_generatings
+            if not isinstance(symbol, NonTerminalBase):
+                break
+            corners[left] |= 1 << nt_index[symbol]
+            relation[left].append(nt_index[symbol])
+            if symbol not in epsilon_generatings:
+                break
+    corners = digraph(relation, corners)
+    return {nt for no, nt in enumerate(nonterminals) if corners[no] >> no & 1}
 
 
 def get_firsts_follows(
     grammar: Grammar[Terminal, Nonterminal]
-) -> Tuple[Dict[Nonterminal, TerminalsSet[Terminal]], Dict[Nonterminal, TerminalsSet[Terminal]]]:
-    grammar = clean_grammar(grammar)
-    firsts = get_firsts(grammar)
-    follows = get_follows(grammar, firsts)
-    return firsts, follows
+) -> Tuple[TerminalBitsets[Terminal, Nonterminal], TerminalBitsets[Terminal, Nonterminal]]:
+    return grammar.firsts, grammar.follows
 
 
 def get_firsts(
     grammar: Grammar[Terminal, Nonterminal]
-) -> Dict[Nonterminal, TerminalsSet[Terminal]]:
+) -> TerminalBitsets[Terminal, Nonterminal]:
     """
     FIRST(A) = {c ∣ A⇒∗cβ} ∪ {ε if A⇒∗ε}
 
     Lemma: FIRST(αβ) = FIRST(α) ∪ (FIRST(β) if ε∈FIRST(α))
     Lemma: FIRST(cα) = {c}; FIRST(ε) = {ε}
+
+    A→αBβ ∈ P ∧ α⇒∗ε gives FIRST(B) ⊂ FIRST(A), so FIRST is the digraph
+    closure of directly leading terminals over that relation.
     """
-    raw_firsts: Dict[Nonterminal, Set[Union[Terminal, Nonterminal]]] = {
-        nonterminal: set() for nonterminal in grammar.nonterminals
-    }
-    epsilon_generatings = get_epsilon_generatings(grammar)
+    terminals = (*grammar.terminals, eof)
+    terminal_index = {terminal: no for no, terminal in enumerate(terminals)}
+    nonterminals = tuple(grammar.nonterminals)
+    nt_index = {nt: no for no, nt in enumerate(nonterminals)}
+    epsilon_generatings = grammar.nullable
+    initial = [0] * len(nonterminals)
+    relation: List[List[int]] = [[] for _ in nonterminals]
     for production in grammar.productions:
-        nt = production.left
-        rule = production.rule
-        nt_firsts = raw_firsts[nt]
-        for symbol in rule:
-            nt_firsts.add(symbol)
+        left = nt_index[production.left]
+        for symbol in production.rule:
+            if symbol is epsilon:
+                continue
+            if isinstance(symbol, NonTerminalBase):
+                relation[left].append(nt_index[symbol])
+            else:
+                initial[left] |= 1 << terminal_index[symbol]
             if symbol not in epsilon_generatings:
                 break
-    clean_firsts: Dict[Nonterminal, Set[Terminal]] = {
-        nt: {terminal for terminal in terminals if not isinstance(terminal, NonTerminalBase)}
-        for nt, terminals in raw_firsts.items()
-    }
-    updates: Dict[Nonterminal, Tuple[Set[Terminal], Set[Nonterminal]]] = {
-        nt: (
-            {symbol for symbol in symbols if not isinstance(symbol, NonTerminalBase)},
-            {symbol for symbol in symbols if isinstance(symbol, NonTerminalBase)}
-        )
-        for nt, symbols in raw_firsts.items()
-    }
-    while updates:
-        new_updates: Dict[Nonterminal, Tuple[Set[Terminal], Set[Nonterminal]]] = {}
-        for nt, (terminals, nonterminals) in updates.items():
-            firsts = clean_firsts[nt]
-            firsts.update(terminals)
-            firsts_nts = raw_firsts[nt]
-            firsts_nts.update(nonterminals)
-            new_terminals = {
-                symbol
-                for nonterminal in nonterminals
-                for symbol in clean_firsts[nonterminal]
-            }.difference(firsts)
-            new_nonterminals = {
-                nonterminal
-                for nt in nonterminals
-                for nonterminal in updates[nt][1]
-            }.difference(firsts_nts)
-            if new_terminals or new_nonterminals:
-                new_updates[nt] = (new_terminals, new_nonterminals)
-        updates = new_updates
-    return clean_firsts
+    bits = digraph(relation, initial)
+    return TerminalBitsets(terminals, dict(zip(nonterminals, bits)))
 
 
 def get_follows(
     grammar: Grammar[Terminal, Nonterminal],
     firsts: Optional[TerminalSets[Terminal, Nonterminal]] = None
-) -> Dict[Nonterminal, TerminalsSet[Terminal]]:
+) -> TerminalBitsets[Terminal, Nonterminal]:
     """
     FOLLOW(A) = {c ∣ S⇒∗αAcβ} ∪ {$ if S⇒∗αA}
 
@@ -196,54 +208,95 @@ def get_follows(
     Lemma: A→αBβ ∈ P ∧ (ε ∈ FIRST(β))  ⇒ FOLLOW(A) ⊂ FOLLOW(B)
     """
     firsts = firsts or get_firsts(grammar)
-    raw_follows: Dict[Nonterminal, Set[Union[Terminal, Nonterminal, SpecialNonterminal]]] = {
-        nonterminal: set() for nonterminal in grammar.nonterminals
-    }
-    epsilon_generatings = get_epsilon_generatings(grammar)
+    if isinstance(firsts, TerminalBitsets):
+        terminals = firsts.terminals
+        terminal_index = firsts.terminal_index
+        first_bits = firsts.bits
+    else:
+        terminals = (*grammar.terminals, eof)
+        terminal_index = {terminal: no for no, terminal in enumerate(terminals)}
+        converted = {
+            nt: sum(1 << terminal_index[terminal] for terminal in nt_firsts)
+            for nt, nt_firsts in firsts.items()
+        }
+        first_bits = converted.__getitem__
+    nonterminals = tuple(grammar.nonterminals)
+    nt_index = {nt: no for no, nt in enumerate(nonterminals)}
+    epsilon_generatings = grammar.nullable
+    initial = [0] * len(nonterminals)
+    initial[nt_index[grammar.start_symbol]] |= 1 << terminal_index[eof]
+    relation: List[List[int]] = [[] for _ in nonterminals]
     for production in grammar.productions:
-        nt = production.left
-        rule = production.rule
-        for symbol in reversed(rule):
-            if isinstance(symbol, NonTerminalBase):
-                raw_follows[symbol].add(nt)
-            if symbol not in epsilon_generatings:
-                break
-        *rule_, follower = rule
-        for symbol in reversed(rule_):
-            if isinstance(follower, NonTerminalBase):
-                raw_follows[symbol].update(firsts[follower])
+        left = nt_index[production.left]
+        trailer = 0
+        trailer_nullable = True
+        for symbol in reversed(production.rule):
+            if symbol is epsilon:
+                continue
+            if not isinstance(symbol, NonTerminalBase):
+                trailer = 1 << terminal_index[symbol]
+                trailer_nullable = False
+                continue
+            symbol_no = nt_index[symbol]
+            initial[symbol_no] |= trailer
+            if trailer_nullable:
+                relation[symbol_no].append(left)
+            if symbol in epsilon_generatings:
+                trailer |= first_bits(symbol)
             else:
-                raw_follows[symbol].add(follower)
-            follower = symbol
-    clean_follows: Dict[Nonterminal, Set[Terminal]] = {
-        nt: {terminal for terminal in terminals if not isinstance(terminal, NonTerminalBase)}
-        for nt, terminals in raw_follows.items()
-    }
-    updates: Dict[Nonterminal, Tuple[Set[Terminal], Set[Nonterminal]]] = {
-        nt: (
-            {symbol for symbol in symbols if not isinstance(symbol, NonTerminalBase)},
-            {symbol for symbol in symbols if isinstance(symbol, NonTerminalBase)}
-        )
-        for nt, symbols in raw_follows.items()
-    }
-    while updates:
-        new_updates: Dict[Nonterminal, Tuple[Set[Terminal], Set[Nonterminal]]] = {}
-        for nt, (terminals, nonterminals) in updates.items():
-            follows = clean_follows[nt]
-            follows.update(terminals)
-            follows_nts = raw_follows[nt]
-            follows_nts.update(nonterminals)
-            new_terminals = {
-                symbol
-                for nonterminal in nonterminals
-                for symbol in clean_follows[nonterminal]
-            }.difference(follows)
-            new_nonterminals = {
-                nonterminal
-                for nt in nonterminals
-                for nonterminal in updates[nt][1]
-            }.difference(follows_nts)
-            if new_terminals or new_nonterminals:
-                new_updates[nt] = (new_terminals, new_nonterminals)
-        updates = new_updates
-    return clean_follows
+                trailer = first_bits(symbol)
+                trailer_nullable = False
+    bits = digraph(relation, initial)
+    return TerminalBitsets(terminals, dict(zip(nonterminals, bits)))
+
+
+def digraph(relation: Sequence[Sequence[int]], initial: Sequence[int]) -> List[int]:
+    """
+    F(x) = F'(x) ∪ ⋃{F(y) ∣ x R y}
+
+    DeRemer–Pennello digraph traversal. Nodes are numbered 0..n-1, sets are
+    int bitmasks. Every edge is followed once and members of one strongly
+    connected component share the resulting set, so the cost is linear in
+    the size of the relation.
+    """
+    size = len(initial)
+    values = list(initial)
+    depths = [0] * size
+    finished = size + 1
+    stack: List[int] = []
+    for root in range(size):
+        if depths[root]:
+            continue
+        stack.append(root)
+        depths[root] = len(stack)
+        work = [(root, 0, len(stack))]
+        while work:
+            node, edge, depth = work[-1]
+            edges = relation[node]
+            if edge < len(edges):
+                work[-1] = (node, edge + 1, depth)
+                target = edges[edge]
+                if not depths[target]:
+                    stack.append(target)
+                    depths[target] = len(stack)
+                    work.append((target, 0, len(stack)))
+                    continue
+                if depths[target] < depths[node]:
+                    depths[node] = depths[target]
+                values[node] |= values[target]
+                continue
+            work.pop()
+            if depths[node] == depth:
+                value = values[node]
+                while True:
+                    member = stack.pop()
+                    depths[member] = finished
+                    values[member] = value
+                    if member == node:
+                        break
+            if work:
+                parent = work[-1][0]
+                if depths[node] < depths[parent]:
+                    depths[parent] = depths[node]
+                values[parent] |= values[node]
+    return values
@@ -29,6 +29,11 @@ class NonTerminalBase(NonTerminalMeta):
         self._name = name
 
     def __call__(cls, *args):
+        if cls.is_abstract:
+            # Abstract nonterminals derive single symbols and have no
+            # nodes of their own, the child (None for ε) passes through.
+            child, = args
+            return child
         obj = super().__call__()
         obj.args = args
         return obj
@@ -51,6 +56,8 @@ class SpecialNonterminal(NonTerminalBase):
             return self is other
         return NotImplemented
 
+    __hash__ = NonTerminalBase.__hash__
+
 
 class Nonterminal(NonTerminalBase):
 
@@ -59,6 +66,8 @@ class Nonterminal(NonTerminalBase):
             return (self._name == other._name)
         return NotImplemented
 
+    __hash__ = NonTerminalBase.__hash__
+
 
 start = SpecialNonterminal("S")
 epsilon = SpecialNonterminal("ε")
@@ -66,4 +75,4 @@ eof = SpecialNonterminal("EOF")
 
 
 def is_epsilon_generating(nt: NonTerminalBase, productions: Productions) -> bool:
-    raise NotImplementedError
+    return nt in productions.nullable
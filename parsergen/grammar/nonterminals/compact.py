@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+from collections import namedtuple
+from typing import Any, ClassVar, Dict, Iterable, Tuple, Type
+
+from parsergen.grammar.productions import Production
+
+from . import NonTerminalBase
+from .declarative import declared_fields
+
+
+class CompactNode:
+    """
+    Mixin of compact parse tree nodes. Node classes are named tuples with
+    no instance dict: one class per nonterminal and arity, children are the
+    tuple items and are reachable by the field names declared on the
+    nonterminal (positional `_0`, `_1`, ... when nothing is declared).
+    """
+
+    __slots__ = ()
+
+    kind: ClassVar[NonTerminalBase]
+    fields: ClassVar[Tuple[str, ...]]
+
+    @property
+    def args(self) -> Tuple[Any, ...]:
+        return tuple(self)  # type: ignore
+
+
+def compact_node_class(nt: NonTerminalBase, arity: int) -> Type[CompactNode]:
+    declared = declared_fields(nt)
+    names = declared if len(declared) == arity else tuple(f"_{position}" for position in range(arity))
+    base = namedtuple("Node", names, rename=True)  # type: ignore
+    return type(str(nt), (base, CompactNode), {"__slots__": (), "kind": nt, "fields": base._fields})
+
+
+def compact_builders(
+    productions: Iterable[Production[Any, NonTerminalBase]]
+) -> Dict[Production[Any, NonTerminalBase], Type[CompactNode]]:
+    """
+    Compact node classes for `productions`, ready to be used as parser
+    builders. Classes are shared by productions of the same nonterminal
+    and arity. Abstract nonterminals get none, they pass their child
+    through.
+    """
+    classes: Dict[Tuple[NonTerminalBase, int], Type[CompactNode]] = {}
+    builders: Dict[Production[Any, NonTerminalBase], Type[CompactNode]] = {}
+    for production in productions:
+        if production.left.is_abstract:
+            continue
+        key = (production.left, len(production.rule))
+        cls = classes.get(key)
+        if cls is None:
+            cls = classes[key] = compact_node_class(*key)
+        builders[production] = cls
+    return builders
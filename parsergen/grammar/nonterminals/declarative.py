@@ -2,14 +2,18 @@ from __future__ import annotations
 
 import sys
 
-from typing import Any, Dict, Iterable, Tuple, Type, get_type_hints
+from typing import Any, Dict, List, Set, Tuple, Type, get_type_hints
 from typing import Union
+from typing import TYPE_CHECKING
+from weakref import WeakKeyDictionary
 if sys.version_info >= (3, 8):
     from typing import get_args, get_origin
     from typing import Literal
 else:
     from typing_extensions import get_args, get_origin
     from typing_extensions import Literal
+if TYPE_CHECKING:
+    from parsergen.grammar.productions import Production
 
 
 def subclasses(cls, recursive=False):
@@ -19,26 +23,121 @@ def subclasses(cls, recursive=False):
             yield from subclasses(subclass, recursive=True)
 
 
-def get_lefts(generalized: Iterable):
-    if not generalized:
-        yield ()
-        return
-    item, *generalized_tail = generalized
-    if isinstance(item, tuple):
-        for variant in item:
-            for tail in get_lefts(generalized_tail):
-                yield (variant, *tail)
-    else:
-        for tail in get_lefts(generalized_tail):
-            yield (item, *tail)
+def declared_fields(cls) -> Tuple[str, ...]:
+    """
+    Names of the fields annotated on a nonterminal class itself,
+    in declaration order.
+    """
+    return tuple(cls.__dict__.get("__annotations__", {}))
 
 
 def nonterminal_base():
-    return NonTerminalMeta(
+    from . import NonTerminalBase
+    return NonTerminalBase(
         "RootNonTerminal", (), {"__root__": True}
     )
 
 
+NoneType = type(None)
+
+# Resolved field hints per declared class, evaluated once.
+_hints: WeakKeyDictionary = WeakKeyDictionary()
+
+
+def field_hints(cls) -> Dict[str, Any]:
+    hints = _hints.get(cls)
+    if hints is None:
+        hints = _hints[cls] = get_type_hints(cls)
+    return hints
+
+
+def alternatives(hint) -> Tuple[Any, ...]:
+    """
+    Flat symbol alternatives of a Union/Literal/Optional hint, None stands
+    for an omitted (epsilon) field. Other hints have no alternatives.
+    """
+    if isinstance(hint, NonTerminalMeta):
+        return (hint, )
+    if hint is NoneType:
+        return (None, )
+    origin = get_origin(hint)
+    if origin is Literal:
+        return get_args(hint)
+    if origin is Union:
+        flat: List[Any] = []
+        for arg in get_args(hint):
+            for alternative in alternatives(arg):
+                if alternative not in flat:
+                    flat.append(alternative)
+        return tuple(flat)
+    return ()
+
+
+class DeclaredGrammar:
+    """
+    Two passes over the declared nonterminals of a root class. Fields with
+    several alternatives (Union, Optional, Literal of many values) become
+    helper nonterminals named after the alternatives, shared by all fields
+    with the same set, so no rule is multiplied out. Abstract nonterminals
+    derive each of their direct subclasses.
+
+    Helpers are abstract too: abstract nonterminals pass their child
+    through instead of building a node, so a field holds the alternative
+    that was parsed (None for an omitted one) as declared.
+
+    Sets of literals only, whose values appear in no other field or set,
+    become terminal classes instead of helpers (one table column for
+    e.g. all the digits); fields hold the literal that was parsed too.
+    """
+
+    def __init__(self, declared: Tuple[Any, ...]) -> None:
+        from parsergen.grammar.productions import Production, Rule
+        from parsergen.grammar.terminals import TerminalClass
+        from . import Nonterminal, epsilon
+        self.declared = declared
+        self.nonterminals: List[Any] = list(declared)
+        self.productions: List[Production] = []
+        uses: Dict[Any, Set[Tuple[Any, ...]]] = {}
+        for nonterminal in declared:
+            if not nonterminal.is_abstract:
+                for hint in field_hints(nonterminal).values():
+                    options = alternatives(hint)
+                    for option in options:
+                        uses.setdefault(option, set()).add(options)
+        helpers: Dict[Tuple[Any, ...], Any] = {}
+        for nonterminal in declared:
+            if nonterminal.is_abstract:
+                for subclass in nonterminal.__subclasses__():
+                    self.productions.append(Production(nonterminal, Rule((subclass, ))))
+                continue
+            rule: List[Any] = []
+            for hint in field_hints(nonterminal).values():
+                options = alternatives(hint)
+                if not options:
+                    continue
+                if len(options) == 1 and options[0] is not None:
+                    rule.append(options[0])
+                    continue
+                if all(
+                    option is not None and not isinstance(option, NonTerminalMeta) and len(uses[option]) == 1
+                    for option in options
+                ):
+                    rule.append(TerminalClass(options))
+                    continue
+                helper = helpers.get(options)
+                if helper is None:
+                    name = " | ".join(
+                        "ε" if option is None else str(option) if isinstance(option, NonTerminalMeta) else repr(option)
+                        for option in options
+                    )
+                    helper = helpers[options] = Nonterminal(f"({name})", (), {"__abstract__": True})
+                    self.nonterminals.append(helper)
+                    for option in options:
+                        self.productions.append(Production(helper, Rule((epsilon if option is None else option, ))))
+                rule.append(helper)
+            self.productions.append(Production(nonterminal, Rule(rule or (epsilon, ))))
+
+
 class NonTerminalMeta(type):
 
     __abstract: bool
@@ -71,29 +170,21 @@ class NonTerminalMeta(type):
     def is_root(cls):
         return cls.__root
 
-    def get_productions(cls):
+    def declared_grammar(cls) -> DeclaredGrammar:
         if not cls.is_root:
-            TypeError(f"Can't call get_prosuctions on non-root nonterminal class {cls}")
-        productions = []
-        for nonterminal in subclasses(cls, recursive=True):
-            annotations = get_type_hints(nonterminal)
-            print(nonterminal.__name__)
-            generalized_rule = []
-            variative = (Union, Literal)
-            for name, hint in annotations.items():
-                origin = get_origin(hint)
-                args = get_args(hint)
-                _args = ", ".join(
-                    arg if isinstance(arg, str) else arg.__name__
-                    for arg in args
-                )
-                args_repr = f"[{_args}]" if args else ""
-                print(f"  {name}: {origin}{args_repr}")
-                if isinstance(hint, NonTerminalMeta):
-                    generalized_rule.append(hint)
-                elif origin in variative:
-                    generalized_rule.append(args)
-            for left in get_lefts(generalized_rule):
-                productions.append((nonterminal, left))
-            print()
-        return productions
+            raise TypeError(f"Can't extract productions from non-root nonterminal class {cls}")
+        declared = tuple(subclasses(cls, recursive=True))
+        extracted = cls.__dict__.get("_declared_grammar")
+        if extracted is None or extracted.declared != declared:
+            extracted = DeclaredGrammar(declared)
+            type.__setattr__(cls, "_declared_grammar", extracted)
+        return extracted
+
+    def get_nonterminals(cls) -> List[Any]:
+        """
+        Declared nonterminals followed by the generated helpers.
+        """
+        return list(cls.declared_grammar().nonterminals)
+
+    def get_productions(cls) -> List[Production]:
+        return list(cls.declared_grammar().productions)
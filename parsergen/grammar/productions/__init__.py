@@ -1,8 +1,8 @@
 from dataclasses import dataclass
 
-from typing import Generic, Iterable, Iterator, List, Reversible, Tuple, TypeVar, Union
+from typing import Dict, FrozenSet, Generic, Iterable, Iterator, KeysView, List, Optional, Reversible, Sequence, Tuple, TypeVar, Union, overload
 
-from parsergen.grammar.nonterminals import NonTerminalBase
+from parsergen.grammar.nonterminals import NonTerminalBase, epsilon
 
 
 Terminal = TypeVar("Terminal")
@@ -21,6 +21,9 @@ class Rule(Reversible[Union[Terminal, Nonterminal]], Generic[Terminal, Nontermin
             return self.symbols == other.symbols
         return NotImplemented
 
+    def __hash__(self) -> int:
+        return hash(self.symbols)
+
     def __getitem__(self, index):
         return self.symbols[index]
 
@@ -45,7 +48,7 @@ class Rule(Reversible[Union[Terminal, Nonterminal]], Generic[Terminal, Nontermin
         return f"{cls.__name__}({self})"
 
 
-@dataclass
+@dataclass(frozen=True)
 class Production(Generic[Terminal, Nonterminal]):
 
     left: Nonterminal
@@ -63,19 +66,105 @@ class Production(Generic[Terminal, Nonterminal]):
         return self.right
 
 
-class Productions(Generic[Terminal, Nonterminal], List[Production[Terminal, Nonterminal]]):
+class Productions(Sequence[Production[Terminal, Nonterminal]], Generic[Terminal, Nonterminal]):
+    """
+    Immutable, duplicate-free sequence of productions.
+
+    Productions keep the order they were given in and the position of
+    a production is its id. Lookups by id, by left-hand side and by any
+    symbol of the right-hand side are dictionary hits built in one pass.
+    The set of nullable nonterminals is computed on first use.
+    """
+
+    _productions: Tuple[Production[Terminal, Nonterminal], ...]
+    _ids: Dict[Production[Terminal, Nonterminal], int]
+    _by_lhs: Dict[Nonterminal, Tuple[Production[Terminal, Nonterminal], ...]]
+    _by_symbol: Dict[Union[Terminal, Nonterminal], Tuple[Production[Terminal, Nonterminal], ...]]
+    _nullable: Optional[FrozenSet[Nonterminal]] = None
+
+    def __init__(self, productions: Iterable[Production[Terminal, Nonterminal]] = ()) -> None:
+        ids: Dict[Production[Terminal, Nonterminal], int] = {}
+        by_lhs: Dict[Nonterminal, List[Production[Terminal, Nonterminal]]] = {}
+        by_symbol: Dict[Union[Terminal, Nonterminal], List[Production[Terminal, Nonterminal]]] = {}
+        for production in productions:
+            if production in ids:
+                continue
+            ids[production] = len(ids)
+            by_lhs.setdefault(production.left, []).append(production)
+            for symbol in dict.fromkeys(production.right):
+                by_symbol.setdefault(symbol, []).append(production)
+        self._productions = tuple(ids)
+        self._ids = ids
+        self._by_lhs = {nt: tuple(group) for nt, group in by_lhs.items()}
+        self._by_symbol = {symbol: tuple(group) for symbol, group in by_symbol.items()}
+
+    @overload
+    def __getitem__(self, index: int) -> Production[Terminal, Nonterminal]: ...
+    @overload
+    def __getitem__(self, index: slice) -> Tuple[Production[Terminal, Nonterminal], ...]: ...
+    def __getitem__(self, index):
+        return self._productions[index]
+
+    def __iter__(self) -> Iterator[Production[Terminal, Nonterminal]]:
+        return iter(self._productions)
+
+    def __len__(self) -> int:
+        return len(self._productions)
 
-    def append(self, item: Production[Terminal, Nonterminal]) -> None:
-        if item not in self:
-            return super().append(item)
-        return None
+    def __contains__(self, item: object) -> bool:
+        return item in self._ids
+
+    def __repr__(self) -> str:
+        cls = type(self)
+        return f"{cls.__name__}({list(self._productions)!r})"
 
-    def lhs_filter(self, nt: Nonterminal):
-        for production in self:
-            if production.left == nt:
-                yield production
-    
-    def rhs_filter(self, symbol: Union[Terminal, Nonterminal]):
-        for production in self:
-            if symbol in production.right:
-                yield production
+    def index(self, production: Production[Terminal, Nonterminal]) -> int:  # type: ignore[override]
+        try:
+            return self._ids[production]
+        except KeyError:
+            raise ValueError(f"{production} is not in productions") from None
+
+    @property
+    def lefts(self) -> KeysView[Nonterminal]:
+        return self._by_lhs.keys()
+
+    def lhs_filter(self, nt: Nonterminal) -> Tuple[Production[Terminal, Nonterminal], ...]:
+        return self._by_lhs.get(nt, ())
+
+    def rhs_filter(self, symbol: Union[Terminal, Nonterminal]) -> Tuple[Production[Terminal, Nonterminal], ...]:
+        return self._by_symbol.get(symbol, ())
+
+    @property
+    def nullable(self) -> FrozenSet[Nonterminal]:
+        """
+        Nonterminals deriving the empty string, epsilon itself included.
+
+        Every production keeps a counter of distinct right-hand side
+        nonterminals not yet known to be nullable, productions containing
+        terminals never qualify. Each newly nullable nonterminal decrements
+        the counters of the productions using it, so the whole analysis
+        is linear in the size of the grammar.
+        """
+        if self._nullable is not None:
+            return self._nullable
+        counters: Dict[Production[Terminal, Nonterminal], int] = {}
+        nullable = {epsilon}
+        queue = []
+        for production in self._productions:
+            symbols = {symbol for symbol in production.right if symbol is not epsilon}
+            if not all(isinstance(symbol, NonTerminalBase) for symbol in symbols):
+                continue
+            counters[production] = len(symbols)
+            if not symbols and production.left not in nullable:
+                nullable.add(production.left)
+                queue.append(production.left)
+        for nt in queue:
+            for production in self._by_symbol.get(nt, ()):
+                if production not in counters:
+                    continue
+                counters[production] -= 1
+                if counters[production] == 0 and production.left not in nullable:
+                    nullable.add(production.left)
+                    queue.append(production.left)
+        self._nullable = frozenset(nullable)
+        return self._nullable
@@ -0,0 +1,33 @@
+from __future__ import annotations
+
+from typing import Generic, Iterable, Tuple, TypeVar
+
+
+Terminal = TypeVar("Terminal")
+
+
+class TerminalClass(Generic[Terminal]):
+    """
+    Terminal standing for any of its members, e.g. the values of a
+    Literal["0", ..., "9"] field. Grammars use it in place of its members,
+    so parser tables get a single column for all of them; pushed members
+    map to the class and stay the leaves of parse trees.
+    """
+
+    __slots__ = ("members", )
+
+    members: Tuple[Terminal, ...]
+
+    def __init__(self, members: Iterable[Terminal]) -> None:
+        self.members = tuple(members)
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, TerminalClass):
+            return self.members == other.members
+        return NotImplemented
+
+    def __hash__(self) -> int:
+        return hash((TerminalClass, self.members))
+
+    def __repr__(self) -> str:
+        return f"({' | '.join(repr(member) for member in self.members)})"
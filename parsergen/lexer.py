@@ -0,0 +1,149 @@
+from __future__ import annotations
+
+from array import array
+from bisect import bisect_right
+from typing import Collection, Dict, Generic, Iterator, Mapping, NamedTuple, Optional, Tuple, TypeVar, Union
+
+from .tokenizer import DFA, compile_patterns
+
+
+Terminal = TypeVar("Terminal")
+
+# Anything indexable by position yielding characters or byte values:
+# str, bytes, bytearray, memoryview over bytes or an mmap.
+Source = Union[str, bytes, bytearray, memoryview]
+
+
+class Token(NamedTuple):
+    """
+    Lexed terminal as its id and a span of the source, the text itself is
+    never copied out until asked for.
+    """
+
+    id: int
+    offset: int
+    length: int
+
+    def text(self, source: Source) -> Union[str, bytes]:
+        text = source[self.offset:self.offset + self.length]
+        return text.tobytes() if isinstance(text, memoryview) else text
+
+
+class LexingError(Exception):
+    def __init__(self, position: int) -> None:
+        self.position = position
+        super().__init__(f"No token matches input at position {position}.")
+
+
+class Lexer(Generic[Terminal]):
+    """
+    Longest match scanner over a single minimized DFA built from
+    `tokens`, a terminal → regex mapping. On equal lengths the terminal
+    given first wins. Matches of `skip` terminals (whitespace, comments)
+    are dropped.
+
+    The lexer emits terminal ids: by default the position of a terminal in
+    `tokens`, or the ids of `terminal_ids` (for example parser tables'
+    `terminal_ids`), so the output can be fed to a parser runtime directly.
+    Input is scanned by position and never sliced.
+    """
+
+    terminals: Tuple[Terminal, ...]
+    dfa: DFA
+    emits: Tuple[Optional[int], ...]
+
+    def __init__(
+        self,
+        tokens: Mapping[Terminal, str],
+        *,
+        skip: Collection[Terminal] = (),
+        terminal_ids: Optional[Mapping[Terminal, int]] = None
+    ) -> None:
+        self.terminals = tuple(tokens)
+        self.skip = frozenset(skip)
+        self.dfa = compile_patterns([tokens[terminal] for terminal in self.terminals])
+        self.emits = self._emits(terminal_ids)
+        self._classes: Dict[Union[str, int], int] = {}
+
+    def _emits(self, terminal_ids: Optional[Mapping[Terminal, int]]) -> Tuple[Optional[int], ...]:
+        if terminal_ids is not None:
+            missing = [
+                terminal for terminal in self.terminals
+                if terminal not in self.skip and terminal not in terminal_ids
+            ]
+            if missing:
+                terminals = ", ".join(map(repr, missing))
+                raise ValueError(f"Terminals {terminals} have no ids, skip them or add them to the grammar.")
+        return tuple(
+            None if terminal in self.skip else
+            terminal_ids[terminal] if terminal_ids is not None else number
+            for number, terminal in enumerate(self.terminals)
+        )
+
+    def bind(self, terminal_ids: Mapping[Terminal, int]) -> Lexer[Terminal]:
+        """
+        Lexer sharing this DFA that emits ids from `terminal_ids`.
+        """
+        lexer = object.__new__(type(self))
+        lexer.__dict__.update(self.__dict__)
+        lexer.emits = self._emits(terminal_ids)
+        return lexer
+
+    def tokens(
+        self,
+        source: Source,
+        start: int = 0,
+        end: Optional[int] = None
+    ) -> Iterator[Token]:
+        """
+        Yield every token in source[start:end].
+        """
+        dfa = self.dfa
+        transitions = dfa.transitions
+        accepts = dfa.accepts
+        width = dfa.classes
+        boundaries = dfa.boundaries
+        classes = self._classes
+        emits = self.emits
+        position = start
+        end = len(source) if end is None else end
+        while position < end:
+            state = 0
+            matched = -1
+            matched_end = position
+            index = position
+            while index < end:
+                char = source[index]
+                cls = classes.get(char)
+                if cls is None:
+                    cls = classes[char] = bisect_right(boundaries, char if isinstance(char, int) else ord(char)) - 1
+                state = transitions[state * width + cls]
+                if state < 0:
+                    break
+                index += 1
+                if accepts[state] >= 0:
+                    matched = accepts[state]
+                    matched_end = index
+            if matched < 0:
+                raise LexingError(position)
+            emitted = emits[matched]
+            if emitted is not None:
+                yield Token(emitted, position, matched_end - position)
+            position = matched_end
+
+    def ids(self, source: Source, start: int = 0, end: Optional[int] = None) -> array:
+        """
+        Terminal ids of all tokens in source[start:end] as an int array,
+        ready for a runtime's `feed`.
+        """
+        return array("i", (token[0] for token in self.tokens(source, start, end)))
+
+
+SPECIAL = frozenset("\\.^$*+?{}[]()|-")
+
+
+def literal(text: str) -> str:
+    """
+    Pattern matching `text` verbatim.
+    """
+    return "".join(f"\\{char}" if char in SPECIAL else char for char in text)
@@ -0,0 +1,257 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+from typing import Any, Dict, List, Mapping, Optional, Tuple, Type, TypeVar, Union
+
+from parsergen.grammar import Grammar
+from parsergen.grammar.nonterminals import NonTerminalBase, Nonterminal as NamedNonterminal, SpecialNonterminal
+from parsergen.grammar.nonterminals import eof, epsilon, start
+from parsergen.grammar.productions import Production, Rule
+from parsergen.grammar.terminals import TerminalClass
+
+from .base import Parser, ParserTracer
+from .lalr import LALR1Parser
+from .ll import LL1Parser
+from .lr import LR0Parser, LR1Parser, LRParser
+from .slr import SLR1Parser
+from .tables import CompiledLLTable, CompiledLRTables
+
+
+Terminal = TypeVar("Terminal")
+Nonterminal = TypeVar("Nonterminal", bound=NonTerminalBase)
+
+# Layout (little-endian): header, JSON metadata (symbols, productions,
+# array directory), zero padding to 4 bytes, then the int32 arrays.
+MAGIC = b"PGEN"
+FORMAT_VERSION = 3
+HEADER = struct.Struct("<4sHB32sII")
+
+LR_TABLES, LL1_TABLE = range(2)
+
+PARSERS: Dict[str, Type[Parser]] = {
+    cls.__name__: cls for cls in (LR0Parser, LR1Parser, SLR1Parser, LALR1Parser, LL1Parser)
+}
+SPECIALS = {str(symbol): symbol for symbol in (eof, epsilon, start)}
+
+
+class ArtifactError(ValueError):
+    pass
+
+
+def grammar_fingerprint(grammar: Grammar[Terminal, Nonterminal]) -> bytes:
+    """
+    SHA-256 of the grammar content: symbols, start symbol and productions
+    in order. Stable across processes (no dependency on hash seeds).
+    """
+    content = {
+        "terminals": sorted(repr(terminal) for terminal in grammar.terminals),
+        "nonterminals": sorted(str(nt) for nt in grammar.nonterminals),
+        "start": str(grammar.start_symbol),
+        "productions": [
+            [str(production.left), [repr(symbol) for symbol in production.rule]]
+            for production in grammar.productions
+        ],
+    }
+    return hashlib.sha256(json.dumps(content, ensure_ascii=False).encode()).digest()
+
+
+class SymbolPool:
+
+    def __init__(self) -> None:
+        self.ids: Dict[Any, int] = {}
+        self.entries: List[Dict[str, Any]] = []
+
+    def __call__(self, symbol: Any) -> int:
+        no = self.ids.get(symbol)
+        if no is not None:
+            return no
+        # Members go first, entries only refer to earlier ones.
+        members = [self(member) for member in symbol.members] if isinstance(symbol, TerminalClass) else None
+        no = self.ids[symbol] = len(self.entries)
+        if isinstance(symbol, SpecialNonterminal):
+            entry: Dict[str, Any] = {"special": str(symbol)}
+        elif isinstance(symbol, NonTerminalBase):
+            entry = {"nonterminal": str(symbol)}
+            if symbol.is_abstract:
+                entry["abstract"] = True
+        else:
+            entry = {"terminal": repr(symbol)}
+            if isinstance(symbol, (str, int, float, bool)):
+                entry["value"] = symbol
+            elif members is not None:
+                entry["members"] = members
+        self.entries.append(entry)
+        return no
+
+
+def dump(parser: Union[LRParser[Terminal, Nonterminal], LL1Parser[Terminal, Nonterminal]],
+         grammar: Grammar[Terminal, Nonterminal]) -> bytes:
+    """
+    Serialize compiled tables of `parser` (built from `grammar`).
+    """
+    name = type(parser).__name__
+    if PARSERS.get(name) is not type(parser):
+        raise TypeError(f"Can't serialize {name}, only {', '.join(PARSERS)} are supported.")
+    pool = SymbolPool()
+    tables: Union[CompiledLRTables, CompiledLLTable]
+    if isinstance(parser, LL1Parser):
+        kind, tables = LL1_TABLE, parser.table
+    else:
+        kind, tables = LR_TABLES, parser.tables
+    meta: Dict[str, Any] = {
+        "parser": name,
+        "terminals": [pool(terminal) for terminal in tables.terminals],
+        "nonterminals": [pool(nt) for nt in tables.nonterminals],
+        "start": pool(grammar.start_symbol),
+        "productions": [
+            None if production is None else
+            [pool(production.left), [pool(symbol) for symbol in production.rule]]
+            for production in tables.productions
+        ],
+    }
+    meta["symbols"] = pool.entries
+    directory: Dict[str, Tuple[int, int]] = {}
+    chunks: List[bytes] = []
+    offset = 0
+    for array_name in tables.ARRAYS:
+        values = getattr(tables, array_name)
+        if sys.byteorder == "big":
+            values = array(values.typecode, values)
+            values.byteswap()
+        data = values.tobytes()
+        directory[array_name] = (offset, len(values))
+        chunks.append(data)
+        offset += len(data)
+    meta["arrays"] = directory
+    encoded = json.dumps(meta, ensure_ascii=False, separators=(",", ":")).encode()
+    padding = -(HEADER.size + len(encoded)) % 4
+    header = HEADER.pack(
+        MAGIC, FORMAT_VERSION, kind, grammar_fingerprint(grammar), len(encoded), HEADER.size + len(encoded) + padding
+    )
+    return b"".join((header, encoded, bytes(padding), *chunks))
+
+
+def fingerprint(data: Union[bytes, bytearray, memoryview, mmap.mmap]) -> bytes:
+    """
+    Grammar fingerprint an artifact was built for.
+    """
+    return read_header(memoryview(data))[2]
+
+
+def read_header(view: memoryview) -> Tuple[int, int, bytes, int, int]:
+    if len(view) < HEADER.size:
+        raise ArtifactError("Artifact is truncated.")
+    magic, version, kind, digest, meta_size, arrays_offset = HEADER.unpack_from(view)
+    if magic != MAGIC:
+        raise ArtifactError("Not a parser artifact.")
+    if version != FORMAT_VERSION:
+        raise ArtifactError(f"Unsupported artifact format version {version}, expected {FORMAT_VERSION}.")
+    return version, kind, digest, meta_size, arrays_offset
+
+
+def load(
+    data: Union[bytes, bytearray, memoryview, mmap.mmap],
+    grammar: Optional[Grammar[Terminal, Nonterminal]] = None,
+    tracer: Optional[ParserTracer[Terminal, Nonterminal]] = None
+) -> Parser[Terminal, Nonterminal]:
+    """
+    Parser from an artifact made by `dump`. Nothing is analysed: symbols,
+    productions and packed arrays are restored as they were written.
+
+    With `grammar` the artifact is checked against its fingerprint and
+    symbols are resolved to the grammar's own objects. Without it
+    nonterminals are recreated by name (abstract ones stay abstract) and
+    terminals from their stored values (str, int, float and bool
+    terminals and classes of them only).
+    """
+    view = memoryview(data)
+    _, kind, digest, meta_size, arrays_offset = read_header(view)
+    if grammar is not None and digest != grammar_fingerprint(grammar):
+        raise ArtifactError("Artifact was built for a different grammar.")
+    meta = json.loads(bytes(view[HEADER.size:HEADER.size + meta_size]))
+    symbols = resolve_symbols(meta["symbols"], grammar)
+    productions = [
+        None if production is None else
+        Production(symbols[production[0]], Rule(symbols[no] for no in production[1]))
+        for production in meta["productions"]
+    ]
+    arrays: Dict[str, array] = {}
+    for array_name, (offset, length) in meta["arrays"].items():
+        begin = arrays_offset + offset
+        values = arrays[array_name] = array("i")
+        values.frombytes(view[begin:begin + length * values.itemsize])
+        if sys.byteorder == "big":
+            values.byteswap()
+    terminals = [symbols[no] for no in meta["terminals"]]
+    nonterminals = [symbols[no] for no in meta["nonterminals"]]
+    cls = PARSERS.get(meta["parser"])
+    if cls is None:
+        raise ArtifactError(f"Unknown parser class {meta['parser']}.")
+    if kind == LL1_TABLE:
+        table = CompiledLLTable.from_parts(terminals, nonterminals, productions, arrays)  # type: ignore
+        return cls.from_table(table, symbols[meta["start"]], tracer, grammar=grammar)  # type: ignore
+    if kind == LR_TABLES:
+        tables = CompiledLRTables.from_parts(terminals, nonterminals, productions, arrays)  # type: ignore
+        return cls(tables, tracer=tracer)  # type: ignore
+    raise ArtifactError(f"Unknown tables kind {kind}.")
+
+
+def resolve_symbols(
+    entries: List[Mapping[str, Any]],
+    grammar: Optional[Grammar[Terminal, Nonterminal]]
+) -> List[Any]:
+    terminals: Dict[str, Any] = {}
+    nonterminals: Dict[str, Any] = {}
+    if grammar is not None:
+        terminals = {repr(terminal): terminal for terminal in grammar.terminals}
+        nonterminals = {str(nt): nt for nt in grammar.nonterminals}
+    symbols: List[Any] = []
+    for entry in entries:
+        if "special" in entry:
+            symbols.append(SPECIALS[entry["special"]])
+        elif "nonterminal" in entry:
+            name = entry["nonterminal"]
+            if name in nonterminals:
+                symbols.append(nonterminals[name])
+            else:
+                symbols.append(NamedNonterminal(name, (), {"__abstract__": entry.get("abstract", False)}))
+        elif entry["terminal"] in terminals:
+            symbols.append(terminals[entry["terminal"]])
+        elif "value" in entry:
+            symbols.append(entry["value"])
+        elif "members" in entry:
+            symbols.append(TerminalClass(symbols[member] for member in entry["members"]))
+        else:
+            raise ArtifactError(f"Terminal {entry['terminal']} can't be restored without its grammar.")
+    return symbols
+
+
+def save(
+    parser: Union[LRParser[Terminal, Nonterminal], LL1Parser[Terminal, Nonterminal]],
+    grammar: Grammar[Terminal, Nonterminal],
+    path: Union[str, os.PathLike]
+) -> None:
+    with open(path, "wb") as file:
+        file.write(dump(parser, grammar))
+
+
+def load_file(
+    path: Union[str, os.PathLike],
+    grammar: Optional[Grammar[Terminal, Nonterminal]] = None,
+    tracer: Optional[ParserTracer[Terminal, Nonterminal]] = None
+) -> Parser[Terminal, Nonterminal]:
+    """
+    `load` over a memory mapped artifact file.
+    """
+    with open(path, "rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        view = memoryview(mapped)
+        try:
+            return load(view, grammar, tracer)
+        finally:
+            view.release()
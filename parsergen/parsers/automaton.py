@@ -0,0 +1,408 @@
+from __future__ import annotations
+
+from typing import Collection, Dict, FrozenSet, Generic, Iterable, List, Optional, Tuple, TypeVar, Union
+
+from parsergen.grammar import Grammar
+from parsergen.grammar.algorythms import TerminalBitsets
+from parsergen.grammar.nonterminals import NonTerminalBase, SpecialNonterminal, eof, epsilon, start
+from parsergen.grammar.productions import Production, Rule
+
+
+Terminal = TypeVar("Terminal")
+Nonterminal = TypeVar("Nonterminal", bound=NonTerminalBase)
+Symbol = Union[Terminal, Nonterminal]
+Item = int
+Kernel = Tuple[Item, ...]
+
+
+class LR0Automaton(Generic[Terminal, Nonterminal]):
+    """
+    Canonical collection of LR(0) item sets of the augmented grammar.
+
+    Productions over non-generating nonterminals derive no sentence and are
+    left out, otherwise they would let a parser reduce forever. The others
+    are numbered by their position in the grammar, number 0 is reserved
+    for the augmenting production S → start_symbol. Every item
+    A → α•β is interned as a single integer, items of one production are
+    numbered consecutively, so advancing the dot is just `item + 1`.
+    States are identified by their kernels and deduplicated through
+    a kernel → state index.
+    """
+
+    grammar: Grammar[Terminal, Nonterminal]
+    productions: Tuple[Production[Terminal, Nonterminal], ...]
+    rules: Tuple[Tuple[Symbol, ...], ...]
+    nonterminals: Tuple[Nonterminal, ...]
+    terminals: Tuple[Union[Terminal, SpecialNonterminal], ...]
+    terminal_index: Dict[Union[Terminal, SpecialNonterminal], int]
+
+    item_production: List[int]
+    item_dot: List[int]
+    item_symbol: List[Optional[Symbol]]
+
+    kernels: List[Kernel]
+    closures: List[Kernel]
+    transitions: List[Dict[Symbol, int]]
+    kernel_index: Dict[Kernel, int]
+
+    def __init__(self, grammar: Grammar[Terminal, Nonterminal]) -> None:
+        self.grammar = grammar
+        augmenting = Production(start, Rule([grammar.start_symbol]))
+        generating = grammar.generating
+        self.productions = (augmenting, *(
+            production for production in grammar.productions
+            if production.left in generating and all(
+                symbol is epsilon or symbol in generating
+                for symbol in production.rule if isinstance(symbol, NonTerminalBase)
+            )
+        ))
+        self.rules = tuple(
+            tuple(symbol for symbol in production.rule if symbol is not epsilon)
+            for production in self.productions
+        )
+        self.terminals = (*grammar.terminals, eof)
+        self.terminal_index = {terminal: no for no, terminal in enumerate(self.terminals)}
+        self._intern_items()
+        self._index_nonterminals()
+        self._build_states()
+
+    def _intern_items(self) -> None:
+        self.item_production = item_production = []
+        self.item_dot = item_dot = []
+        self.item_symbol = item_symbol = []
+        self.production_items = production_items = []
+        for production_no, rule in enumerate(self.rules):
+            production_items.append(len(item_production))
+            for dot in range(len(rule) + 1):
+                item_production.append(production_no)
+                item_dot.append(dot)
+                item_symbol.append(rule[dot] if dot < len(rule) else None)
+
+    def _index_nonterminals(self) -> None:
+        starts: Dict[Nonterminal, List[Item]] = {}
+        for production_no, production in enumerate(self.productions):
+            starts.setdefault(production.left, []).append(self.production_items[production_no])
+        self.nonterminals = tuple(starts)
+        self.start_items = {nt: tuple(items) for nt, items in starts.items()}
+        order = {nt: no for no, nt in enumerate(self.nonterminals)}
+        left_corners: Dict[Nonterminal, FrozenSet[Nonterminal]] = {
+            nt: frozenset(
+                symbol for symbol in (self.item_symbol[item] for item in items)
+                if symbol in order
+            )
+            for nt, items in self.start_items.items()
+        }
+        # Closure of an item A → α•Bβ depends on B only, so it is computed
+        # once per nonterminal and reused for every state.
+        self.nt_closures: Dict[Nonterminal, Kernel] = {}
+        for nt in self.nonterminals:
+            reached = [nt]
+            seen = {nt}
+            for reached_nt in reached:
+                for corner in left_corners[reached_nt]:
+                    if corner not in seen:
+                        seen.add(corner)
+                        reached.append(corner)
+            reached.sort(key=order.__getitem__)
+            self.nt_closures[nt] = tuple(
+                item for reached_nt in reached for item in self.start_items[reached_nt]
+            )
+
+    def _build_states(self) -> None:
+        self.kernels = []
+        self.closures = []
+        self.transitions = []
+        self.kernel_index = {}
+        self._add_state((self.production_items[0], ))
+        state = 0
+        while state < len(self.kernels):
+            targets: Dict[Symbol, List[Item]] = {}
+            for item in self.closures[state]:
+                symbol = self.item_symbol[item]
+                if symbol is not None:
+                    targets.setdefault(symbol, []).append(item + 1)
+            transitions = self.transitions[state]
+            for symbol, items in targets.items():
+                kernel = tuple(sorted(items))
+                target = self.kernel_index.get(kernel)
+                if target is None:
+                    target = self._add_state(kernel)
+                transitions[symbol] = target
+            state += 1
+
+    def _add_state(self, kernel: Kernel) -> int:
+        state = len(self.kernels)
+        self.kernels.append(kernel)
+        self.closures.append(self.closure(kernel))
+        self.transitions.append({})
+        self.kernel_index[kernel] = state
+        return state
+
+    def closure(self, kernel: Kernel) -> Kernel:
+        nt_closures = self.nt_closures
+        added = []
+        seen = set(kernel)
+        expanded = set()
+        for item in kernel:
+            symbol = self.item_symbol[item]
+            if symbol in nt_closures and symbol not in expanded:
+                expanded.add(symbol)
+                for closure_item in nt_closures[symbol]:
+                    if closure_item not in seen:
+                        seen.add(closure_item)
+                        added.append(closure_item)
+        return (*kernel, *added)
+
+    def reductions(self, state: int) -> Iterable[int]:
+        item_symbol = self.item_symbol
+        item_production = self.item_production
+        for item in self.closures[state]:
+            if item_symbol[item] is None:
+                yield item_production[item]
+
+    def terminals_of(self, bits: int) -> Iterable[Union[Terminal, SpecialNonterminal]]:
+        terminals = self.terminals
+        while bits:
+            low = bits & -bits
+            yield terminals[low.bit_length() - 1]
+            bits ^= low
+
+    def __len__(self) -> int:
+        return len(self.kernels)
+
+
+class LR1Automaton(Generic[Terminal, Nonterminal]):
+    """
+    LR(1) item sets built over the cores of an LR(0) automaton.
+
+    Every LR(1) state is an LR(0) state (its core) plus a lookahead bitmask
+    for each kernel item. Lookaheads of closure items depend on the kernel
+    lookaheads linearly, so for every core the spontaneous part and the
+    propagation from kernel items are computed once and reused by all
+    LR(1) states sharing that core.
+
+    With `merge_states` a new state is merged into an existing one with the
+    same core when their lookaheads are weakly compatible (Pager, 1977).
+    This keeps the automaton close to LALR(1) size without introducing
+    reduce/reduce conflicts absent from canonical LR(1).
+    """
+
+    lr0: LR0Automaton[Terminal, Nonterminal]
+    cores: List[int]
+    lookaheads: List[Tuple[int, ...]]
+    transitions: List[Dict[Symbol, int]]
+
+    def __init__(
+        self,
+        lr0: LR0Automaton[Terminal, Nonterminal],
+        nullable: Collection[Nonterminal],
+        *,
+        merge_states: bool = False
+    ) -> None:
+        self.lr0 = lr0
+        self.merge_states = merge_states
+        self._index_suffixes(nullable)
+        self._propagations: Dict[int, Dict[Nonterminal, Tuple[int, int]]] = {}
+        self._build_states()
+
+    def _index_suffixes(self, nullable: Collection[Nonterminal]) -> None:
+        lr0 = self.lr0
+        terminal_index = lr0.terminal_index
+        firsts = lr0.grammar.firsts
+        first_bits: Dict[Nonterminal, int] = {}
+        for nt in lr0.nonterminals:
+            if nt not in firsts:
+                first_bits[nt] = 0
+            elif isinstance(firsts, TerminalBitsets) and firsts.terminals == lr0.terminals:
+                first_bits[nt] = firsts.bits(nt)
+            else:
+                bits = 0
+                for terminal in firsts[nt]:
+                    bits |= 1 << terminal_index[terminal]
+                first_bits[nt] = bits
+        # FIRST and nullability of the part of a rule after the dot,
+        # for every interned item.
+        self.suffix_first = suffix_first = [0] * len(lr0.item_symbol)
+        self.suffix_nullable = suffix_nullable = [True] * len(lr0.item_symbol)
+        for production_no, rule in enumerate(lr0.rules):
+            first_item = lr0.production_items[production_no]
+            bits = 0
+            is_nullable = True
+            for dot in range(len(rule) - 1, -1, -1):
+                symbol = rule[dot]
+                if isinstance(symbol, NonTerminalBase):
+                    if symbol in nullable:
+                        bits |= first_bits.get(symbol, 0)
+                    else:
+                        bits = first_bits.get(symbol, 0)
+                        is_nullable = False
+                else:
+                    bits = 1 << terminal_index[symbol]
+                    is_nullable = False
+                suffix_first[first_item + dot] = bits
+                suffix_nullable[first_item + dot] = is_nullable
+
+    def _propagation(self, core: int) -> Dict[Nonterminal, Tuple[int, int]]:
+        """
+        Lookaheads of closure items of an LR(0) core as a pair of bitmasks:
+        spontaneously generated terminals and kernel positions whose
+        lookaheads propagate to the closure items of a nonterminal.
+        """
+        propagation = self._propagations.get(core)
+        if propagation is not None:
+            return propagation
+        lr0 = self.lr0
+        item_symbol = lr0.item_symbol
+        item_production = lr0.item_production
+        productions = lr0.productions
+        suffix_first = self.suffix_first
+        suffix_nullable = self.suffix_nullable
+        kernel = lr0.kernels[core]
+        # (generator item, kernel position or None) pairs for every
+        # nonterminal standing after the dot somewhere in the closure
+        sources: Dict[Nonterminal, List[Tuple[int, Optional[int]]]] = {}
+        for position, item in enumerate(kernel):
+            symbol = item_symbol[item]
+            if isinstance(symbol, NonTerminalBase):
+                sources.setdefault(symbol, []).append((item, position))
+        for item in lr0.closures[core][len(kernel):]:
+            symbol = item_symbol[item]
+            if isinstance(symbol, NonTerminalBase):
+                sources.setdefault(symbol, []).append((item, None))
+        propagation = {nt: (0, 0) for nt in sources}
+        changed = True
+        while changed:
+            changed = False
+            for nt, generators in sources.items():
+                spontaneous, propagated = propagation[nt]
+                new_spontaneous, new_propagated = spontaneous, propagated
+                for item, position in generators:
+                    new_spontaneous |= suffix_first[item + 1]
+                    if not suffix_nullable[item + 1]:
+                        continue
+                    if position is not None:
+                        new_propagated |= 1 << position
+                    else:
+                        left = productions[item_production[item]].left
+                        left_spontaneous, left_propagated = propagation[left]
+                        new_spontaneous |= left_spontaneous
+                        new_propagated |= left_propagated
+                if (new_spontaneous, new_propagated) != (spontaneous, propagated):
+                    propagation[nt] = (new_spontaneous, new_propagated)
+                    changed = True
+        self._propagations[core] = propagation
+        return propagation
+
+    def item_lookaheads(self, state: int) -> Dict[int, int]:
+        lr0 = self.lr0
+        core = self.cores[state]
+        kernel_lookaheads = self.lookaheads[state]
+        propagation = self._propagation(core)
+        nt_lookaheads: Dict[Nonterminal, int] = {}
+        for nt, (spontaneous, propagated) in propagation.items():
+            bits = spontaneous
+            while propagated:
+                low = propagated & -propagated
+                bits |= kernel_lookaheads[low.bit_length() - 1]
+                propagated ^= low
+            nt_lookaheads[nt] = bits
+        kernel = lr0.kernels[core]
+        lookaheads = dict(zip(kernel, kernel_lookaheads))
+        productions = lr0.productions
+        item_production = lr0.item_production
+        for item in lr0.closures[core][len(kernel):]:
+            lookaheads[item] = nt_lookaheads[productions[item_production[item]].left]
+        return lookaheads
+
+    def _build_states(self) -> None:
+        lr0 = self.lr0
+        self.cores = []
+        self.lookaheads = []
+        self.transitions = []
+        self._index: Dict[Tuple[int, Tuple[int, ...]], int] = {}
+        self._core_states: Dict[int, List[int]] = {}
+        queue = [self._add_state(0, (1 << lr0.terminal_index[eof], ))]
+        queued = set(queue)
+        while queue:
+            state = queue.pop()
+            queued.discard(state)
+            core = self.cores[state]
+            lookaheads = self.item_lookaheads(state)
+            transitions = self.transitions[state]
+            for symbol, target_core in lr0.transitions[core].items():
+                target_lookaheads = tuple(
+                    lookaheads[item - 1] for item in lr0.kernels[target_core]
+                )
+                target, grown = self._find_state(target_core, target_lookaheads)
+                transitions[symbol] = target
+                if grown and target not in queued:
+                    queue.append(target)
+                    queued.add(target)
+        self._drop_unreachable()
+
+    def _find_state(self, core: int, lookaheads: Tuple[int, ...]) -> Tuple[int, bool]:
+        state = self._index.get((core, lookaheads))
+        if state is not None:
+            return state, False
+        if self.merge_states:
+            for state in self._core_states.get(core, ()):
+                existing = self.lookaheads[state]
+                if weakly_compatible(existing, lookaheads):
+                    merged = tuple(old | new for old, new in zip(existing, lookaheads))
+                    if merged == existing:
+                        return state, False
+                    del self._index[(core, existing)]
+                    self._index[(core, merged)] = state
+                    self.lookaheads[state] = merged
+                    return state, True
+        return self._add_state(core, lookaheads), True
+
+    def _add_state(self, core: int, lookaheads: Tuple[int, ...]) -> int:
+        state = len(self.cores)
+        self.cores.append(core)
+        self.lookaheads.append(lookaheads)
+        self.transitions.append({})
+        self._index[(core, lookaheads)] = state
+        self._core_states.setdefault(core, []).append(state)
+        return state
+
+    def _drop_unreachable(self) -> None:
+        # Redirected transitions of re-propagated merged states may leave
+        # states nothing leads to anymore.
+        order = [0]
+        numbers = {0: 0}
+        for state in order:
+            for target in self.transitions[state].values():
+                if target not in numbers:
+                    numbers[target] = len(order)
+                    order.append(target)
+        if len(order) == len(self.cores):
+            return
+        self.cores = [self.cores[state] for state in order]
+        self.lookaheads = [self.lookaheads[state] for state in order]
+        self.transitions = [
+            {symbol: numbers[target] for symbol, target in self.transitions[state].items()}
+            for state in order
+        ]
+
+    def reductions(self, state: int) -> Iterable[Tuple[int, int]]:
+        lr0 = self.lr0
+        item_symbol = lr0.item_symbol
+        item_production = lr0.item_production
+        for item, lookaheads in self.item_lookaheads(state).items():
+            if item_symbol[item] is None:
+                yield item_production[item], lookaheads
+
+    def __len__(self) -> int:
+        return len(self.cores)
+
+
+def weakly_compatible(first: Tuple[int, ...], second: Tuple[int, ...]) -> bool:
+    for i in range(len(first)):
+        for j in range(i + 1, len(first)):
+            if not ((first[i] & second[j]) | (second[i] & first[j])):
+                continue
+            if first[i] & first[j] or second[i] & second[j]:
+                continue
+            return False
+    return True
@@ -1,32 +1,240 @@
 from __future__ import annotations
 
+import asyncio
+import mmap
+import os
+
 from abc import ABC, abstractmethod
-from typing import Generic, Iterable, List, Mapping, Tuple, TypeVar, Union
-from parsergen.grammar import Grammar
+from collections import deque
+from itertools import islice
+from typing import TYPE_CHECKING, Generic, TypeVar
+from typing import Any, AsyncIterable, AsyncIterator, Callable, Deque, FrozenSet, Iterable, Iterator, List, Mapping
+from typing import Optional, Sequence, TextIO, Tuple, Union
+
+from parsergen.grammar.nonterminals import NonTerminalBase, SpecialNonterminal, eof, epsilon
+from parsergen.grammar.productions import Production
+
+from .tables import EPSILON, CompiledLLTable
 
-from parsergen.grammar.nonterminals import NonTerminalBase, SpecialNonterminal, epsilon, eof
-from parsergen.grammar.productions import Production, Rule
+if TYPE_CHECKING:
+    from parsergen.lexer import Lexer, Token
+    from .ll import LookaheadDecision
 
 
 Terminal = TypeVar("Terminal")
 Nonterminal = TypeVar("Nonterminal", bound=NonTerminalBase)
 
+# Tokens LLkRuntime.push_many buffers before running the parser over them.
+LOOKAHEAD_CHUNK = 64
+
+# Terminals AsyncRuntime pushes before yielding to the event loop.
+ASYNC_BATCH = 256
+
+# Input kinds of compiled runtimes: terminals, terminal ids or tokens
+# carrying a terminal id (see parsergen.lexer.Token). END is the end of
+# input pushed by `finalize`, eof (id 0) is rejected in any other input.
+TERMINALS, IDS, TOKENS, END = range(4)
+
+# Result of a runtime that has not accepted its input yet.
+MISSING: Any = object()
+
 
 class ParsingError(Exception):
     pass
 
 
+class ParserTracer(Generic[Terminal, Nonterminal]):
+    """
+    Receiver of parsing events, every method is a no-op here.
+
+    Parsers and runtimes take an optional tracer and check it against None
+    before reporting, so parsing without one costs nothing beyond that
+    check. LR parsers report shift, reduce and goto with state numbers,
+    LL parsers report shift (a matched terminal), expand and epsilon_pop.
+    """
+
+    def shift(self, terminal: Terminal, state: Optional[int] = None, target: Optional[int] = None) -> None:
+        pass
+
+    def reduce(self, production: Production[Terminal, Nonterminal], state: Optional[int] = None) -> None:
+        pass
+
+    def goto(self, nonterminal: Nonterminal, state: int, target: int) -> None:
+        pass
+
+    def expand(self, production: Production[Terminal, Nonterminal]) -> None:
+        pass
+
+    def epsilon_pop(self, nonterminal: Nonterminal) -> None:
+        pass
+
+
+class CallbackTracer(ParserTracer[Terminal, Nonterminal]):
+    """
+    Passes every event to `callback(kind, payload)` where kind is
+    the tracer method name and payload is the tuple of its arguments.
+    """
+
+    def __init__(self, callback: Callable[[str, Tuple[Any, ...]], None]) -> None:
+        self.callback = callback
+
+    def shift(self, terminal, state=None, target=None):
+        self.callback("shift", (terminal, state, target))
+
+    def reduce(self, production, state=None):
+        self.callback("reduce", (production, state))
+
+    def goto(self, nonterminal, state, target):
+        self.callback("goto", (nonterminal, state, target))
+
+    def expand(self, production):
+        self.callback("expand", (production, ))
+
+    def epsilon_pop(self, nonterminal):
+        self.callback("epsilon_pop", (nonterminal, ))
+
+
+class PrintTracer(CallbackTracer[Terminal, Nonterminal]):
+
+    def __init__(self, file: Optional[TextIO] = None) -> None:
+        super().__init__(lambda kind, payload: print(kind, *payload, file=file))
+
+
 class Parser(ABC, Generic[Terminal, Nonterminal]):
+    """
+    Parsers hold read-only tables only. Every parse runs in its own
+    runtime from `iterative_parse`, so one parser serves any number of
+    concurrent streams.
+
+    Nodes are built by calling the production's left side with the
+    children unless `builders` maps the production to another callable:
+    a compact node class from `compact_builders` or a semantic action
+    computing a value from the values of the children directly, so no tree
+    is built at all. `recognize` skips building entirely.
+
+    The parser's `builders` and `tracer` are the defaults of its runtimes,
+    every runtime (and every parse) may be given its own instead, so
+    parses sharing a parser never interfere.
+    """
+
+    builders: Optional[Mapping[Production[Terminal, Nonterminal], Callable[..., Any]]] = None
+    tracer: Optional[ParserTracer[Terminal, Nonterminal]] = None
+
+    def parse(
+        self,
+        incoming: Iterable[Terminal],
+        *,
+        builders: Optional[Mapping[Production[Terminal, Nonterminal], Callable[..., Any]]] = None,
+        tracer: Optional[ParserTracer[Terminal, Nonterminal]] = None
+    ) -> Nonterminal:
+        runtime = self.iterative_parse(builders=builders, tracer=tracer)
+        runtime.push_many(incoming)
+        return runtime.finalize()
+
+    def recognize(
+        self,
+        incoming: Iterable[Terminal],
+        *,
+        tracer: Optional[ParserTracer[Terminal, Nonterminal]] = None
+    ) -> bool:
+        runtime = self.iterative_parse(recognize=True, tracer=tracer)
+        try:
+            runtime.push_many(incoming)
+            runtime.finalize()
+        except ParsingError:
+            return False
+        return True
+
+    async def aparse(
+        self,
+        stream: AsyncIterable[Terminal],
+        *,
+        batch_size: int = ASYNC_BATCH,
+        builders: Optional[Mapping[Production[Terminal, Nonterminal], Callable[..., Any]]] = None,
+        tracer: Optional[ParserTracer[Terminal, Nonterminal]] = None
+    ) -> Nonterminal:
+        """
+        Parse terminals from an asynchronous stream of single terminals
+        (see `AsyncRuntime`).
+        """
+        runtime = AsyncRuntime(self.iterative_parse(builders=builders, tracer=tracer), batch_size=batch_size)
+        await runtime.push_stream(stream)
+        return runtime.finalize()
+
+    async def aparse_chunks(
+        self,
+        stream: AsyncIterable[Iterable[Terminal]],
+        *,
+        batch_size: int = ASYNC_BATCH,
+        builders: Optional[Mapping[Production[Terminal, Nonterminal], Callable[..., Any]]] = None,
+        tracer: Optional[ParserTracer[Terminal, Nonterminal]] = None
+    ) -> Nonterminal:
+        """
+        Parse terminals from an asynchronous stream of chunks, iterables
+        of terminals such as lists read at once (see `AsyncRuntime`).
+        """
+        runtime = AsyncRuntime(self.iterative_parse(builders=builders, tracer=tracer), batch_size=batch_size)
+        await runtime.push_chunks(stream)
+        return runtime.finalize()
 
     @abstractmethod
-    def parse(self, incoming: Iterable[Terminal]) -> Nonterminal:
+    def iterative_parse(
+        self,
+        *,
+        emit: Iterable[Nonterminal] = (),
+        recognize: bool = False,
+        builders: Optional[Mapping[Production[Terminal, Nonterminal], Callable[..., Any]]] = None,
+        tracer: Optional[ParserTracer[Terminal, Nonterminal]] = None
+    ) -> ParserRuntime[Terminal, Nonterminal]:
         pass
 
-    def iterative_parse(self) -> ParserRuntime:
-        pass
+    @property
+    def terminal_ids(self) -> Mapping[Union[Terminal, SpecialNonterminal], int]:
+        raise NotImplementedError(f"{type(self).__name__} does not run on terminal ids.")
+
+    def parse_file(
+        self,
+        path: Union[str, os.PathLike],
+        lexer: Lexer[Terminal],
+        *,
+        builders: Optional[Mapping[Production[Terminal, Nonterminal], Callable[..., Any]]] = None,
+        tracer: Optional[ParserTracer[Terminal, Nonterminal]] = None
+    ) -> Nonterminal:
+        """
+        Parse a file without reading it into memory: the file is mapped,
+        lexed over a memoryview and tokens go to the runtime by id, so the
+        leaves of the tree are `Token`s holding spans of the file.
+        """
+        lexer = lexer.bind(self.terminal_ids)
+        runtime = self.iterative_parse(builders=builders, tracer=tracer)
+        with open(path, "rb") as file:
+            if os.fstat(file.fileno()).st_size:
+                with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    view = memoryview(mapped)
+                    try:
+                        runtime.feed_tokens(lexer.tokens(view))
+                    finally:
+                        view.release()
+        return runtime.finalize()
 
 
 class ParserRuntime(ABC, Generic[Terminal, Nonterminal]):
+    """
+    Mutable state of a single parse fed by `push` or `push_many`.
+
+    Nodes of the `emit` nonterminals are handed out by `completed` as soon
+    as they are built and stand as None in their parents, so a long stream
+    of such nodes is parsed in bounded memory when the consumer drains them
+    on the way. The root node is always kept as the result.
+    """
+
+    emit: FrozenSet[Nonterminal]
+    emitted: Deque[Nonterminal]
+
+    def __init__(self, *, emit: Iterable[Nonterminal] = ()) -> None:
+        super().__init__()
+        self.emit = frozenset(emit)
+        self.emitted = deque()
 
     @property
     @abstractmethod
@@ -37,98 +245,412 @@ class ParserRuntime(ABC, Generic[Terminal, Nonterminal]):
     def push(self, symbol: Terminal) -> None:
         pass
 
+    def push_many(self, symbols: Iterable[Terminal]) -> None:
+        push = self.push
+        for symbol in symbols:
+            push(symbol)
+
     @abstractmethod
-    def finalize(self):
+    def finalize(self) -> Nonterminal:
         pass
 
+    def feed_tokens(self, tokens: Iterable[Token]) -> None:
+        raise NotImplementedError(f"{type(self).__name__} does not run on terminal ids.")
 
-class LL1Parser(Parser, Generic[Terminal, Nonterminal]):
+    def completed(self) -> Iterator[Nonterminal]:
+        emitted = self.emitted
+        while emitted:
+            yield emitted.popleft()
 
-    parse_table: Mapping[Nonterminal, Mapping[Terminal, Production[Terminal, Nonterminal]]]
 
-    def __init__(self, grammar: Grammar[Terminal, Nonterminal]) -> None:
-        super().__init__()
-        self.grammar = grammar
-        self.parse_table = self._get_parse_table(grammar)
+class AsyncRuntime(Generic[Terminal, Nonterminal]):
+    """
+    Drives a runtime from an asynchronous stream, as async readers hand
+    terminals out: one by one (`push_stream`, `feed_token_stream`) or in
+    chunks (`push_chunks`). Everything is pushed as soon as it arrives,
+    so nothing waits in a buffer for more input. Chunks longer than
+    `batch_size` are pushed in pieces, and control goes back to the
+    event loop after every `batch_size` terminals. A single big document
+    never blocks the loop for longer than one batch takes to parse.
+    """
 
-    def parse(self, incoming: Iterable[Terminal]) -> Nonterminal:
-        runtime = self.iterative_parse()
-        for symbol in incoming:
-            runtime.push(symbol)
-        runtime.finalize()
-        return runtime.result
+    runtime: ParserRuntime[Terminal, Nonterminal]
+    batch_size: int
 
-    def iterative_parse(self) -> LL1Runtime[Terminal, Nonterminal]:
-        return LL1Runtime(self.parse_table, self.grammar.start_symbol)
+    def __init__(self, runtime: ParserRuntime[Terminal, Nonterminal], *, batch_size: int = ASYNC_BATCH) -> None:
+        if batch_size <= 0:
+            raise ValueError(f"batch_size must be positive non-zero integer, but {batch_size} given.")
+        self.runtime = runtime
+        self.batch_size = batch_size
 
-    def _get_parse_table(
-        self,
-        grammar: Grammar[Terminal, Nonterminal]
-    ) -> Mapping[Nonterminal, Mapping[Terminal, Production[Terminal, Nonterminal]]]:
-        pass
+    async def push_stream(self, stream: AsyncIterable[Terminal]) -> None:
+        async for _ in self._terminals(stream, self.runtime.push):
+            pass
 
+    async def feed_token_stream(self, stream: AsyncIterable[Token]) -> None:
+        """
+        Push lexer tokens by their terminal ids, tokens become the leaves.
+        """
+        feed_tokens = self.runtime.feed_tokens
+        async for _ in self._terminals(stream, lambda token: feed_tokens((token, ))):
+            pass
 
-class LL1Runtime(ParserRuntime[Terminal, Nonterminal], Generic[Terminal, Nonterminal]):
+    async def push_chunks(self, stream: AsyncIterable[Iterable[Terminal]]) -> None:
+        async for _ in self._pieces(stream):
+            pass
 
-    parse_table: Mapping[Nonterminal, Mapping[Terminal, Production[Terminal, Nonterminal]]]
-    parse_stack: List[Union[Terminal, Nonterminal, SpecialNonterminal]]
-    recognize_stack: List[Tuple[Nonterminal, int, List[Union[Terminal, Nonterminal, None]]]]
+    async def completed(self, stream: AsyncIterable[Terminal]) -> AsyncIterator[Nonterminal]:
+        """
+        Push the whole stream of terminals and yield nodes of the runtime's
+        `emit` nonterminals as they are built. Nodes completed only by the
+        end of input are left to `runtime.completed()` after `finalize`.
+        """
+        runtime = self.runtime
+        async for _ in self._terminals(stream, runtime.push):
+            for node in runtime.completed():
+                yield node
+
+    async def completed_chunks(self, stream: AsyncIterable[Iterable[Terminal]]) -> AsyncIterator[Nonterminal]:
+        """
+        `completed` over a stream of chunks.
+        """
+        runtime = self.runtime
+        async for _ in self._pieces(stream):
+            for node in runtime.completed():
+                yield node
+
+    def finalize(self) -> Nonterminal:
+        return self.runtime.finalize()
+
+    async def _terminals(self, stream: AsyncIterable[Any], push: Callable[[Any], None]) -> AsyncIterator[None]:
+        batch_size = self.batch_size
+        pushed = 0
+        async for terminal in stream:
+            if pushed == batch_size:
+                await asyncio.sleep(0)
+                pushed = 0
+            push(terminal)
+            pushed += 1
+            yield
+
+    async def _pieces(self, stream: AsyncIterable[Iterable[Terminal]]) -> AsyncIterator[None]:
+        push_many = self.runtime.push_many
+        batch_size = self.batch_size
+        pushed = 0
+        async for chunk in stream:
+            for piece in split_chunk(chunk, batch_size):
+                if pushed >= batch_size:
+                    await asyncio.sleep(0)
+                    pushed = 0
+                push_many(piece)
+                pushed += len(piece)
+                yield
+
+
+def split_chunk(chunk: Iterable[Terminal], size: int) -> Iterator[Sequence[Terminal]]:
+    if isinstance(chunk, Sequence):
+        if len(chunk) <= size:
+            yield chunk
+            return
+        for offset in range(0, len(chunk), size):
+            yield chunk[offset:offset + size]
+        return
+    iterator = iter(chunk)
+    while True:
+        piece = list(islice(iterator, size))
+        if not piece:
+            return
+        yield piece
+
+
+class LLRuntime(ParserRuntime[Terminal, Nonterminal], ABC, Generic[Terminal, Nonterminal]):
+    """
+    Common part of predictive runtimes. The recognize stack holds nodes
+    under construction as (nonterminal, arguments count, arguments, builder). A node
+    is built as soon as its last argument arrives and is passed up to its
+    parent, the root becomes the result.
+    """
+
+    recognize_stack: List[Tuple[Nonterminal, int, List[Any], Callable[..., Any]]]
+    tracer: Optional[ParserTracer[Terminal, Nonterminal]]
 
     def __init__(
         self,
-        parse_table: Mapping[Nonterminal, Mapping[Terminal, Production[Terminal, Nonterminal]]],
-        start_symbol: Nonterminal
+        tracer: Optional[ParserTracer[Terminal, Nonterminal]] = None,
+        *,
+        emit: Iterable[Nonterminal] = (),
+        builders: Optional[Mapping[Production[Terminal, Nonterminal], Callable[..., Any]]] = None,
+        recognize: bool = False
     ) -> None:
-        super().__init__()
-        self.parse_table = parse_table
-        self.parse_stack = [eof, start_symbol]
+        super().__init__(emit=emit)
+        self.tracer = tracer
+        self.builders = builders
+        self.recognizing = recognize
         self.recognize_stack = []
 
     @property
     def result(self) -> Nonterminal:
-        result = getattr(self, "_result", None)
-        if not result:
-            raise RuntimeError
+        result = getattr(self, "_result", MISSING)
+        if result is MISSING:
+            raise RuntimeError("Parsing is not finished yet")
         return result
 
-    def push(self, terminal: Terminal):
-        stack = self.parse_stack
-        stack_top = stack.pop()
-        while isinstance(stack_top, NonTerminalBase):
-            if stack_top is epsilon:
-                print("Eject", epsilon, "from stack")
-                print("Stack:", repr(stack))
-                self.recognize_stack[-1][2].append(None)
+    def _complete(self) -> None:
+        recognize_stack = self.recognize_stack
+        emit = self.emit
+        while recognize_stack:
+            nt, length, args, build = recognize_stack[-1]
+            if len(args) != length:
+                return
+            recognize_stack.pop()
+            node = build(*args)
+            if not recognize_stack:
+                self._result = node
+            elif emit and nt in emit:
+                self.emitted.append(node)
+                recognize_stack[-1][2].append(None)
             else:
-                production = self.parse_table[stack_top][terminal]
-                stack.extend(reversed(production.rule))
-                self.recognize_stack.append((production.left, len(production.rule), []))
-            if len(self.recognize_stack[-1][2]) == self.recognize_stack[-1][1]:
-                NonterminalType, _, args = self.recognize_stack.pop()
-                nonterminal = NonterminalType(*args)
-                self.recognize_stack[-1][2].append(nonterminal)
-            stack_top = stack.pop()
-        if stack_top != terminal:
-            raise ParsingError
-        self.recognize_stack[-1][2].append(stack_top)
-
-    def finalize(self):
+                recognize_stack[-1][2].append(node)
+
+
+class LL1Runtime(LLRuntime[Terminal, Nonterminal], Generic[Terminal, Nonterminal]):
+    """
+    Table driven predictive parsing over a compiled LL(1) table.
+    The parse stack holds encoded symbols (see `CompiledLLTable`).
+    """
+
+    table: CompiledLLTable[Terminal, Nonterminal]
+    parse_stack: List[int]
+
+    def __init__(
+        self,
+        table: CompiledLLTable[Terminal, Nonterminal],
+        start_symbol: Nonterminal,
+        tracer: Optional[ParserTracer[Terminal, Nonterminal]] = None,
+        *,
+        emit: Iterable[Nonterminal] = (),
+        builders: Optional[Mapping[Production[Terminal, Nonterminal], Callable[..., Any]]] = None,
+        recognize: bool = False
+    ) -> None:
+        super().__init__(tracer, emit=emit, builders=builders, recognize=recognize)
+        self.table = table
+        self.parse_stack = [table.terminal_ids[eof], table.encode(start_symbol)]
+        if builders is None:
+            self._builders: Tuple[Callable[..., Any], ...] = table.production_lefts
+        else:
+            self._builders = tuple(
+                builders.get(production, production.left) for production in table.productions
+            )
+
+    def push(self, terminal: Terminal) -> None:
+        self._consume((terminal, ), TERMINALS)
+
+    def push_many(self, terminals: Iterable[Terminal]) -> None:
+        self._consume(terminals, TERMINALS)
+
+    def feed(self, ids: Iterable[int]) -> None:
+        """
+        Push terminals given by their ids in `table.terminal_ids`, e.g. from
+        an array or a memoryview filled by a lexer.
+        """
+        self._consume(ids, IDS)
+
+    def feed_tokens(self, tokens: Iterable[Token]) -> None:
+        """
+        Push lexer tokens by their terminal ids, tokens become the leaves.
+        """
+        self._consume(tokens, TOKENS)
+
+    def finalize(self) -> Nonterminal:
+        self._consume((eof, ), END)
+        return self.result
+
+    def _consume(self, terminals: Iterable[Any], kind: int) -> None:
+        table = self.table
+        terminal_ids = table.terminal_ids
+        symbols = table.terminals
+        count = len(symbols)
+        predict = table.predict
+        width = table.width
+        classes = table.terminal_classes
+        pushes = table.production_pushes
+        lengths = table.production_lengths
+        lefts = table.production_lefts
+        builders = self._builders
         stack = self.parse_stack
-        stack_top = stack.pop()
-        while isinstance(stack_top, NonTerminalBase):
-            if stack_top is epsilon:
-                print("Eject", epsilon, "from stack")
-                print("Stack:", repr(stack))
-                self.recognize_stack[-1][2].append(None)
+        pop = stack.pop
+        recognize_stack = self.recognize_stack
+        recognizing = self.recognizing
+        tracer = self.tracer
+        for terminal in terminals:
+            if kind == TOKENS:
+                terminal_id = terminal[0]
+                if not 0 < terminal_id < count:
+                    raise ParsingError(f"Unknown terminal id {terminal_id!r}")
+            elif kind == IDS:
+                terminal_id = terminal
+                if not 0 < terminal_id < count:
+                    raise ParsingError(f"Unknown terminal id {terminal_id!r}")
+                terminal = symbols[terminal_id]
+            elif kind == TERMINALS:
+                terminal_id = terminal_ids.get(terminal)
+                if not terminal_id:
+                    raise ParsingError(f"Unknown terminal {terminal!r}")
             else:
-                production = self.parse_table[stack_top][eof]
-                stack.extend(reversed(production.rule))
-                self.recognize_stack.append((production.left, len(production.rule), []))
-            if len(self.recognize_stack[-1][2]) == self.recognize_stack[-1][1]:
-                NonterminalType, _, args = self.recognize_stack.pop()
-                nonterminal = NonterminalType(*args)
-                self.recognize_stack[-1][2].append(nonterminal)
-            stack_top = stack.pop()
-        if stack_top != eof:
-            raise ParsingError
-        self.recognize_stack[-1][2].append(stack_top)
+                terminal_id = 0
+            if not stack:
+                raise ParsingError(f"Unexpected {terminal!r} after the end of input")
+            column = classes[terminal_id]
+            top = pop()
+            while top < 0:
+                if top == EPSILON:
+                    if tracer is not None:
+                        tracer.epsilon_pop(recognize_stack[-1][0] if recognize_stack else None)
+                    if not recognizing:
+                        args = recognize_stack[-1][2]
+                        args.append(None)
+                        if len(args) == recognize_stack[-1][1]:
+                            self._complete()
+                else:
+                    production = predict[(-top - 2) * width + column] - 1
+                    if production < 0:
+                        stack.append(top)
+                        expected = table.nonterminals[-top - 2]
+                        raise ParsingError(f"Unexpected {terminal!r} while parsing {expected!r}")
+                    if tracer is not None:
+                        tracer.expand(table.productions[production])
+                    stack.extend(pushes[production])
+                    if not recognizing:
+                        recognize_stack.append((lefts[production], lengths[production], [], builders[production]))
+                        if not lengths[production]:
+                            self._complete()
+                top = pop()
+            if top != terminal_id:
+                stack.append(top)
+                raise ParsingError(f"Expected {symbols[top]!r}, got {terminal!r}")
+            if terminal is eof:
+                if recognizing:
+                    self._result = None
+                return
+            if tracer is not None:
+                tracer.shift(terminal)
+            if not recognizing:
+                frame = recognize_stack[-1]
+                args = frame[2]
+                args.append(terminal)
+                if len(args) == frame[1]:
+                    self._complete()
+
+
+class LLkRuntime(LLRuntime[Terminal, Nonterminal], Generic[Terminal, Nonterminal]):
+    """
+    Predictive parsing with up to k tokens of lookahead. Incoming tokens
+    are buffered until the decision trie of the nonterminal on top of the
+    stack reaches a production, so a decision never waits for more tokens
+    than it needs. Members of terminal classes (`member_classes`) are
+    looked up and matched as their class.
+    """
+
+    table: Mapping[Nonterminal, LookaheadDecision[Terminal, Nonterminal]]
+    parse_stack: List[Union[Terminal, Nonterminal, SpecialNonterminal]]
+    lookahead: Deque[Union[Terminal, SpecialNonterminal]]
+    member_classes: Mapping[Terminal, Terminal]
+
+    def __init__(
+        self,
+        table: Mapping[Nonterminal, LookaheadDecision[Terminal, Nonterminal]],
+        start_symbol: Nonterminal,
+        tracer: Optional[ParserTracer[Terminal, Nonterminal]] = None,
+        *,
+        emit: Iterable[Nonterminal] = (),
+        builders: Optional[Mapping[Production[Terminal, Nonterminal], Callable[..., Any]]] = None,
+        recognize: bool = False,
+        member_classes: Optional[Mapping[Terminal, Terminal]] = None
+    ) -> None:
+        super().__init__(tracer, emit=emit, builders=builders, recognize=recognize)
+        self.table = table
+        self.parse_stack = [eof, start_symbol]
+        self.lookahead = deque()
+        self.member_classes = {} if member_classes is None else member_classes
+
+    def push(self, terminal: Terminal) -> None:
+        if terminal is eof:
+            raise ParsingError(f"Unknown terminal {terminal!r}")
+        self.lookahead.append(terminal)
+        self._advance()
+
+    def push_many(self, terminals: Iterable[Terminal]) -> None:
+        lookahead = self.lookahead
+        for terminal in terminals:
+            if terminal is eof:
+                raise ParsingError(f"Unknown terminal {terminal!r}")
+            lookahead.append(terminal)
+            if len(lookahead) >= LOOKAHEAD_CHUNK:
+                self._advance()
+        self._advance()
+
+    def finalize(self) -> Nonterminal:
+        self.lookahead.append(eof)
+        self._advance()
+        if self.parse_stack:
+            raise ParsingError("Unexpected end of input")
+        return self.result
+
+    def _advance(self) -> None:
+        table = self.table
+        stack = self.parse_stack
+        lookahead = self.lookahead
+        recognize_stack = self.recognize_stack
+        tracer = self.tracer
+        builders = self.builders
+        recognizing = self.recognizing
+        classes = self.member_classes
+        while lookahead:
+            if not stack:
+                raise ParsingError(f"Unexpected {lookahead[0]!r} after the end of input")
+            top = stack[-1]
+            if top is epsilon:
+                stack.pop()
+                if tracer is not None:
+                    tracer.epsilon_pop(recognize_stack[-1][0] if recognize_stack else None)
+                if not recognizing:
+                    recognize_stack[-1][2].append(None)
+                    self._complete()
+                continue
+            if top is not eof and isinstance(top, NonTerminalBase):
+                decision = table.get(top)
+                depth = 0
+                while isinstance(decision, dict):
+                    if depth == len(lookahead):
+                        return
+                    symbol = lookahead[depth]
+                    decision = decision.get(classes.get(symbol, symbol) if classes else symbol)
+                    depth += 1
+                if decision is None:
+                    seen = " ".join(repr(token) for token in islice(lookahead, depth))
+                    raise ParsingError(f"Unexpected {seen} while parsing {top!r}")
+                stack.pop()
+                if tracer is not None:
+                    tracer.expand(decision)
+                rule = decision.rule
+                stack.extend(reversed(rule))
+                if not recognizing:
+                    build = decision.left if builders is None else builders.get(decision, decision.left)
+                    recognize_stack.append((decision.left, len(rule), [], build))
+                    if not len(rule):
+                        self._complete()
+                continue
+            token = lookahead[0]
+            if top != token and (not classes or top != classes.get(token)):
+                raise ParsingError(f"Expected {top!r}, got {token!r}")
+            lookahead.popleft()
+            stack.pop()
+            if token is eof:
+                if recognizing:
+                    self._result = None
+                continue
+            if tracer is not None:
+                tracer.shift(token)
+            if not recognizing:
+                recognize_stack[-1][2].append(token)
+                self._complete()
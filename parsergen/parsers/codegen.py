@@ -0,0 +1,374 @@
+from __future__ import annotations
+
+import ast
+import os
+import sys
+from array import array
+from typing import Any, List, Optional, Sequence, TypeVar, Union
+
+from parsergen.grammar import Grammar
+from parsergen.grammar.nonterminals import NonTerminalBase, eof
+from parsergen.grammar.terminals import TerminalClass
+
+from .artifact import grammar_fingerprint
+from .ll import LL1Parser
+from .lr import LRParser
+from .tables import CompiledLRTables
+
+
+Terminal = TypeVar("Terminal")
+Nonterminal = TypeVar("Nonterminal", bound=NonTerminalBase)
+
+BYTES_PER_LINE = 48
+
+
+def generate(
+    parser: Union[LRParser[Terminal, Nonterminal], LL1Parser[Terminal, Nonterminal]],
+    grammar: Optional[Grammar[Terminal, Nonterminal]] = None
+) -> str:
+    """
+    Source of a standalone module parsing with the compiled tables of
+    `parser`. The module depends on the standard library only and
+    provides `parse`, `parse_ids` and `recognize`; parse tree nodes are
+    `Node(kind, args)` unless builders (keyed by production number or by
+    `str(production)`) are given. Abstract nonterminals pass their child
+    through.
+
+    Terminals must be literals (str, bytes, numbers, tuples of them...),
+    terminal classes are written as the tuple of their members (CLASSES)
+    and their members map to the class id in TERMINAL_IDS.
+    """
+    if isinstance(parser, LL1Parser):
+        table = parser.table
+        lines = header("LL(1)", grammar)
+        lines += symbols(table.terminals, table.nonterminals, table.productions)
+        lines += [
+            f"PRODUCTION_LHS = {tuple(table.nonterminal_ids[left] for left in table.production_lefts)!r}",
+            f"PRODUCTION_LENGTHS = {tuple(table.production_lengths)!r}",
+            f"PUSHES = {table.production_pushes!r}",
+            f"START = {table.encode(parser.start_symbol)!r}",
+            f"WIDTH = {table.width!r}",
+            *array_literal("TERMINAL_CLASSES", table.terminal_classes),
+            *array_literal("PREDICT", table.predict),
+            "",
+        ]
+        return "\n".join(lines) + RUNTIME + LL1_DRIVER
+    if isinstance(parser, LRParser):
+        tables = parser.tables
+        lines = header("LR", grammar)
+        lines += symbols(tables.terminals, tables.nonterminals, tables.productions)
+        lines += [
+            f"PRODUCTION_LHS = {tuple(tables.production_lhs)!r}",
+            f"PRODUCTION_LENGTHS = {tuple(tables.production_lengths)!r}",
+            f"PRODUCTION_EPSILONS = {tables.production_epsilons!r}",
+        ]
+        for name in CompiledLRTables.ARRAYS:
+            lines += array_literal(name.upper(), getattr(tables, name))
+        lines.append("")
+        return "\n".join(lines) + RUNTIME + LR_DRIVER
+    raise TypeError(f"Can't generate a module for {type(parser).__name__}, only LL(1) and LR parsers are supported.")
+
+
+def write_module(
+    parser: Union[LRParser[Terminal, Nonterminal], LL1Parser[Terminal, Nonterminal]],
+    path: Union[str, os.PathLike],
+    grammar: Optional[Grammar[Terminal, Nonterminal]] = None
+) -> None:
+    with open(path, "w", encoding="utf-8") as file:
+        file.write(generate(parser, grammar))
+
+
+def header(kind: str, grammar: Optional[Grammar]) -> List[str]:
+    lines = [f"# Generated by parsergen: {kind} parser. Do not edit."]
+    if grammar is not None:
+        lines.append(f"# Grammar fingerprint: {grammar_fingerprint(grammar).hex()}")
+    lines += [
+        "from __future__ import annotations",
+        "",
+        "import sys",
+        "from array import array",
+        "from itertools import chain",
+        "",
+        "",
+        "class EndOfInput:",
+        "",
+        "    def __repr__(self):",
+        "        return \"EOF\"",
+        "",
+        "",
+        "EOF = EndOfInput()",
+        "",
+    ]
+    return lines
+
+
+def symbols(
+    terminals: Sequence[Any],
+    nonterminals: Sequence[NonTerminalBase],
+    productions: Sequence[Any]
+) -> List[str]:
+    literals = [
+        "EOF" if terminal is eof else
+        terminal_literal(terminal.members) if isinstance(terminal, TerminalClass) else
+        terminal_literal(terminal)
+        for terminal in terminals
+    ]
+    members = [no for no, terminal in enumerate(terminals) if isinstance(terminal, TerminalClass)]
+    return [
+        f"TERMINALS = ({', '.join(literals)}{',' if len(literals) == 1 else ''})",
+        f"CLASSES = {{{', '.join(f'{no}: {literals[no]}' for no in members)}}}",
+        f"NONTERMINALS = {tuple(str(nt) for nt in nonterminals)!r}",
+        f"ABSTRACT = {tuple(no for no, nt in enumerate(nonterminals) if nt.is_abstract)!r}",
+        f"PRODUCTIONS = {tuple(None if production is None else str(production) for production in productions)!r}",
+    ]
+
+
+def terminal_literal(terminal: Any) -> str:
+    literal = repr(terminal)
+    try:
+        restored = ast.literal_eval(literal)
+    except (ValueError, SyntaxError):
+        restored = None
+    if restored != terminal or type(restored) is not type(terminal):
+        raise TypeError(f"Terminal {terminal!r} can't be written as a Python literal.")
+    return literal
+
+
+def array_literal(name: str, values: array) -> List[str]:
+    if sys.byteorder == "big":
+        values = array(values.typecode, values)
+        values.byteswap()
+    data = values.tobytes()
+    if not data:
+        return [f"{name} = array(\"i\")"]
+    lines = [f"{name} = array(\"i\", ("]
+    for offset in range(0, len(data), BYTES_PER_LINE):
+        lines.append(f"    {data[offset:offset + BYTES_PER_LINE]!r}")
+    lines.append("))")
+    return lines
+
+
+RUNTIME = '''
+TERMINAL_IDS = {terminal: no for no, terminal in enumerate(TERMINALS) if no not in CLASSES}
+TERMINAL_IDS.update((member, no) for no, members in CLASSES.items() for member in members)
+
+if sys.byteorder == "big":
+    for _table in [value for value in tuple(globals().values()) if isinstance(value, array)]:
+        _table.byteswap()
+
+
+class ParsingError(Exception):
+    pass
+
+
+class Node:
+    """
+    Default parse tree node: the nonterminal name and the children.
+    """
+
+    __slots__ = ("kind", "args")
+
+    def __init__(self, kind, args):
+        self.kind = kind
+        self.args = args
+
+    def __eq__(self, other):
+        if isinstance(other, Node):
+            return self.kind == other.kind and self.args == other.args
+        return NotImplemented
+
+    def __hash__(self):
+        return hash((self.kind, self.args))
+
+    def __repr__(self):
+        return f"{self.kind}{self.args!r}"
+
+
+def node_builder(kind):
+    def build(*args):
+        return Node(kind, args)
+    return build
+
+
+def pass_through(child):
+    return child
+
+
+def resolve_builders(builders=None):
+    """
+    Builder per production number: `builders` may be keyed by production
+    number or by production text (see PRODUCTIONS). Abstract nonterminals
+    pass their child through by default.
+    """
+    kinds = [pass_through if no in ABSTRACT else node_builder(name) for no, name in enumerate(NONTERMINALS)]
+    resolved = [None if lhs < 0 else kinds[lhs] for lhs in PRODUCTION_LHS]
+    if builders:
+        for no, text in enumerate(PRODUCTIONS):
+            build = builders.get(text, builders.get(no))
+            if build is not None:
+                resolved[no] = build
+    return tuple(resolved)
+
+
+DEFAULT_BUILDERS = resolve_builders()
+
+
+def parse(terminals, builders=None):
+    """
+    Parse an iterable of terminals, tree leaves are the terminals.
+    """
+    return _parse(chain(terminals, (EOF, )), False, resolve_builders(builders) if builders else DEFAULT_BUILDERS)
+
+
+def parse_ids(ids, builders=None):
+    """
+    Parse terminal ids (positions in TERMINALS), e.g. produced by a lexer.
+    """
+    return _parse(chain(ids, (0, )), True, resolve_builders(builders) if builders else DEFAULT_BUILDERS)
+
+
+def recognize(terminals):
+    try:
+        _parse(chain(terminals, (EOF, )), False, None)
+    except ParsingError:
+        return False
+    return True
+'''
+
+LL1_DRIVER = '''
+
+def _complete(frames):
+    while frames:
+        length, args, build = frames[-1]
+        if len(args) != length:
+            return None
+        frames.pop()
+        node = build(*args)
+        if not frames:
+            return node
+        frames[-1][1].append(node)
+    return None
+
+
+def _parse(items, ids, builders):
+    terminals = TERMINALS
+    terminal_ids = TERMINAL_IDS
+    predict = PREDICT
+    width = WIDTH
+    classes = TERMINAL_CLASSES
+    pushes = PUSHES
+    lengths = PRODUCTION_LENGTHS
+    stack = [0, START]
+    pop = stack.pop
+    frames = None if builders is None else []
+    result = None
+    for terminal in items:
+        if ids:
+            terminal_id = terminal
+            terminal = terminals[terminal_id]
+        else:
+            terminal_id = terminal_ids.get(terminal)
+            if terminal_id is None:
+                raise ParsingError(f"Unknown terminal {terminal!r}")
+        if not stack:
+            raise ParsingError(f"Unexpected {terminal!r} after the end of input")
+        column = classes[terminal_id]
+        top = pop()
+        while top < 0:
+            if top == -1:
+                if frames is not None:
+                    frame = frames[-1]
+                    frame[1].append(None)
+                    if len(frame[1]) == frame[0]:
+                        result = _complete(frames)
+            else:
+                production = predict[(-top - 2) * width + column] - 1
+                if production < 0:
+                    raise ParsingError(f"Unexpected {terminal!r} while parsing {NONTERMINALS[-top - 2]}")
+                stack.extend(pushes[production])
+                if frames is not None:
+                    frames.append((lengths[production], [], builders[production]))
+                    if not lengths[production]:
+                        result = _complete(frames)
+            top = pop()
+        if top != terminal_id:
+            raise ParsingError(f"Expected {terminals[top]!r}, got {terminal!r}")
+        if terminal_id == 0:
+            return result
+        if frames is not None:
+            frame = frames[-1]
+            frame[1].append(terminal)
+            if len(frame[1]) == frame[0]:
+                result = _complete(frames)
+    raise ParsingError("Unexpected end of input")
+'''
+
+LR_DRIVER = '''
+
+def _parse(items, ids, builders):
+    terminals = TERMINALS
+    terminal_ids = TERMINAL_IDS
+    terminal_classes = TERMINAL_CLASSES
+    action_base = ACTION_BASE
+    action_check = ACTION_CHECK
+    action_value = ACTION_VALUE
+    action_default = ACTION_DEFAULT
+    goto_base = GOTO_BASE
+    goto_check = GOTO_CHECK
+    goto_value = GOTO_VALUE
+    goto_default = GOTO_DEFAULT
+    lengths = PRODUCTION_LENGTHS
+    epsilons = PRODUCTION_EPSILONS
+    production_lhs = PRODUCTION_LHS
+    states = []
+    values = []
+    push_state = states.append
+    push_value = values.append
+    state = 0
+    for incoming in items:
+        if ids:
+            terminal = incoming
+            incoming = terminals[terminal]
+        else:
+            terminal = terminal_ids.get(incoming)
+            if terminal is None:
+                raise ParsingError(f"Unknown terminal {incoming!r}")
+        column = terminal_classes[terminal]
+        while True:
+            index = action_base[state] + column
+            code = action_value[index] if action_check[index] == state else action_default[state]
+            if code > 0:
+                push_state(state)
+                push_value(incoming)
+                state = code - 1
+                break
+            if code == 0:
+                raise ParsingError(f"Unrecognizable terminal {incoming!r} on state {state}")
+            if code == -1:
+                return values[-1]
+            production = -code - 1
+            length = lengths[production]
+            if builders is None:
+                if length:
+                    state = states[-length]
+                    del states[-length:]
+                    del values[-length:]
+                node = None
+            else:
+                if length:
+                    state = states[-length]
+                    del states[-length:]
+                    args = values[-length:]
+                    del values[-length:]
+                else:
+                    args = []
+                for position in epsilons[production]:
+                    args.insert(position, None)
+                node = builders[production](*args)
+            push_state(state)
+            push_value(node)
+            lhs = production_lhs[production]
+            index = goto_base[lhs] + state
+            state = goto_value[index] if goto_check[index] == lhs else goto_default[lhs]
+    raise ParsingError("Unexpected end of input")
+'''
@@ -1,6 +1,13 @@
-from typing import Generic, TypeVar
+from __future__ import annotations
 
-from parsergen.grammar.nonterminals import NonTerminalBase
+from typing import Dict, Generic, List, Optional, Tuple, TypeVar
+
+from parsergen.grammar import Grammar
+from parsergen.grammar.algorythms import digraph
+from parsergen.grammar.nonterminals import NonTerminalBase, eof
+from .automaton import LR0Automaton
+from .base import ParserTracer
+from .lr import Accept, Action, Conflict, Reduce, StateNo, lr_shifts_gotos, set_action
 from .slr import SLR1Parser
 
 
@@ -11,4 +18,98 @@ Nonterminal = TypeVar("Nonterminal", bound=NonTerminalBase)
 class LALR1Parser(
     SLR1Parser[Terminal, Nonterminal], Generic[Terminal, Nonterminal]
 ):
-    pass
+
+    @classmethod
+    def from_grammar(
+        cls,
+        grammar: Grammar[Terminal, Nonterminal],
+        *,
+        conflicts: Optional[List[Conflict[Terminal]]] = None,
+        tracer: Optional[ParserTracer[Terminal, Nonterminal]] = None
+    ) -> LALR1Parser[Terminal, Nonterminal]:
+        return cls(*lalr1_parsing_tables(grammar, conflicts=conflicts), tracer=tracer)
+
+
+def lalr1_parsing_tables(
+    grammar: Grammar[Terminal, Nonterminal],
+    *,
+    conflicts: Optional[List[Conflict[Terminal]]] = None
+) -> Tuple[Dict[StateNo, Dict[Terminal, Action]], Dict[StateNo, Dict[Nonterminal, StateNo]]]:
+    automaton = LR0Automaton(grammar)
+    actions, gotos = lr_shifts_gotos(automaton)
+    lookaheads = lalr1_lookaheads(automaton)
+    for state in range(len(automaton)):
+        row = actions[StateNo(state)]
+        for production_no in automaton.reductions(state):
+            if production_no == 0:
+                set_action(row, state, eof, Accept(), conflicts)
+                continue
+            reduce = Reduce(automaton.productions[production_no])
+            bits = lookaheads.get((state, production_no), 0)
+            for terminal in automaton.terminals_of(bits):
+                set_action(row, state, terminal, reduce, conflicts)
+    return actions, gotos
+
+
+def lalr1_lookaheads(automaton: LR0Automaton[Terminal, Nonterminal]) -> Dict[Tuple[int, int], int]:
+    """
+    LA(q, A→ω) = ⋃{Follow(p, A) ∣ (q, A→ω) lookback (p, A)}
+
+    Follow  = digraph(includes, Read)
+    Read    = digraph(reads, DR)
+
+    Lookahead sets are bitmasks over `automaton.terminals`, keyed by
+    (state, production number).
+    """
+    nullable = automaton.grammar.nullable
+    transitions = automaton.transitions
+    terminal_index = automaton.terminal_index
+    nt_transitions: Dict[Tuple[int, NonTerminalBase], int] = {}
+    for state, row in enumerate(transitions):
+        for symbol in row:
+            if isinstance(symbol, NonTerminalBase):
+                nt_transitions[(state, symbol)] = len(nt_transitions)
+
+    direct_reads: List[int] = []
+    reads: List[List[int]] = []
+    for state, nt in nt_transitions:
+        target = transitions[state][nt]
+        bits = 0
+        target_reads = []
+        for symbol in transitions[target]:
+            if isinstance(symbol, NonTerminalBase):
+                if symbol in nullable:
+                    target_reads.append(nt_transitions[(target, symbol)])
+            else:
+                bits |= 1 << terminal_index[symbol]
+        if state == 0 and nt == automaton.grammar.start_symbol:
+            bits |= 1 << terminal_index[eof]
+        direct_reads.append(bits)
+        reads.append(target_reads)
+    read_sets = digraph(reads, direct_reads)
+
+    includes: List[List[int]] = [[] for _ in nt_transitions]
+    lookback: Dict[Tuple[int, int], List[int]] = {}
+    starts = automaton.start_items
+    for (state, nt), transition in nt_transitions.items():
+        for item in starts.get(nt, ()):
+            rule = automaton.rules[automaton.item_production[item]]
+            nullable_suffix = len(rule)
+            while nullable_suffix and rule[nullable_suffix - 1] in nullable:
+                nullable_suffix -= 1
+            current = state
+            for position, symbol in enumerate(rule):
+                if position + 1 >= nullable_suffix and isinstance(symbol, NonTerminalBase):
+                    includes[nt_transitions[(current, symbol)]].append(transition)
+                current = transitions[current][symbol]
+            production_no = automaton.item_production[item]
+            lookback.setdefault((current, production_no), []).append(transition)
+    follow_sets = digraph(includes, read_sets)
+
+    lookaheads: Dict[Tuple[int, int], int] = {}
+    for key, sources in lookback.items():
+        bits = 0
+        for transition in sources:
+            bits |= follow_sets[transition]
+        lookaheads[key] = bits
+    return lookaheads
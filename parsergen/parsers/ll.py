@@ -1,17 +1,28 @@
+from __future__ import annotations
+
 from abc import ABC
 
-from typing import ClassVar, Generic, Iterable, List, Mapping, MutableMapping, Tuple, TypeVar, Union
+from typing import Generic, TypeVar
+from typing import Any, Callable, Dict, FrozenSet, Iterable, Iterator, List, Mapping, Optional, Sequence, Tuple, Union
 
-from parsergen.grammar import Grammar
-from parsergen.grammar.nonterminals import NonTerminalBase, epsilon, is_epsilon_generating
+from parsergen.grammar import Grammar, analysis
+from parsergen.grammar.nonterminals import NonTerminalBase, SpecialNonterminal, eof, epsilon
+from parsergen.grammar.productions import Production
 
-from .base import Parser, ParsingError
-from .utils import SymbolQueue, firsts
+from .base import LL1Runtime, LLkRuntime, Parser, ParserTracer
+from .tables import CompiledLLTable, compile_ll1_table
 
 
 Terminal = TypeVar("Terminal")
 Nonterminal = TypeVar("Nonterminal", bound=NonTerminalBase)
 
+# Inner nodes map the next lookahead terminal to a subdecision,
+# leaves are the predicted productions.
+LookaheadDecision = Union[
+    Production[Terminal, Nonterminal],
+    Dict[Union[Terminal, SpecialNonterminal], "LookaheadDecision[Terminal, Nonterminal]"]
+]
+
 
 class IncompatibleGrammar(Exception):
     pass
@@ -23,105 +34,411 @@ class LeftRecursionFound(IncompatibleGrammar):
 
 class LLParser(Parser[Terminal, Nonterminal], ABC, Generic[Terminal, Nonterminal]):
 
-    parse_table: Mapping[Nonterminal, Mapping]
-    stack: List[Union[Terminal, Nonterminal]]
+    grammar: Grammar[Terminal, Nonterminal]
+    tracer: Optional[ParserTracer[Terminal, Nonterminal]]
 
-    def __init__(self) -> None:
+    def __init__(
+        self,
+        grammar: Grammar[Terminal, Nonterminal],
+        tracer: Optional[ParserTracer[Terminal, Nonterminal]] = None
+    ) -> None:
         super().__init__()
+        self.grammar = grammar
+        self.tracer = tracer
+
 
-    def parse(self, incoming: Iterable[Terminal]):
-        for symbol in incoming:
-            pass
+class LLkParser(LLParser[Terminal, Nonterminal], Generic[Terminal, Nonterminal]):
 
+    k: int = 2
+    parse_table: Dict[Nonterminal, LookaheadDecision[Terminal, Nonterminal]]
 
-class LLkParser(LLParser[Terminal, Nonterminal], ABC, Generic[Terminal, Nonterminal]):
+    def __init__(
+        self,
+        grammar: Grammar[Terminal, Nonterminal],
+        tracer: Optional[ParserTracer[Terminal, Nonterminal]] = None,
+        *,
+        k: Optional[int] = None
+    ) -> None:
+        super().__init__(grammar, tracer)
+        if k is not None:
+            self.k = k
+        self.parse_table = LLk_parse_table(grammar, k=self.k)
 
-    k: ClassVar[int]
-    parse_table: Mapping[Nonterminal, Mapping[Tuple[Terminal, ...], Tuple[Union[Terminal, Nonterminal], ...]]]
+    def iterative_parse(
+        self,
+        *,
+        emit: Iterable[Nonterminal] = (),
+        recognize: bool = False,
+        builders: Optional[Mapping[Production[Terminal, Nonterminal], Callable[..., Any]]] = None,
+        tracer: Optional[ParserTracer[Terminal, Nonterminal]] = None
+    ) -> LLkRuntime[Terminal, Nonterminal]:
+        return LLkRuntime(
+            self.parse_table, self.grammar.start_symbol, self.tracer if tracer is None else tracer,
+            emit=emit, builders=self.builders if builders is None else builders, recognize=recognize,
+            member_classes=self.grammar.member_classes
+        )
 
 
 class LL1Parser(LLParser[Terminal, Nonterminal], Generic[Terminal, Nonterminal]):
 
-    parse_table: Mapping[Nonterminal, Mapping[Terminal, Tuple[Union[Terminal, Nonterminal], ...]]]
-
-    def parse(self, incoming: Iterable[Terminal]):
-        stack = self.stack
-        for terminal in incoming:
-            stack_top = stack[0] if stack else None
-            while isinstance(stack_top, NonTerminalBase):
-                if stack_top is epsilon:
-                    print("Eject", epsilon, "from stack")
-                    stack.pop()
-                    print("Stack:", repr(stack))
-                    continue
-                rule = self.parse_table[stack_top][terminal]
-                stack.pop()
-                self.stack.extend(reversed(rule))
-            stack_top = stack[0] if stack else None
-            if stack_top == terminal:
-                stack.pop()
-            else:
-                raise ParsingError
-    
-    def finalize(self):
-        stack = self.stack
-        stack_top = stack[0] if stack else None
-        while isinstance(stack_top, NonTerminalBase):
-            if stack_top is epsilon:
-                print("Eject", epsilon, "from stack")
-                stack.pop()
-                print("Stack:", repr(stack))
-                continue
-            rule = self.parse_table[stack_top][terminal]
-            stack.pop()
-            self.stack.extend(reversed(rule))
-        stack_top = stack[0] if stack else None
-        if stack_top == terminal:
-            stack.pop()
-        else:
-            raise ParsingError
+    table: CompiledLLTable[Terminal, Nonterminal]
+    start_symbol: Nonterminal
+
+    def __init__(
+        self,
+        grammar: Grammar[Terminal, Nonterminal],
+        tracer: Optional[ParserTracer[Terminal, Nonterminal]] = None
+    ) -> None:
+        super().__init__(grammar, tracer)
+        self.parse_table = LL1_parse_table(grammar)
+        self.table = compile_ll1_table(grammar.terminals, self.parse_table)
+        self.start_symbol = grammar.start_symbol
+
+    @classmethod
+    def from_table(
+        cls,
+        table: CompiledLLTable[Terminal, Nonterminal],
+        start_symbol: Nonterminal,
+        tracer: Optional[ParserTracer[Terminal, Nonterminal]] = None,
+        *,
+        grammar: Optional[Grammar[Terminal, Nonterminal]] = None
+    ) -> LL1Parser[Terminal, Nonterminal]:
+        """
+        Parser over an already compiled table (e.g. a loaded artifact),
+        the grammar is not analysed again and may be omitted.
+        """
+        parser = object.__new__(cls)
+        parser.grammar = grammar  # type: ignore
+        parser.tracer = tracer
+        parser.table = table
+        parser.start_symbol = start_symbol
+        return parser
+
+    @analysis
+    def parse_table(
+        self
+    ) -> Dict[Nonterminal, Dict[Union[Terminal, SpecialNonterminal], Production[Terminal, Nonterminal]]]:
+        """
+        Table as nested dicts. Parsers built from a grammar keep the one
+        they were compiled from, parsers from `from_table` decode the
+        compiled table on first access (runtimes never need it).
+        """
+        table = self.table
+        predict = table.predict
+        classes = table.terminal_classes
+        width = table.width
+        parse_table = {}
+        for nt_id, nt in enumerate(table.nonterminals):
+            row = parse_table[nt] = {}
+            for terminal_id, terminal in enumerate(table.terminals):
+                production = predict[nt_id * width + classes[terminal_id]] - 1
+                if production >= 0:
+                    row[terminal] = table.productions[production]
+        return parse_table
+
+    @property
+    def terminal_ids(self) -> Mapping[Union[Terminal, SpecialNonterminal], int]:
+        return self.table.terminal_ids
 
+    def iterative_parse(
+        self,
+        *,
+        emit: Iterable[Nonterminal] = (),
+        recognize: bool = False,
+        builders: Optional[Mapping[Production[Terminal, Nonterminal], Callable[..., Any]]] = None,
+        tracer: Optional[ParserTracer[Terminal, Nonterminal]] = None
+    ) -> LL1Runtime[Terminal, Nonterminal]:
+        return LL1Runtime(
+            self.table, self.start_symbol, self.tracer if tracer is None else tracer,
+            emit=emit, builders=self.builders if builders is None else builders, recognize=recognize
+        )
 
-def LLk_parse_table(grammar: Grammar, *, k: int = 1):
+
+def LLk_parse_table(
+    grammar: Grammar[Terminal, Nonterminal],
+    *,
+    k: int = 1
+) -> Dict[Nonterminal, LookaheadDecision[Terminal, Nonterminal]]:
+    """
+    Strong LL(k) table: Predict(A→α) = FIRST_k(α · FOLLOW_k(A)).
+
+    Every nonterminal gets a decision trie: inner nodes map the next
+    lookahead terminal to a subtrie and a production is placed as soon as
+    it is the only one left, so most decisions look at fewer than k tokens.
+    For k=1 the tries are exactly the rows of LL1_parse_table.
+    """
     if k <= 0:
         raise ValueError(f"k must be positive non-zero integer, but {k} given.")
-    if k > 1:
-        raise NotImplementedError("LL(k) parse table building not implemented for k>1.")
-    else:
+    if k == 1:
         return LL1_parse_table(grammar)
+    if grammar.has_left_recursion:
+        nts = ", ".join(sorted(map(repr, grammar.left_recursive)))
+        raise LeftRecursionFound(f"Left recursive nonterminals: {nts}.")
+    tries = LookaheadTries(k)
+    firsts = tries.firsts(grammar)
+    follows = tries.follows(grammar, firsts)
+    predicts: Dict[Nonterminal, List[Tuple[LookaheadTrie[Terminal], Production[Terminal, Nonterminal]]]] = {
+        nt: [] for nt in grammar.nonterminals
+    }
+    for production in grammar.productions:
+        first = tries.sequence(production.rule, firsts)
+        predict = tries.concat(first, follows[production.left], k)
+        if predict is not tries.empty:
+            predicts[production.left].append((predict, production))
+    table: Dict[Nonterminal, LookaheadDecision[Terminal, Nonterminal]] = {}
+    for nt, alternatives in predicts.items():
+        decision = decide(alternatives, ())
+        table[nt] = decision if isinstance(decision, dict) else {
+            terminal: decision for terminal in merge_edges(trie for trie, _ in alternatives)
+        }
+    return table
+
+
+class LookaheadTrie(Generic[Terminal]):
+    """
+    Set of terminal strings stored as a trie node. `end` marks that a string
+    stops at this node. Nodes are immutable and interned by LookaheadTries,
+    so equal sets are the same object and subtries are shared.
+    """
+
+    __slots__ = ("edges", "end")
+
+    edges: Mapping[Union[Terminal, SpecialNonterminal], LookaheadTrie[Terminal]]
+    end: bool
+
+    def __init__(self, edges: Mapping[Union[Terminal, SpecialNonterminal], LookaheadTrie[Terminal]], end: bool) -> None:
+        self.edges = edges
+        self.end = end
+
+    def strings(self) -> Iterator[Tuple[Union[Terminal, SpecialNonterminal], ...]]:
+        if self.end:
+            yield ()
+        for terminal, child in self.edges.items():
+            for tail in child.strings():
+                yield (terminal, *tail)
+
 
+class LookaheadTries(Generic[Terminal, Nonterminal]):
+    """
+    Factory of interned lookahead tries holding strings of length ≤ k,
+    with the set operations FIRST_k/FOLLOW_k are computed with.
+    """
 
-def LL1_parse_table(grammar: Grammar[Terminal, Nonterminal]):
+    k: int
+    empty: LookaheadTrie[Terminal]
+    epsilon: LookaheadTrie[Terminal]
+
+    def __init__(self, k: int) -> None:
+        self.k = k
+        self._interned: Dict[Tuple[FrozenSet, bool], LookaheadTrie[Terminal]] = {}
+        self._unions: Dict[Tuple[int, int], LookaheadTrie[Terminal]] = {}
+        self._concats: Dict[Tuple[int, int, int], LookaheadTrie[Terminal]] = {}
+        self._truncated: Dict[Tuple[int, int], LookaheadTrie[Terminal]] = {}
+        self.empty = self.node({}, False)
+        self.epsilon = self.node({}, True)
+
+    def node(
+        self,
+        edges: Mapping[Union[Terminal, SpecialNonterminal], LookaheadTrie[Terminal]],
+        end: bool
+    ) -> LookaheadTrie[Terminal]:
+        key = (frozenset(edges.items()), end)
+        trie = self._interned.get(key)
+        if trie is None:
+            trie = self._interned[key] = LookaheadTrie(dict(edges), end)
+        return trie
+
+    def symbol(self, terminal: Union[Terminal, SpecialNonterminal]) -> LookaheadTrie[Terminal]:
+        return self.node({terminal: self.epsilon}, False)
+
+    def union(self, first: LookaheadTrie[Terminal], second: LookaheadTrie[Terminal]) -> LookaheadTrie[Terminal]:
+        if first is second or second is self.empty:
+            return first
+        if first is self.empty:
+            return second
+        key = (id(first), id(second))
+        result = self._unions.get(key)
+        if result is None:
+            edges = dict(first.edges)
+            for terminal, child in second.edges.items():
+                existing = edges.get(terminal)
+                edges[terminal] = child if existing is None else self.union(existing, child)
+            result = self._unions[key] = self.node(edges, first.end or second.end)
+        return result
+
+    def truncate(self, trie: LookaheadTrie[Terminal], room: int) -> LookaheadTrie[Terminal]:
+        if trie is self.empty:
+            return trie
+        if room == 0:
+            return self.epsilon
+        key = (id(trie), room)
+        result = self._truncated.get(key)
+        if result is None:
+            edges = {terminal: self.truncate(child, room - 1) for terminal, child in trie.edges.items()}
+            result = self._truncated[key] = self.node(edges, trie.end)
+        return result
+
+    def concat(
+        self,
+        first: LookaheadTrie[Terminal],
+        second: LookaheadTrie[Terminal],
+        room: int
+    ) -> LookaheadTrie[Terminal]:
+        """
+        first ·ₖ second: strings of `first` continued by strings of `second`,
+        cut to `room` terminals.
+        """
+        if first is self.empty or second is self.empty:
+            return self.empty
+        if room == 0:
+            return self.epsilon
+        if first is self.epsilon:
+            return self.truncate(second, room)
+        key = (id(first), id(second), room)
+        result = self._concats.get(key)
+        if result is None:
+            edges = {
+                terminal: self.concat(child, second, room - 1) for terminal, child in first.edges.items()
+            }
+            result = self.node(edges, False)
+            if first.end:
+                result = self.union(result, self.truncate(second, room))
+            self._concats[key] = result
+        return result
+
+    def sequence(
+        self,
+        symbols: Iterable[Union[Terminal, Nonterminal]],
+        firsts: Mapping[Nonterminal, LookaheadTrie[Terminal]]
+    ) -> LookaheadTrie[Terminal]:
+        result = self.epsilon
+        for symbol in symbols:
+            if symbol is epsilon:
+                continue
+            if isinstance(symbol, NonTerminalBase):
+                result = self.concat(result, firsts[symbol], self.k)
+            else:
+                result = self.concat(result, self.symbol(symbol), self.k)
+        return result
+
+    def firsts(self, grammar: Grammar[Terminal, Nonterminal]) -> Dict[Nonterminal, LookaheadTrie[Terminal]]:
+        """
+        FIRST_k(A) = ⋃{FIRST_k(α) ∣ A→α}, iterated to the least fixed point.
+        """
+        firsts = {nt: self.empty for nt in grammar.nonterminals}
+        changed = True
+        while changed:
+            changed = False
+            for production in grammar.productions:
+                left = production.left
+                updated = self.union(firsts[left], self.sequence(production.rule, firsts))
+                if updated is not firsts[left]:
+                    firsts[left] = updated
+                    changed = True
+        return firsts
+
+    def follows(
+        self,
+        grammar: Grammar[Terminal, Nonterminal],
+        firsts: Mapping[Nonterminal, LookaheadTrie[Terminal]]
+    ) -> Dict[Nonterminal, LookaheadTrie[Terminal]]:
+        """
+        FOLLOW_k(B) = ⋃{FIRST_k(β) ·ₖ FOLLOW_k(A) ∣ A→αBβ}, FOLLOW_k(S) ∋ $.
+        """
+        follows = {nt: self.empty for nt in grammar.nonterminals}
+        follows[grammar.start_symbol] = self.symbol(eof)
+        suffixes = []
+        for production in grammar.productions:
+            rule = production.rule
+            for position, symbol in enumerate(rule):
+                if isinstance(symbol, NonTerminalBase) and symbol is not epsilon:
+                    suffixes.append((symbol, production.left, self.sequence(rule[position + 1:], firsts)))
+        changed = True
+        while changed:
+            changed = False
+            for symbol, left, suffix in suffixes:
+                updated = self.union(follows[symbol], self.concat(suffix, follows[left], self.k))
+                if updated is not follows[symbol]:
+                    follows[symbol] = updated
+                    changed = True
+        return follows
+
+
+def merge_edges(tries: Iterable[LookaheadTrie[Terminal]]) -> Dict[Union[Terminal, SpecialNonterminal], None]:
+    edges: Dict[Union[Terminal, SpecialNonterminal], None] = {}
+    for trie in tries:
+        edges.update(dict.fromkeys(trie.edges))
+    return edges
+
+
+def decide(
+    alternatives: Sequence[Tuple[LookaheadTrie[Terminal], Production[Terminal, Nonterminal]]],
+    path: Tuple[Union[Terminal, SpecialNonterminal], ...]
+) -> LookaheadDecision[Terminal, Nonterminal]:
+    """
+    Merge the predict tries of one nonterminal into a decision trie,
+    cutting every branch where a single production is left.
+    """
+    productions = {production for _, production in alternatives}
+    if len(productions) == 1:
+        return alternatives[0][1]
+    ending = [production for trie, production in alternatives if trie.end]
+    if ending:
+        others = [production for _, production in alternatives if production != ending[0]]
+        seen = " ".join(map(repr, path))
+        raise IncompatibleGrammar(
+            f"Productions {ending[0]!r} and {others[0]!r} are both predicted by {seen}."
+        )
+    decision: Dict[Union[Terminal, SpecialNonterminal], LookaheadDecision[Terminal, Nonterminal]] = {}
+    for terminal in merge_edges(trie for trie, _ in alternatives):
+        decision[terminal] = decide([
+            (trie.edges[terminal], production) for trie, production in alternatives if terminal in trie.edges
+        ], (*path, terminal))
+    return decision
+
+
+def LL1_parse_table(
+    grammar: Grammar[Terminal, Nonterminal]
+) -> Dict[Nonterminal, Dict[Union[Terminal, SpecialNonterminal], Production[Terminal, Nonterminal]]]:
+    """
+    Predict(A→α) = FIRST(α) ∪ (FOLLOW(A) if α ⇒* ε else ∅)
+
+    Directing sets are collected as bitmasks over the grammar terminals,
+    so every production costs one pass over its right-hand side.
+    """
     if grammar.has_left_recursion:
-        raise LeftRecursionFound
-    parse_table: Mapping[Nonterminal, MutableMapping[Terminal, Tuple[Union[Terminal, Nonterminal], ...]]] = {
+        nts = ", ".join(sorted(map(repr, grammar.left_recursive)))
+        raise LeftRecursionFound(f"Left recursive nonterminals: {nts}.")
+    firsts = grammar.firsts
+    follows = grammar.follows
+    nullable = grammar.nullable
+    terminals = firsts.terminals
+    terminal_index = firsts.terminal_index
+    parse_table: Dict[Nonterminal, Dict[Union[Terminal, SpecialNonterminal], Production[Terminal, Nonterminal]]] = {
         nt: {} for nt in grammar.nonterminals
     }
-    queue = SymbolQueue[Nonterminal]()
-    queue.put(grammar.start_symbol)
-    for nt in queue:
-        for production in grammar.productions.lhs_filter(nt):
-            for symbol in production.right:
-                if isinstance(symbol, NonTerminalBase):
-                    queue.put(symbol)
-            directing_terminals: List[Terminal] = []
-            for symbol in production.right:
-                if not isinstance(symbol, NonTerminalBase):
-                    directing_terminals.append(symbol)
-                    break
-                else:
-                    directing_terminals.extend(firsts(symbol, grammar))
-                    if is_epsilon_generating(symbol, grammar.productions):
-                        pass
-                    else:
-                        break
-            directing_terminals = [
-                terminal for i, terminal in enumerate(directing_terminals)
-                if i == directing_terminals.index(terminal)
-            ]
-            for terminal in directing_terminals:
-                if parse_table.get(nt, {}).get(terminal) is not None:
-                    raise IncompatibleGrammar
-                stack_items = tuple(production.right)
-                parse_table[nt][terminal] = stack_items
+    for production in grammar.productions:
+        bits = 0
+        for symbol in production.rule:
+            if symbol is epsilon:
+                continue
+            if isinstance(symbol, NonTerminalBase):
+                bits |= firsts.bits(symbol)
+                if symbol in nullable:
+                    continue
+            else:
+                bits |= 1 << terminal_index[symbol]
+            break
+        else:
+            bits |= follows.bits(production.left)
+        row = parse_table[production.left]
+        while bits:
+            low = bits & -bits
+            bits ^= low
+            terminal = terminals[low.bit_length() - 1]
+            existing = row.setdefault(terminal, production)
+            if existing != production:
+                raise IncompatibleGrammar(
+                    f"Productions {existing!r} and {production!r} are both predicted by {terminal!r}."
+                )
     return parse_table
@@ -2,14 +2,19 @@ from __future__ import annotations
 
 from abc import ABC, abstractmethod
 from dataclasses import dataclass
-from typing import Generic, TypeVar
-from typing import Any, Iterable, List, Mapping, NewType, Tuple, Union
+from typing import TYPE_CHECKING, Generic, TypeVar
+from typing import Any, Callable, Dict, Iterable, List, Mapping, NewType, Optional, Tuple, Union
 
 from parsergen.grammar import Grammar
-from parsergen.grammar.nonterminals import NonTerminalBase, epsilon, eof
+from parsergen.grammar.nonterminals import NonTerminalBase, SpecialNonterminal, eof
 from parsergen.grammar.productions import Production
 
-from .base import Parser
+from .automaton import LR0Automaton, LR1Automaton
+from .base import END, IDS, MISSING, TERMINALS, TOKENS, Parser, ParserRuntime, ParserTracer, ParsingError
+from .tables import ACCEPT, ERROR, CompiledLRTables, encode_reduce, encode_shift
+
+if TYPE_CHECKING:
+    from parsergen.lexer import Token
 
 
 StateNo = NewType("StateNo", int)
@@ -19,8 +24,10 @@ T = TypeVar("T")
 NT = TypeVar("NT", bound=NonTerminalBase)
 
 
-class ParsingError(Exception):
-    pass
+class ConflictError(Exception):
+    def __init__(self, conflict: Conflict) -> None:
+        self.conflict = conflict
+        super().__init__(f"{conflict}.")
 
 
 class Action(ABC):
@@ -48,6 +55,32 @@ class Reduce(Action, Generic[Terminal, Nonterminal]):
         return f"{cls.__name__}({production!r})"
 
 
+@dataclass
+class Accept(Action):
+
+    def __repr__(self):
+        cls = type(self)
+        return f"{cls.__name__}()"
+
+
+@dataclass(frozen=True)
+class Conflict(Generic[Terminal]):
+
+    state: StateNo
+    symbol: Terminal
+    actions: Tuple[Action, ...]
+
+    @property
+    def kind(self) -> str:
+        if any(isinstance(action, Shift) for action in self.actions):
+            return "shift/reduce"
+        return "reduce/reduce"
+
+    def __str__(self):
+        variants = ", ".join(repr(action) for action in self.actions)
+        return f"{self.kind} conflict in state {self.state} on symbol {self.symbol!r} between {variants}"
+
+
 @dataclass
 class Result(Action, Generic[Nonterminal]):
 
@@ -61,72 +94,361 @@ class Result(Action, Generic[Nonterminal]):
 
 class LRParser(Parser[Terminal, Nonterminal], ABC, Generic[Terminal, Nonterminal]):
 
-    actions_table: Mapping[StateNo, Mapping[Terminal, Any]]
-    goto_table: Mapping[StateNo, Mapping[Nonterminal, Any]]
-
-    stack: List[Tuple[StateNo, Union[Terminal, Nonterminal]]]
-    state: StateNo
+    tables: CompiledLRTables[Terminal, Nonterminal]
+    tracer: Optional[ParserTracer[Terminal, Nonterminal]]
 
     def __init__(
         self,
-        actions: Mapping[StateNo, Mapping[Terminal, Any]],
-        gotos: Mapping[StateNo, Mapping[Nonterminal, Any]],
-        stack: Iterable[Tuple[StateNo, Union[Terminal, Nonterminal]]] = (),
-        state: StateNo = StateNo(0)
+        actions: Union[Mapping[StateNo, Mapping[Terminal, Any]], CompiledLRTables[Terminal, Nonterminal]],
+        gotos: Optional[Mapping[StateNo, Mapping[Nonterminal, Any]]] = None,
+        tracer: Optional[ParserTracer[Terminal, Nonterminal]] = None
     ):
-        self.actions_table = actions
-        self.goto_table = gotos
-        self.stack = [*stack]
-        self.state = state
+        if isinstance(actions, CompiledLRTables):
+            self.tables = actions
+        else:
+            self.tables = compile_lr_tables(actions, gotos or {})
+        self.tracer = tracer
 
+    @property
+    def terminal_ids(self) -> Mapping[Union[Terminal, SpecialNonterminal], int]:
+        return self.tables.terminal_ids
 
-class LR0Parser(LRParser[Terminal, Nonterminal], Generic[Terminal, Nonterminal]):
+    def iterative_parse(
+        self,
+        *,
+        emit: Iterable[Nonterminal] = (),
+        recognize: bool = False,
+        builders: Optional[Mapping[Production[Terminal, Nonterminal], Callable[..., Any]]] = None,
+        tracer: Optional[ParserTracer[Terminal, Nonterminal]] = None
+    ) -> LRRuntime[Terminal, Nonterminal]:
+        return LRRuntime(
+            self.tables, self.tracer if tracer is None else tracer,
+            emit=emit, builders=self.builders if builders is None else builders, recognize=recognize
+        )
+
+
+class LRRuntime(ParserRuntime[Terminal, Nonterminal], Generic[Terminal, Nonterminal]):
+    """
+    Shift-reduce parsing over compiled LR tables. The tables are shared
+    and never written, the runtime holds two parallel stacks (the state a
+    value was pushed in and the value itself) and the current state.
+    """
+
+    tables: CompiledLRTables[Terminal, Nonterminal]
+    states: List[StateNo]
+    values: List[Union[Terminal, Nonterminal, None]]
+    state: StateNo
+    tracer: Optional[ParserTracer[Terminal, Nonterminal]]
 
-    actions_table: Mapping[StateNo, Mapping[Terminal, Union[Shift, Reduce[Terminal, Nonterminal]]]]
-    goto_table: Mapping[StateNo, Mapping[Nonterminal, StateNo]]
+    def __init__(
+        self,
+        tables: CompiledLRTables[Terminal, Nonterminal],
+        tracer: Optional[ParserTracer[Terminal, Nonterminal]] = None,
+        *,
+        emit: Iterable[Nonterminal] = (),
+        builders: Optional[Mapping[Production[Terminal, Nonterminal], Callable[..., Any]]] = None,
+        recognize: bool = False
+    ) -> None:
+        super().__init__(emit=emit)
+        self.tables = tables
+        self.tracer = tracer
+        self.states = []
+        self.values = []
+        self.state = StateNo(0)
+        self._result = MISSING
+        self._emitting = frozenset(
+            production for production, left in enumerate(tables.production_lefts)
+            if left is not None and left in self.emit
+        )
+        self._builders: Optional[Tuple[Optional[Callable[..., Any]], ...]]
+        if recognize:
+            self._builders = None
+        elif builders is None:
+            self._builders = tables.production_lefts
+        else:
+            self._builders = tuple(
+                production and builders.get(production, production.left) for production in tables.productions
+            )
+
+    @property
+    def result(self) -> Nonterminal:
+        if self._result is MISSING:
+            raise RuntimeError("Parsing is not finished yet")
+        return self._result
+
+    def push(self, incoming: Terminal) -> None:
+        self._consume((incoming, ), TERMINALS)
+
+    def push_many(self, symbols: Iterable[Terminal]) -> None:
+        self._consume(symbols, TERMINALS)
+
+    def feed(self, ids: Iterable[int]) -> None:
+        """
+        Push terminals given by their ids in `tables.terminal_ids`, e.g. from
+        an array or a memoryview filled by a lexer.
+        """
+        self._consume(ids, IDS)
+
+    def feed_tokens(self, tokens: Iterable[Token]) -> None:
+        """
+        Push lexer tokens by their terminal ids, tokens become the leaves.
+        """
+        self._consume(tokens, TOKENS)
+
+    def _consume(self, symbols: Iterable[Any], kind: int) -> None:
+        if self._result is not MISSING:
+            raise ParsingError("Parsing is already finished")
+        tables = self.tables
+        terminal_ids = tables.terminal_ids
+        terminals = tables.terminals
+        count = len(terminals)
+        terminal_classes = tables.terminal_classes
+        action_base = tables.action_base
+        action_check = tables.action_check
+        action_value = tables.action_value
+        action_default = tables.action_default
+        goto_base = tables.goto_base
+        goto_check = tables.goto_check
+        goto_value = tables.goto_value
+        goto_default = tables.goto_default
+        production_lengths = tables.production_lengths
+        production_epsilons = tables.production_epsilons
+        production_lefts = tables.production_lefts
+        builders = self._builders
+        production_lhs = tables.production_lhs
+        states = self.states
+        values = self.values
+        push_state = states.append
+        push_value = values.append
+        state = self.state
+        tracer = self.tracer
+        emitting = self._emitting
+        emitted = False
+        for incoming in symbols:
+            if kind == TOKENS:
+                terminal = incoming[0]
+                if not 0 < terminal < count:
+                    self.state = state
+                    raise ParsingError(f"Unknown terminal id {terminal!r}")
+            elif kind == IDS:
+                terminal = incoming
+                if not 0 < terminal < count:
+                    self.state = state
+                    raise ParsingError(f"Unknown terminal id {terminal!r}")
+                incoming = terminals[terminal]
+            elif kind == TERMINALS:
+                terminal = terminal_ids.get(incoming)
+                if not terminal:
+                    self.state = state
+                    raise ParsingError(f"Unknown terminal {incoming!r}")
+            else:
+                terminal = 0
+            column = terminal_classes[terminal]
+            while True:
+                index = action_base[state] + column
+                code = action_value[index] if action_check[index] == state else action_default[state]
+                if code > 0:
+                    push_state(state)
+                    push_value(incoming)
+                    if tracer is not None:
+                        tracer.shift(incoming, state, code - 1)
+                    state = code - 1
+                    break
+                if code == ERROR:
+                    self.state = state
+                    raise ParsingError(f"Unrecognizable terminal {repr(incoming)} on state {state}")  # noqa
+                if code == ACCEPT:
+                    # Only eof accepts and only finalize pushes it, as the last symbol.
+                    states.pop()
+                    result = values.pop()
+                    self._result = self.emitted.pop() if emitted else result
+                    self.state = state
+                    return
+                production = -code - 1
+                if tracer is not None:
+                    tracer.reduce(tables.productions[production], state)
+                length = production_lengths[production]
+                if builders is None:
+                    if length:
+                        state = states[-length]
+                        del states[-length:]
+                        del values[-length:]
+                    node = None
+                else:
+                    if length:
+                        state = states[-length]
+                        del states[-length:]
+                        args = values[-length:]
+                        del values[-length:]
+                    else:
+                        args = []
+                    for position in production_epsilons[production]:
+                        args.insert(position, None)
+                    node = builders[production](*args)
+                    emitted = production in emitting
+                    if emitted:
+                        self.emitted.append(node)
+                        node = None
+                push_state(state)
+                push_value(node)
+                lhs = production_lhs[production]
+                index = goto_base[lhs] + state
+                target = goto_value[index] if goto_check[index] == lhs else goto_default[lhs]
+                if tracer is not None:
+                    tracer.goto(production_lefts[production], state, target)
+                state = target
+        self.state = state
 
-    def parse(self, stream: Iterable[Terminal]) -> None:
-        stream = iter(stream)
-        for symbol in stream:
-            accept_incoming = False
-            while not accept_incoming:
-                accept_incoming = self._parsing_step(symbol)
+    def finalize(self) -> Nonterminal:
+        self._consume((eof, ), END)
+        return self.result
 
-    def _parsing_step(self, incoming: Terminal) -> bool:
-        accept_incoming = False
-        stack = self.stack
-        state = self.state
-        print(f"Symbol {repr(incoming)}, state {state}")
-        action = self.actions_table.get(state, {}).get(incoming)
-        if action is None:
-            raise ParsingError(f"Unrecognizable terminal {repr(incoming)} on state {state}")  # noqa
-        print(f"Action: {action}")
-        if isinstance(action, Shift):
-            stack.append((state, incoming))
-            print("Stack", stack)
-            self.state = action.state
-            accept_incoming = True
-        elif isinstance(action, Reduce):
-            nt, rule = action.production.left, action.production.right
-            buff = []
-            for _ in rule:
-                state, symbol = stack.pop()
-                buff.append(symbol)
-            new = nt(*reversed(buff))
-            stack.append((state, new))
-            print(self.state, "->", state)
-            self.state = self.goto_table[state][nt]
-            print(state, "->", self.state)
-            print("Stack:", stack)
-        return accept_incoming
-
-    def finalize(self):
-        self.parse((eof, ))
-
-
-class LR1Parser(LRParser):
-    pass
 
+class LR0Parser(LRParser[Terminal, Nonterminal], Generic[Terminal, Nonterminal]):
 
-def lr0_parsing_tables(grammar: Grammar[Terminal, Nonterminal]):
-    raise NotImplementedError
+    @classmethod
+    def from_grammar(
+        cls,
+        grammar: Grammar[Terminal, Nonterminal],
+        *,
+        conflicts: Optional[List[Conflict[Terminal]]] = None,
+        tracer: Optional[ParserTracer[Terminal, Nonterminal]] = None
+    ) -> LR0Parser[Terminal, Nonterminal]:
+        return cls(*lr0_parsing_tables(grammar, conflicts=conflicts), tracer=tracer)
+
+
+class LR1Parser(LRParser[Terminal, Nonterminal], Generic[Terminal, Nonterminal]):
+
+    @classmethod
+    def from_grammar(
+        cls,
+        grammar: Grammar[Terminal, Nonterminal],
+        *,
+        merge_states: bool = False,
+        conflicts: Optional[List[Conflict[Terminal]]] = None,
+        tracer: Optional[ParserTracer[Terminal, Nonterminal]] = None
+    ) -> LR1Parser[Terminal, Nonterminal]:
+        return cls(*lr1_parsing_tables(grammar, merge_states=merge_states, conflicts=conflicts), tracer=tracer)
+
+
+def lr0_parsing_tables(
+    grammar: Grammar[Terminal, Nonterminal],
+    *,
+    conflicts: Optional[List[Conflict[Terminal]]] = None
+) -> Tuple[Dict[StateNo, Dict[Terminal, Action]], Dict[StateNo, Dict[Nonterminal, StateNo]]]:
+    automaton = LR0Automaton(grammar)
+    lookaheads = (*grammar.terminals, eof)
+    actions, gotos = lr_shifts_gotos(automaton)
+    for state in range(len(automaton)):
+        row = actions[StateNo(state)]
+        for production_no in automaton.reductions(state):
+            if production_no == 0:
+                set_action(row, state, eof, Accept(), conflicts)
+                continue
+            reduce = Reduce(automaton.productions[production_no])
+            for terminal in lookaheads:
+                set_action(row, state, terminal, reduce, conflicts)
+    return actions, gotos
+
+
+def lr1_parsing_tables(
+    grammar: Grammar[Terminal, Nonterminal],
+    *,
+    merge_states: bool = False,
+    conflicts: Optional[List[Conflict[Terminal]]] = None
+) -> Tuple[Dict[StateNo, Dict[Terminal, Action]], Dict[StateNo, Dict[Nonterminal, StateNo]]]:
+    nullable = grammar.nullable
+    automaton = LR1Automaton(LR0Automaton(grammar), nullable, merge_states=merge_states)
+    actions, gotos = lr_shifts_gotos(automaton)
+    for state in range(len(automaton)):
+        row = actions[StateNo(state)]
+        for production_no, bits in automaton.reductions(state):
+            if production_no == 0:
+                set_action(row, state, eof, Accept(), conflicts)
+                continue
+            reduce = Reduce(automaton.lr0.productions[production_no])
+            for terminal in automaton.lr0.terminals_of(bits):
+                set_action(row, state, terminal, reduce, conflicts)
+    return actions, gotos
+
+
+def lr_shifts_gotos(
+    automaton: Union[LR0Automaton[Terminal, Nonterminal], LR1Automaton[Terminal, Nonterminal]]
+) -> Tuple[Dict[StateNo, Dict[Terminal, Action]], Dict[StateNo, Dict[Nonterminal, StateNo]]]:
+    actions: Dict[StateNo, Dict[Terminal, Action]] = {}
+    gotos: Dict[StateNo, Dict[Nonterminal, StateNo]] = {}
+    for state, transitions in enumerate(automaton.transitions):
+        row: Dict[Terminal, Action] = {}
+        goto_row: Dict[Nonterminal, StateNo] = {}
+        for symbol, target in transitions.items():
+            if isinstance(symbol, NonTerminalBase):
+                goto_row[symbol] = StateNo(target)
+            else:
+                row[symbol] = Shift(StateNo(target))
+        actions[StateNo(state)] = row
+        gotos[StateNo(state)] = goto_row
+    return actions, gotos
+
+
+def set_action(
+    row: Dict[Terminal, Action],
+    state: int,
+    symbol: Terminal,
+    action: Action,
+    conflicts: Optional[List[Conflict[Terminal]]] = None
+) -> None:
+    """
+    Place an action into a table row. A conflicting action raises
+    ConflictError unless a `conflicts` list is given: then the conflict is
+    recorded there and the action placed first is kept, so shifts win over
+    reduces and reduce/reduce conflicts go to the first placed reduction.
+    """
+    existing = row.get(symbol)
+    if existing is None:
+        row[symbol] = action
+        return
+    if existing == action:
+        return
+    conflict = Conflict(StateNo(state), symbol, (existing, action))
+    if conflicts is None:
+        raise ConflictError(conflict)
+    conflicts.append(conflict)
+
+
+def compile_lr_tables(
+    actions: Mapping[int, Mapping[Terminal, object]],
+    gotos: Mapping[int, Mapping[Nonterminal, int]],
+) -> CompiledLRTables[Terminal, Nonterminal]:
+    terminal_ids: Dict[Union[Terminal, SpecialNonterminal], int] = {eof: 0}
+    nonterminal_ids: Dict[Nonterminal, int] = {}
+    production_ids: Dict[Production[Terminal, Nonterminal], int] = {}
+    productions: List[Optional[Production[Terminal, Nonterminal]]] = [None]
+    states_count = max((*actions, *gotos), default=-1) + 1
+    action_rows: List[Dict[int, int]] = [{} for _ in range(states_count)]
+    goto_columns: Dict[int, Dict[int, int]] = {}
+    for state, row in actions.items():
+        packed = action_rows[state]
+        for terminal, action in row.items():
+            terminal_id = terminal_ids.setdefault(terminal, len(terminal_ids))
+            if isinstance(action, Shift):
+                packed[terminal_id] = encode_shift(action.state)
+            elif isinstance(action, Reduce):
+                production = action.production
+                production_no = production_ids.get(production)
+                if production_no is None:
+                    production_no = production_ids[production] = len(productions)
+                    productions.append(production)
+                    nonterminal_ids.setdefault(production.left, len(nonterminal_ids))
+                packed[terminal_id] = encode_reduce(production_no)
+            elif isinstance(action, Accept):
+                packed[terminal_id] = ACCEPT
+            else:
+                raise TypeError(f"Unsupported action {action!r} in state {state}")
+    for state, goto_row in gotos.items():
+        for nt, target in goto_row.items():
+            nt_id = nonterminal_ids.setdefault(nt, len(nonterminal_ids))
+            goto_columns.setdefault(nt_id, {})[state] = target
+    goto_rows = [goto_columns.get(nt_id, {}) for nt_id in range(len(nonterminal_ids))]
+    return CompiledLRTables(
+        list(terminal_ids), list(nonterminal_ids), productions, action_rows, goto_rows
+    )
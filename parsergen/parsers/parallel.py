@@ -0,0 +1,174 @@
+from __future__ import annotations
+
+import os
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from itertools import islice
+from typing import Any, Callable, Collection, Deque, Iterable, Iterator, List, Mapping, NamedTuple, Optional, Sequence
+from typing import Tuple, TypeVar, Union
+
+from parsergen.grammar import Grammar
+from parsergen.grammar.nonterminals import NonTerminalBase
+from parsergen.grammar.productions import Production
+
+from . import artifact
+from .base import ParsingError
+from .ll import LL1Parser
+from .lr import LRParser
+
+
+Terminal = TypeVar("Terminal")
+Nonterminal = TypeVar("Nonterminal", bound=NonTerminalBase)
+
+# Compact tree: (production number, *children), leaves are terminals and
+# None stands for epsilon. Production numbers index `compiled_productions`,
+# abstract nonterminals pass their child through as in regular trees.
+CompactTree = Tuple[Any, ...]
+
+BATCH_SIZE = 64
+
+_worker_parser: Any = None
+
+
+class ChunkError(NamedTuple):
+    """
+    Marker a worker returns in place of the result of a chunk that failed
+    to parse, so the other chunks of its batch are not lost.
+    """
+
+    index: int
+    error: ParsingError
+
+
+def compiled_productions(
+    parser: Union[LRParser[Terminal, Nonterminal], LL1Parser[Terminal, Nonterminal]]
+) -> Sequence[Optional[Production[Terminal, Nonterminal]]]:
+    if isinstance(parser, LL1Parser):
+        return parser.table.productions
+    return parser.tables.productions
+
+
+def split_records(terminals: Iterable[Terminal], sync: Collection[Terminal]) -> Iterator[List[Terminal]]:
+    """
+    Split a terminal stream after every synchronization terminal. Trailing
+    terminals without a closing one make the last record.
+    """
+    record: List[Terminal] = []
+    for terminal in terminals:
+        record.append(terminal)
+        if terminal in sync:
+            yield record
+            record = []
+    if record:
+        yield record
+
+
+def parse_many(
+    parser: Union[LRParser[Terminal, Nonterminal], LL1Parser[Terminal, Nonterminal]],
+    grammar: Grammar[Terminal, Nonterminal],
+    terminals: Iterable[Terminal],
+    sync: Collection[Terminal],
+    *,
+    workers: Optional[int] = None,
+    recognize: bool = False
+) -> Iterator[Union[CompactTree, bool]]:
+    """
+    Parse a stream of independent records (each one a sentence of
+    `grammar`, ended by a `sync` terminal) on a process pool.
+    """
+    records = split_records(terminals, frozenset(sync))
+    return parse_chunks(parser, grammar, records, workers=workers, recognize=recognize)
+
+
+def parse_chunks(
+    parser: Union[LRParser[Terminal, Nonterminal], LL1Parser[Terminal, Nonterminal]],
+    grammar: Grammar[Terminal, Nonterminal],
+    chunks: Iterable[Sequence[Terminal]],
+    *,
+    workers: Optional[int] = None,
+    recognize: bool = False,
+    batch_size: int = BATCH_SIZE
+) -> Iterator[Union[CompactTree, bool]]:
+    """
+    Parse every chunk on a process pool and yield the results in order:
+    compact trees, or booleans when recognizing. Workers load the compiled
+    tables once from an artifact (terminals must be str, int, float or
+    bool), chunks are sent in batches and only a bounded number of batches
+    is in flight. A parsing error is raised when its chunk's turn comes,
+    after the results of all chunks before it, and names the chunk index.
+    """
+    data = artifact.dump(parser, grammar)
+    workers = workers or os.cpu_count() or 1
+    chunks = iter(chunks)
+    with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(data, )) as executor:
+        pending: Deque[Future] = deque()
+        start = 0
+        for batch in iter(lambda: list(islice(chunks, batch_size)), []):
+            pending.append(executor.submit(_parse_batch, batch, start, recognize))
+            start += len(batch)
+            if len(pending) >= 2 * workers:
+                yield from _results(pending.popleft().result())
+        while pending:
+            yield from _results(pending.popleft().result())
+
+
+def _results(results: List[Any]) -> Iterator[Union[CompactTree, bool]]:
+    for result in results:
+        if isinstance(result, ChunkError):
+            raise ParsingError(f"Chunk {result.index}: {result.error}") from result.error
+        yield result
+
+
+def expand(
+    parser: Union[LRParser[Terminal, Nonterminal], LL1Parser[Terminal, Nonterminal]],
+    tree: CompactTree,
+    builders: Optional[Mapping[Production[Terminal, Nonterminal], Callable[..., Any]]] = None
+) -> Any:
+    """
+    Build nodes (with `builders`, `parser.builders` or the default
+    nonterminal nodes) from a compact tree.
+    """
+    productions = compiled_productions(parser)
+    builders = builders or parser.builders or {}
+
+    def build(node: Any) -> Any:
+        if not isinstance(node, tuple):
+            return node
+        production = productions[node[0]]
+        args = [build(child) for child in node[1:]]
+        return builders.get(production, production.left)(*args)  # type: ignore
+
+    return build(tree)
+
+
+def _init_worker(data: bytes) -> None:
+    global _worker_parser
+    _worker_parser = parser = artifact.load(data)
+    parser.builders = {
+        production: _compact_builder(no)
+        for no, production in enumerate(compiled_productions(parser))
+        if production is not None and not production.left.is_abstract
+    }
+
+
+def _compact_builder(no: int):
+    def build(*args: Any) -> CompactTree:
+        return (no, *args)
+    return build
+
+
+def _parse_batch(
+    batch: List[Sequence[Any]],
+    start: int,
+    recognize: bool
+) -> List[Union[CompactTree, bool, ChunkError]]:
+    parser = _worker_parser
+    if recognize:
+        return [parser.recognize(chunk) for chunk in batch]
+    results: List[Union[CompactTree, bool, ChunkError]] = []
+    for index, chunk in enumerate(batch, start):
+        try:
+            results.append(parser.parse(chunk))
+        except ParsingError as error:
+            results.append(ChunkError(index, error))
+    return results
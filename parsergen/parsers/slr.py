@@ -1,7 +1,12 @@
-from typing import Generic, TypeVar
+from __future__ import annotations
 
-from parsergen.grammar.nonterminals import NonTerminalBase
-from .lr import LR0Parser
+from typing import Dict, Generic, List, Optional, Tuple, TypeVar
+
+from parsergen.grammar import Grammar
+from parsergen.grammar.nonterminals import NonTerminalBase, eof
+from .automaton import LR0Automaton
+from .base import ParserTracer
+from .lr import Accept, Action, Conflict, LR0Parser, Reduce, StateNo, lr_shifts_gotos, set_action
 
 
 Terminal = TypeVar("Terminal")
@@ -9,4 +14,34 @@ Nonterminal = TypeVar("Nonterminal", bound=NonTerminalBase)
 
 
 class SLR1Parser(LR0Parser[Terminal, Nonterminal], Generic[Terminal, Nonterminal]):
-    pass
+
+    @classmethod
+    def from_grammar(
+        cls,
+        grammar: Grammar[Terminal, Nonterminal],
+        *,
+        conflicts: Optional[List[Conflict[Terminal]]] = None,
+        tracer: Optional[ParserTracer[Terminal, Nonterminal]] = None
+    ) -> SLR1Parser[Terminal, Nonterminal]:
+        return cls(*slr1_parsing_tables(grammar, conflicts=conflicts), tracer=tracer)
+
+
+def slr1_parsing_tables(
+    grammar: Grammar[Terminal, Nonterminal],
+    *,
+    conflicts: Optional[List[Conflict[Terminal]]] = None
+) -> Tuple[Dict[StateNo, Dict[Terminal, Action]], Dict[StateNo, Dict[Nonterminal, StateNo]]]:
+    automaton = LR0Automaton(grammar)
+    follows = grammar.follows
+    actions, gotos = lr_shifts_gotos(automaton)
+    for state in range(len(automaton)):
+        row = actions[StateNo(state)]
+        for production_no in automaton.reductions(state):
+            if production_no == 0:
+                set_action(row, state, eof, Accept(), conflicts)
+                continue
+            production = automaton.productions[production_no]
+            reduce = Reduce(production)
+            for terminal in follows[production.left]:
+                set_action(row, state, terminal, reduce, conflicts)
+    return actions, gotos
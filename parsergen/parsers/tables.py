@@ -0,0 +1,371 @@
+from __future__ import annotations
+
+from array import array
+from collections import Counter
+from typing import Dict, Generic, Iterable, List, Mapping, Optional, Sequence, Tuple, TypeVar, Union
+
+from parsergen.grammar.nonterminals import NonTerminalBase, SpecialNonterminal, eof, epsilon
+from parsergen.grammar.productions import Production
+from parsergen.grammar.terminals import TerminalClass
+
+
+Terminal = TypeVar("Terminal")
+Nonterminal = TypeVar("Nonterminal", bound=NonTerminalBase)
+
+# Packed action codes: 0 is an error, n > 0 is a shift to state n - 1,
+# n < 0 is a reduction by production -n - 1. Production 0 is reserved
+# for the augmenting production, so reducing by it means accept.
+ERROR = 0
+ACCEPT = -1
+
+
+def encode_shift(state: int) -> int:
+    return state + 1
+
+
+def encode_reduce(production_no: int) -> int:
+    return -production_no - 1
+
+
+class CompiledLRTables(Generic[Terminal, Nonterminal]):
+    """
+    LR tables with symbols, states and productions mapped to small ints.
+
+    Terminals whose column is the same in every action row share a column,
+    `terminal_classes` maps terminal ids to these columns. Members of
+    terminal classes have the id of their class in `terminal_ids`.
+
+    Both tables are stored with row displacement (comb) compression:
+    a row r lives in `value` at offsets base[r] + column, the slots it owns
+    are marked with r in `check`. Lookups that miss fall back to a per-row
+    default: the most frequent reduction for an action row (or ERROR) and
+    the most frequent target state for a goto row. Action rows are indexed
+    by state and columns by terminal, goto rows by nonterminal and columns
+    by state.
+    """
+
+    terminals: Tuple[Union[Terminal, SpecialNonterminal], ...]
+    terminal_ids: Dict[Union[Terminal, SpecialNonterminal], int]
+    nonterminals: Tuple[Nonterminal, ...]
+    nonterminal_ids: Dict[Nonterminal, int]
+    productions: Tuple[Optional[Production[Terminal, Nonterminal]], ...]
+
+    production_lefts: Tuple[Optional[Nonterminal], ...]
+    production_lhs: array
+    production_lengths: array
+    production_epsilons: Tuple[Tuple[int, ...], ...]
+
+    terminal_classes: array
+    action_base: array
+    action_check: array
+    action_value: array
+    action_default: array
+
+    goto_base: array
+    goto_check: array
+    goto_value: array
+    goto_default: array
+
+    ARRAYS = (
+        "terminal_classes", "action_base", "action_check", "action_value", "action_default",
+        "goto_base", "goto_check", "goto_value", "goto_default",
+    )
+
+    def __init__(
+        self,
+        terminals: Sequence[Union[Terminal, SpecialNonterminal]],
+        nonterminals: Sequence[Nonterminal],
+        productions: Sequence[Optional[Production[Terminal, Nonterminal]]],
+        action_rows: Sequence[Mapping[int, int]],
+        goto_rows: Sequence[Mapping[int, int]],
+    ) -> None:
+        self.terminals = tuple(terminals)
+        self.terminal_ids = index_terminals(self.terminals)
+        self.nonterminals = tuple(nonterminals)
+        self.nonterminal_ids = {nt: no for no, nt in enumerate(self.nonterminals)}
+        self.productions = tuple(productions)
+        self._index_productions()
+        self.terminal_classes, classes_count = terminal_classes(enumerate(action_rows), len(self.terminals))
+        self.action_base, self.action_check, self.action_value, self.action_default = pack_rows(
+            classify_rows(action_rows, self.terminal_classes), classes_count, default_of=most_common_reduce
+        )
+        self.goto_base, self.goto_check, self.goto_value, self.goto_default = pack_rows(
+            goto_rows, len(action_rows), default_of=most_common_value
+        )
+
+    @classmethod
+    def from_parts(
+        cls,
+        terminals: Sequence[Union[Terminal, SpecialNonterminal]],
+        nonterminals: Sequence[Nonterminal],
+        productions: Sequence[Optional[Production[Terminal, Nonterminal]]],
+        arrays: Mapping[str, array]
+    ) -> CompiledLRTables[Terminal, Nonterminal]:
+        """
+        Restore tables from already packed arrays (see ARRAYS), e.g. loaded
+        from an artifact. Nothing is packed or analysed again.
+        """
+        tables = object.__new__(cls)
+        tables.terminals = tuple(terminals)
+        tables.terminal_ids = index_terminals(tables.terminals)
+        tables.nonterminals = tuple(nonterminals)
+        tables.nonterminal_ids = {nt: no for no, nt in enumerate(tables.nonterminals)}
+        tables.productions = tuple(productions)
+        tables._index_productions()
+        for name in cls.ARRAYS:
+            setattr(tables, name, arrays[name])
+        return tables
+
+    def _index_productions(self) -> None:
+        lefts: List[Optional[Nonterminal]] = []
+        lengths: List[int] = []
+        epsilons: List[Tuple[int, ...]] = []
+        for production in self.productions:
+            if production is None:
+                lefts.append(None)
+                lengths.append(1)
+                epsilons.append(())
+                continue
+            rule = production.rule
+            lefts.append(production.left)
+            lengths.append(sum(symbol is not epsilon for symbol in rule))
+            epsilons.append(tuple(
+                position for position, symbol in enumerate(rule) if symbol is epsilon
+            ))
+        self.production_lefts = tuple(lefts)
+        self.production_lhs = array("i", (
+            self.nonterminal_ids[left] if left is not None else -1 for left in lefts
+        ))
+        self.production_lengths = array("i", lengths)
+        self.production_epsilons = tuple(epsilons)
+
+    @property
+    def states_count(self) -> int:
+        return len(self.action_base)
+
+    def action(self, state: int, terminal: int) -> int:
+        index = self.action_base[state] + self.terminal_classes[terminal]
+        if self.action_check[index] == state:
+            return self.action_value[index]
+        return self.action_default[state]
+
+    def goto(self, state: int, nonterminal: int) -> int:
+        index = self.goto_base[nonterminal] + state
+        if self.goto_check[index] == nonterminal:
+            return self.goto_value[index]
+        return self.goto_default[nonterminal]
+
+    def describe(self, code: int) -> str:
+        if code == ERROR:
+            return "Error"
+        if code == ACCEPT:
+            return "Accept"
+        if code > 0:
+            return f"Shift({code - 1})"
+        return f"Reduce({self.productions[-code - 1]!r})"
+
+
+def index_terminals(
+    terminals: Sequence[Union[Terminal, SpecialNonterminal]]
+) -> Dict[Union[Terminal, SpecialNonterminal], int]:
+    """
+    Ids of `terminals` by position, members of a terminal class get the
+    id of their class.
+    """
+    ids: Dict[Union[Terminal, SpecialNonterminal], int] = {}
+    for no, terminal in enumerate(terminals):
+        ids[terminal] = no
+        if isinstance(terminal, TerminalClass):
+            for member in terminal.members:
+                ids[member] = no
+    return ids
+
+
+def most_common_reduce(row: Mapping[int, int]) -> int:
+    reductions = Counter(code for code in row.values() if code < ACCEPT)
+    if not reductions:
+        return ERROR
+    code, _ = reductions.most_common(1)[0]
+    return code
+
+
+def most_common_value(row: Mapping[int, int]) -> int:
+    if not row:
+        return ERROR
+    code, _ = Counter(row.values()).most_common(1)[0]
+    return code
+
+
+def terminal_classes(rows: Iterable[Tuple[int, Mapping[int, int]]], width: int) -> Tuple[array, int]:
+    """
+    Terminal equivalence classes: terminals with equal cells in every row
+    get the same class id (numbered by first terminal, so eof stays 0).
+    """
+    columns: List[List[Tuple[int, int]]] = [[] for _ in range(width)]
+    for row_no, row in rows:
+        for terminal, code in row.items():
+            columns[terminal].append((row_no, code))
+    ids: Dict[Tuple[Tuple[int, int], ...], int] = {}
+    classes = array("i", (ids.setdefault(tuple(column), len(ids)) for column in columns))
+    return classes, len(ids)
+
+
+def classify_rows(rows: Iterable[Mapping[int, int]], classes: array) -> List[Dict[int, int]]:
+    return [{classes[terminal]: code for terminal, code in row.items()} for row in rows]
+
+
+def pack_rows(rows, width, *, default_of):
+    """
+    First-fit row displacement. Rows are placed densest first at the
+    lowest base where none of their non-default columns is taken.
+    Arrays are padded so that base + column never runs out of bounds.
+    """
+    defaults = array("i", (default_of(row) for row in rows))
+    sparse = [
+        sorted((column, code) for column, code in row.items() if code != defaults[no])
+        for no, row in enumerate(rows)
+    ]
+    base = array("i", [0]) * len(rows)
+    check: List[int] = []
+    value: List[int] = []
+    first_free = 0
+    for no in sorted(range(len(rows)), key=lambda no: -len(sparse[no])):
+        cells = sparse[no]
+        if not cells:
+            continue
+        while first_free < len(check) and check[first_free] != -1:
+            first_free += 1
+        offset = max(first_free - cells[0][0], 0)
+        while any(
+            offset + column < len(check) and check[offset + column] != -1
+            for column, _ in cells
+        ):
+            offset += 1
+        end = offset + cells[-1][0] + 1
+        if end > len(check):
+            check.extend([-1] * (end - len(check)))
+            value.extend([ERROR] * (end - len(value)))
+        for column, code in cells:
+            check[offset + column] = no
+            value[offset + column] = code
+        base[no] = offset
+    size = max(base, default=0) + width
+    if size > len(check):
+        check.extend([-1] * (size - len(check)))
+        value.extend([ERROR] * (size - len(value)))
+    return base, array("i", check), array("i", value), defaults
+
+
+# Symbols on a compiled LL parse stack: terminal ids are non-negative,
+# nonterminal n is stored as -n - 2 and epsilon as -1.
+EPSILON = -1
+
+
+def encode_nonterminal(nonterminal_id: int) -> int:
+    return -nonterminal_id - 2
+
+
+class CompiledLLTable(Generic[Terminal, Nonterminal]):
+    """
+    LL(1) predict table with symbols and productions mapped to small ints.
+
+    `predict` is a dense array of rows, one per nonterminal and `width`
+    columns, one per terminal class (see `terminal_classes`, eof is
+    terminal 0 in class 0). A cell holds the production id plus one,
+    0 marks an error. `production_pushes` hold the encoded
+    right-hand sides in the order they are pushed onto the parse stack.
+    """
+
+    terminals: Tuple[Union[Terminal, SpecialNonterminal], ...]
+    terminal_ids: Dict[Union[Terminal, SpecialNonterminal], int]
+    nonterminals: Tuple[Nonterminal, ...]
+    nonterminal_ids: Dict[Nonterminal, int]
+    productions: Tuple[Production[Terminal, Nonterminal], ...]
+
+    production_lefts: Tuple[Nonterminal, ...]
+    production_lengths: array
+    production_pushes: Tuple[Tuple[int, ...], ...]
+
+    width: int
+    terminal_classes: array
+    predict: array
+
+    ARRAYS = ("terminal_classes", "predict")
+
+    def __init__(
+        self,
+        terminals: Sequence[Union[Terminal, SpecialNonterminal]],
+        nonterminals: Sequence[Nonterminal],
+        productions: Sequence[Production[Terminal, Nonterminal]],
+        rows: Mapping[int, Mapping[int, int]]
+    ) -> None:
+        self._index_symbols(terminals, nonterminals, productions)
+        classes, self.width = terminal_classes(rows.items(), len(self.terminals))
+        self.terminal_classes = classes
+        width = self.width
+        self.predict = predict = array("i", [0]) * (width * len(self.nonterminals))
+        for nt_id, row in rows.items():
+            offset = nt_id * width
+            for terminal_id, production_no in row.items():
+                predict[offset + classes[terminal_id]] = production_no + 1
+
+    @classmethod
+    def from_parts(
+        cls,
+        terminals: Sequence[Union[Terminal, SpecialNonterminal]],
+        nonterminals: Sequence[Nonterminal],
+        productions: Sequence[Production[Terminal, Nonterminal]],
+        arrays: Mapping[str, array]
+    ) -> CompiledLLTable[Terminal, Nonterminal]:
+        table = object.__new__(cls)
+        table._index_symbols(terminals, nonterminals, productions)
+        table.terminal_classes = arrays["terminal_classes"]
+        table.width = max(table.terminal_classes, default=-1) + 1
+        table.predict = arrays["predict"]
+        return table
+
+    def _index_symbols(
+        self,
+        terminals: Sequence[Union[Terminal, SpecialNonterminal]],
+        nonterminals: Sequence[Nonterminal],
+        productions: Sequence[Production[Terminal, Nonterminal]]
+    ) -> None:
+        self.terminals = tuple(terminals)
+        self.terminal_ids = index_terminals(self.terminals)
+        self.nonterminals = tuple(nonterminals)
+        self.nonterminal_ids = {nt: no for no, nt in enumerate(self.nonterminals)}
+        self.productions = tuple(productions)
+        self.production_lefts = tuple(production.left for production in self.productions)
+        self.production_lengths = array("i", (len(production.rule) for production in self.productions))
+        self.production_pushes = tuple(
+            tuple(self.encode(symbol) for symbol in reversed(production.rule))
+            for production in self.productions
+        )
+
+    def encode(self, symbol: Union[Terminal, Nonterminal, SpecialNonterminal]) -> int:
+        if symbol is epsilon:
+            return EPSILON
+        if isinstance(symbol, NonTerminalBase) and symbol in self.nonterminal_ids:
+            return encode_nonterminal(self.nonterminal_ids[symbol])
+        return self.terminal_ids[symbol]
+
+    def production(self, nonterminal: int, terminal: int) -> int:
+        return self.predict[nonterminal * self.width + self.terminal_classes[terminal]] - 1
+
+
+def compile_ll1_table(
+    terminals: Iterable[Terminal],
+    parse_table: Mapping[Nonterminal, Mapping[Union[Terminal, SpecialNonterminal], Production[Terminal, Nonterminal]]]
+) -> CompiledLLTable[Terminal, Nonterminal]:
+    terminal_ids: Dict[Union[Terminal, SpecialNonterminal], int] = {eof: 0}
+    for terminal in terminals:
+        terminal_ids.setdefault(terminal, len(terminal_ids))
+    nonterminal_ids = {nt: no for no, nt in enumerate(parse_table)}
+    production_ids: Dict[Production[Terminal, Nonterminal], int] = {}
+    rows: Dict[int, Dict[int, int]] = {}
+    for nt, row in parse_table.items():
+        packed = rows[nonterminal_ids[nt]] = {}
+        for terminal, production in row.items():
+            production_no = production_ids.setdefault(production, len(production_ids))
+            packed[terminal_ids.setdefault(terminal, len(terminal_ids))] = production_no
+    return CompiledLLTable(list(terminal_ids), list(nonterminal_ids), list(production_ids), rows)
@@ -0,0 +1,404 @@
+from __future__ import annotations
+
+from array import array
+from bisect import bisect_right
+from typing import Dict, FrozenSet, Iterable, List, Optional, Sequence, Tuple
+
+
+MAX_CODE = 0x10FFFF
+
+Interval = Tuple[int, int]
+CharSet = Tuple[Interval, ...]
+
+
+class PatternError(ValueError):
+    def __init__(self, pattern: str, position: int, message: str) -> None:
+        self.pattern = pattern
+        self.position = position
+        super().__init__(f"{message} at position {position} in pattern {pattern!r}.")
+
+
+def charset(intervals: Iterable[Interval]) -> CharSet:
+    merged: List[List[int]] = []
+    for low, high in sorted(intervals):
+        if merged and low <= merged[-1][1] + 1:
+            merged[-1][1] = max(merged[-1][1], high)
+        else:
+            merged.append([low, high])
+    return tuple((low, high) for low, high in merged)
+
+
+def negate(chars: CharSet) -> CharSet:
+    result: List[Interval] = []
+    start = 0
+    for low, high in chars:
+        if low > start:
+            result.append((start, low - 1))
+        start = high + 1
+    if start <= MAX_CODE:
+        result.append((start, MAX_CODE))
+    return tuple(result)
+
+
+DIGITS = charset([(ord("0"), ord("9"))])
+WORD = charset([(ord("0"), ord("9")), (ord("A"), ord("Z")), (ord("a"), ord("z")), (ord("_"), ord("_"))])
+SPACES = charset([(ord(" "), ord(" ")), (ord("\t"), ord("\r"))])
+ANY = negate(charset([(ord("\n"), ord("\n"))]))
+
+CLASS_ESCAPES = {
+    "d": DIGITS, "D": negate(DIGITS),
+    "w": WORD, "W": negate(WORD),
+    "s": SPACES, "S": negate(SPACES),
+}
+CHAR_ESCAPES = {"n": "\n", "t": "\t", "r": "\r", "f": "\f", "v": "\v", "0": "\0"}
+
+
+class NFA:
+    """
+    Thompson automaton: every state has epsilon moves and moves on
+    character sets. `accepts` maps final states to the pattern number.
+    """
+
+    epsilons: List[List[int]]
+    moves: List[List[Tuple[CharSet, int]]]
+    accepts: Dict[int, int]
+
+    def __init__(self) -> None:
+        self.epsilons = []
+        self.moves = []
+        self.accepts = {}
+
+    def state(self) -> int:
+        self.epsilons.append([])
+        self.moves.append([])
+        return len(self.moves) - 1
+
+
+class PatternParser:
+    """
+    Recursive descent over the supported regex subset:
+    alternation, grouping, classes, `.`, escapes, `*`, `+`, `?` and `{m,n}`.
+    Every method returns an NFA fragment as (entry state, exit state).
+    """
+
+    def __init__(self, nfa: NFA, pattern: str) -> None:
+        self.nfa = nfa
+        self.pattern = pattern
+        self.position = 0
+
+    def error(self, message: str) -> PatternError:
+        return PatternError(self.pattern, self.position, message)
+
+    def peek(self) -> Optional[str]:
+        if self.position < len(self.pattern):
+            return self.pattern[self.position]
+        return None
+
+    def take(self) -> str:
+        char = self.peek()
+        if char is None:
+            raise self.error("Unexpected end of pattern")
+        self.position += 1
+        return char
+
+    def parse(self) -> Tuple[int, int]:
+        fragment = self.alternation()
+        if self.peek() is not None:
+            raise self.error(f"Unexpected {self.peek()!r}")
+        return fragment
+
+    def alternation(self) -> Tuple[int, int]:
+        branches = [self.concatenation()]
+        while self.peek() == "|":
+            self.position += 1
+            branches.append(self.concatenation())
+        if len(branches) == 1:
+            return branches[0]
+        nfa = self.nfa
+        entry, exit = nfa.state(), nfa.state()
+        for start, end in branches:
+            nfa.epsilons[entry].append(start)
+            nfa.epsilons[end].append(exit)
+        return entry, exit
+
+    def concatenation(self) -> Tuple[int, int]:
+        nfa = self.nfa
+        entry = exit = nfa.state()
+        while self.peek() not in (None, "|", ")"):
+            start, end = self.repetition()
+            nfa.epsilons[exit].append(start)
+            exit = end
+        return entry, exit
+
+    def repetition(self) -> Tuple[int, int]:
+        begin = self.position
+        fragment = self.atom()
+        if self.peek() not in ("*", "+", "?", "{"):
+            return fragment
+        char = self.take()
+        if char == "{":
+            low, high = self.bounds()
+        else:
+            low, high = {"*": (0, None), "+": (1, None), "?": (0, 1)}[char]
+        if self.peek() in ("*", "+", "?", "{"):
+            raise self.error("Multiple repeat")
+        return self.repeat(fragment, begin, low, high)
+
+    def bounds(self) -> Tuple[int, Optional[int]]:
+        end = self.pattern.find("}", self.position)
+        if end < 0:
+            raise self.error("Unterminated repetition")
+        low, comma, high = self.pattern[self.position:end].partition(",")
+        try:
+            minimum = int(low)
+            maximum = (int(high) if high else None) if comma else minimum
+        except ValueError:
+            raise self.error("Invalid repetition bounds") from None
+        if maximum is not None and maximum < minimum:
+            raise self.error("Invalid repetition bounds")
+        self.position = end + 1
+        return minimum, maximum
+
+    def repeat(self, fragment: Tuple[int, int], begin: int, low: int, high: Optional[int]) -> Tuple[int, int]:
+        # Every copy of the atom is a fresh fragment parsed again from the source.
+        nfa = self.nfa
+        source = self.position
+        copies = [fragment]
+        needed = max(low, high if high is not None else low + 1, 1)
+        while len(copies) < needed:
+            self.position = begin
+            copies.append(self.atom())
+        self.position = source
+        entry = exit = nfa.state()
+        for start, end in copies[:low]:
+            nfa.epsilons[exit].append(start)
+            exit = end
+        if high is None:
+            start, end = copies[low] if low < len(copies) else copies[-1]
+            loop = nfa.state()
+            nfa.epsilons[exit].append(loop)
+            nfa.epsilons[loop].append(start)
+            nfa.epsilons[end].append(loop)
+            return entry, loop
+        tail = nfa.state()
+        nfa.epsilons[exit].append(tail)
+        for start, end in copies[low:high]:
+            nfa.epsilons[exit].append(start)
+            nfa.epsilons[end].append(tail)
+            exit = end
+        return entry, tail
+
+    def atom(self) -> Tuple[int, int]:
+        char = self.take()
+        if char == "(":
+            if self.pattern.startswith("?:", self.position):
+                self.position += 2
+            fragment = self.alternation()
+            if self.take() != ")":
+                raise self.error("Expected ')'")
+            return fragment
+        if char == "[":
+            return self.chars(self.char_class())
+        if char == ".":
+            return self.chars(ANY)
+        if char == "\\":
+            return self.chars(self.escape())
+        if char in "*+?{)|":
+            self.position -= 1
+            raise self.error(f"Unexpected {char!r}")
+        code = ord(char)
+        return self.chars(((code, code), ))
+
+    def chars(self, chars: CharSet) -> Tuple[int, int]:
+        nfa = self.nfa
+        entry, exit = nfa.state(), nfa.state()
+        nfa.moves[entry].append((chars, exit))
+        return entry, exit
+
+    def escape(self) -> CharSet:
+        char = self.take()
+        if char in CLASS_ESCAPES:
+            return CLASS_ESCAPES[char]
+        if char in ("x", "u"):
+            digits = 2 if char == "x" else 4
+            text = self.pattern[self.position:self.position + digits]
+            if len(text) != digits:
+                raise self.error("Incomplete escape")
+            self.position += digits
+            try:
+                code = int(text, 16)
+            except ValueError:
+                raise self.error("Invalid escape") from None
+            return ((code, code), )
+        code = ord(CHAR_ESCAPES.get(char, char))
+        return ((code, code), )
+
+    def char_class(self) -> CharSet:
+        negated = self.peek() == "^"
+        if negated:
+            self.position += 1
+        intervals: List[Interval] = []
+        first = True
+        while True:
+            char = self.take()
+            if char == "]" and not first:
+                break
+            first = False
+            if char == "\\":
+                chars = self.escape()
+            else:
+                chars = ((ord(char), ord(char)), )
+            if len(chars) == 1 and chars[0][0] == chars[0][1] and self.peek() == "-" \
+                    and self.pattern[self.position + 1:self.position + 2] not in ("]", ""):
+                self.position += 1
+                high = self.take()
+                high_code = self.escape()[0][0] if high == "\\" else ord(high)
+                if high_code < chars[0][0]:
+                    raise self.error("Invalid class range")
+                chars = ((chars[0][0], high_code), )
+            intervals.extend(chars)
+        result = charset(intervals)
+        return negate(result) if negated else result
+
+
+class DFA:
+    """
+    Deterministic automaton over character classes.
+
+    Characters are split into classes: maximal code ranges no pattern
+    tells apart. `boundaries` holds the first code of every class, so the
+    class of a code is found by bisection. `transitions[state * classes +
+    class]` is the target state or -1, `accepts[state]` is the number of
+    the pattern matched in a state or -1. State 0 is the start state.
+    """
+
+    boundaries: List[int]
+    classes: int
+    transitions: array
+    accepts: array
+
+    def __init__(self, boundaries: List[int], transitions: array, accepts: array) -> None:
+        self.boundaries = boundaries
+        self.classes = len(boundaries)
+        self.transitions = transitions
+        self.accepts = accepts
+
+    def __len__(self) -> int:
+        return len(self.accepts)
+
+    def class_of(self, code: int) -> int:
+        return bisect_right(self.boundaries, code) - 1
+
+
+def compile_patterns(patterns: Sequence[str]) -> DFA:
+    """
+    Build one minimized DFA recognizing all `patterns`. A state accepting
+    several patterns accepts the one given first.
+    """
+    nfa = NFA()
+    start = nfa.state()
+    for number, pattern in enumerate(patterns):
+        entry, exit = PatternParser(nfa, pattern).parse()
+        nfa.epsilons[start].append(entry)
+        nfa.accepts[exit] = number
+    boundaries = split_classes(
+        chars for moves in nfa.moves for chars, _ in moves
+    )
+    dfa_moves, dfa_accepts = determinize(nfa, start, boundaries)
+    if dfa_accepts[0] >= 0:
+        raise ValueError(f"Pattern {patterns[dfa_accepts[0]]!r} matches the empty string.")
+    return minimize(boundaries, dfa_moves, dfa_accepts)
+
+
+def split_classes(charsets: Iterable[CharSet]) -> List[int]:
+    cuts = {0}
+    for chars in charsets:
+        for low, high in chars:
+            cuts.add(low)
+            if high < MAX_CODE:
+                cuts.add(high + 1)
+    return sorted(cuts)
+
+
+def determinize(
+    nfa: NFA,
+    start: int,
+    boundaries: List[int]
+) -> Tuple[List[Dict[int, int]], List[int]]:
+    """
+    Subset construction, moves of the resulting states are keyed by class.
+    """
+    def closure(states: Iterable[int]) -> FrozenSet[int]:
+        result = set(states)
+        stack = list(result)
+        while stack:
+            for target in nfa.epsilons[stack.pop()]:
+                if target not in result:
+                    result.add(target)
+                    stack.append(target)
+        return frozenset(result)
+
+    classes_of: Dict[CharSet, List[int]] = {}
+    for moves in nfa.moves:
+        for chars, _ in moves:
+            if chars not in classes_of:
+                classes_of[chars] = [
+                    cls for low, high in chars
+                    for cls in range(bisect_right(boundaries, low) - 1, bisect_right(boundaries, high))
+                ]
+
+    initial = closure((start, ))
+    index: Dict[FrozenSet[int], int] = {initial: 0}
+    subsets = [initial]
+    moves: List[Dict[int, int]] = []
+    accepts: List[int] = []
+    for subset in subsets:
+        targets: Dict[int, set] = {}
+        for state in subset:
+            for chars, target in nfa.moves[state]:
+                for cls in classes_of[chars]:
+                    targets.setdefault(cls, set()).add(target)
+        row: Dict[int, int] = {}
+        for cls, states in targets.items():
+            closed = closure(states)
+            number = index.get(closed)
+            if number is None:
+                number = index[closed] = len(subsets)
+                subsets.append(closed)
+            row[cls] = number
+        moves.append(row)
+        accepted = [nfa.accepts[state] for state in subset if state in nfa.accepts]
+        accepts.append(min(accepted) if accepted else -1)
+    return moves, accepts
+
+
+def minimize(boundaries: List[int], moves: List[Dict[int, int]], accepts: List[int]) -> DFA:
+    """
+    Moore partition refinement: states start grouped by the accepted
+    pattern and are split by the groups of their targets until stable.
+    """
+    groups = [accepts[state] for state in range(len(moves))]
+    count = len(set(groups))
+    while True:
+        signatures: Dict[Tuple, int] = {}
+        refined = []
+        for state, row in enumerate(moves):
+            signature = (groups[state], tuple(sorted((cls, groups[target]) for cls, target in row.items())))
+            refined.append(signatures.setdefault(signature, len(signatures)))
+        groups = refined
+        if len(signatures) == count:
+            break
+        count = len(signatures)
+    # Renumber so that the start state stays 0.
+    order: Dict[int, int] = {}
+    for group in [groups[0], *groups]:
+        order.setdefault(group, len(order))
+    width = len(boundaries)
+    transitions = array("i", [-1]) * (width * len(order))
+    final = array("i", [-1]) * len(order)
+    for state, row in enumerate(moves):
+        number = order[groups[state]]
+        final[number] = accepts[state]
+        for cls, target in row.items():
+            transitions[number * width + cls] = order[groups[target]]
+    return DFA(boundaries, transitions, final)
@@ -0,0 +1,96 @@
+import pytest
+
+from parsergen.grammar import Grammar
+from parsergen.grammar.nonterminals import Nonterminal, epsilon
+from parsergen.grammar.productions import Production, Rule
+from parsergen.parsers import LALR1Parser, LL1Parser, LR1Parser, SLR1Parser
+from parsergen.parsers import artifact
+
+from test_declarative import declared_grammar
+
+
+E, E2, T = Nonterminal("E"), Nonterminal("E'"), Nonterminal("T")
+ll_grammar = Grammar({"+", "n", "(", ")"}, {E, E2, T}, E, [
+    Production(E, Rule((T, E2))),
+    Production(E2, Rule(("+", T, E2))),
+    Production(E2, Rule((epsilon, ))),
+    Production(T, Rule(("(", E, ")"))),
+    Production(T, Rule(("n", ))),
+])
+lr_grammar = Grammar({"+", "n", "(", ")"}, {E, T}, E, [
+    Production(E, Rule((E, "+", T))),
+    Production(E, Rule((T, ))),
+    Production(T, Rule(("(", E, ")"))),
+    Production(T, Rule(("n", ))),
+])
+INPUTS = ["n", "n+n", "(n+n)+n", "((n))", "n+", "(n", "n)", ""]
+
+
+def shape_builders(grammar):
+    return {
+        production: (lambda text: lambda *args: (text, args))(str(production))
+        for production in grammar.productions
+    }
+
+
+def parsers():
+    yield LL1Parser(ll_grammar), ll_grammar
+    for cls in (SLR1Parser, LALR1Parser, LR1Parser):
+        yield cls.from_grammar(lr_grammar), lr_grammar
+
+
+def outcome(parser, text):
+    try:
+        return parser.parse(list(text))
+    except Exception as error:
+        return type(error).__name__
+
+
+@pytest.mark.parametrize("parser, grammar", list(parsers()))
+def test_round_trip(parser, grammar, tmp_path):
+    data = artifact.dump(parser, grammar)
+    path = tmp_path / "parser.bin"
+    artifact.save(parser, grammar, path)
+    parser.builders = shape_builders(grammar)
+    for loaded in (artifact.load(data), artifact.load(data, grammar), artifact.load_file(path, grammar)):
+        assert type(loaded) is type(parser)
+        loaded.builders = shape_builders(grammar)
+        for text in INPUTS:
+            assert outcome(loaded, text) == outcome(parser, text)
+
+
+def test_rejects_other_grammar_and_garbage():
+    data = artifact.dump(LALR1Parser.from_grammar(lr_grammar), lr_grammar)
+    with pytest.raises(artifact.ArtifactError):
+        artifact.load(data, ll_grammar)
+    with pytest.raises(artifact.ArtifactError):
+        artifact.load(b"XXXX" + data[4:])
+    assert artifact.fingerprint(data) == artifact.grammar_fingerprint(lr_grammar)
+
+
+def test_ll1_load_decodes_parse_table_lazily():
+    parser = LL1Parser(ll_grammar)
+    loaded = artifact.load(artifact.dump(parser, ll_grammar), ll_grammar)
+    assert "parse_table" not in loaded.__dict__
+    assert loaded.recognize(list("n+n"))
+    assert "parse_table" not in loaded.__dict__
+    assert loaded.parse_table == parser.parse_table
+
+
+def test_abstract_nonterminals_pass_through_without_grammar():
+    grammar = declared_grammar()
+    parser = LALR1Parser.from_grammar(grammar)
+    loaded = artifact.load(artifact.dump(parser, grammar))
+    tree = loaded.parse(list("(1)"))
+    group, tail = tree.args
+    assert tail is None and str(type(group)) == "Group"
+    assert str(type(group.args[1].args[0])) == "Number"
+
+
+def test_terminal_classes_round_trip_without_grammar():
+    grammar = declared_grammar()
+    for parser in (LALR1Parser.from_grammar(grammar), LL1Parser(grammar)):
+        loaded = artifact.load(artifact.dump(parser, grammar))
+        assert loaded.terminal_ids == parser.terminal_ids
+        tail = loaded.parse(list("9-8")).args[1]
+        assert tail.args[0] == "-" and tail.args[1].args == ("8", )
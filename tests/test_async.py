@@ -0,0 +1,163 @@
+import asyncio
+
+import pytest
+
+from parsergen.grammar import Grammar
+from parsergen.grammar.nonterminals import Nonterminal
+from parsergen.grammar.productions import Production, Rule
+from parsergen.lexer import Lexer
+from parsergen.parsers import LALR1Parser, LL1Parser
+from parsergen.parsers.base import AsyncRuntime
+from parsergen.parsers.ll import LLkParser
+
+
+L, R = Nonterminal("L"), Nonterminal("R")
+grammar = Grammar({"n", ";"}, {L, R}, L, [
+    Production(L, Rule((L, R))),
+    Production(L, Rule((R, ))),
+    Production(R, Rule(("n", ";"))),
+])
+
+
+async def chunks(*items):
+    for item in items:
+        yield item
+
+
+def statements():
+    S, Statement = Nonterminal("S"), Nonterminal("Statement")
+    return Grammar({"if", 1, 2, ";"}, {S, Statement}, S, [
+        Production(S, Rule((Statement, S))),
+        Production(S, Rule(("if", ))),
+        Production(Statement, Rule((1, 2, ";"))),
+    ])
+
+
+parsers = [LALR1Parser.from_grammar, LL1Parser, lambda grammar: LLkParser(grammar, k=2)]
+
+
+def leaves(node):
+    for arg in node.args:
+        if hasattr(arg, "args"):
+            yield from leaves(arg)
+        else:
+            yield arg
+
+
+@pytest.mark.parametrize("make", parsers)
+@pytest.mark.parametrize("batch_size", [1, 2, 256])
+def test_aparse_takes_single_terminals(make, batch_size):
+    parser = make(statements())
+    terminals = [1, 2, ";", 1, 2, ";", "if"]
+    result = asyncio.run(parser.aparse(chunks(*terminals), batch_size=batch_size))
+    # "if" stays one terminal and ints are not iterated.
+    assert list(leaves(result)) == terminals
+
+
+def test_token_stream():
+    grammar = statements()
+    parser = LALR1Parser.from_grammar(grammar)
+    lexer = Lexer({1: "a", 2: "b", ";": ";", "if": "if", "space": " +"}, skip=["space"]).bind(parser.terminal_ids)
+    source = "a b; ab ;if"
+    runtime = AsyncRuntime(parser.iterative_parse(), batch_size=2)
+    asyncio.run(runtime.feed_token_stream(chunks(*lexer.tokens(source))))
+    tokens = list(leaves(runtime.finalize()))
+    assert [token.text(source) for token in tokens] == ["a", "b", ";", "a", "b", ";", "if"]
+
+
+def test_aparse_chunks_larger_and_smaller_than_batch():
+    parser = LALR1Parser.from_grammar(grammar)
+    stream = chunks(["n", ";"] * 100, ["n"], [";"], ("n", ";"))
+    result = asyncio.run(parser.aparse_chunks(stream, batch_size=16))
+    assert isinstance(result, L)
+
+
+def test_partial_chunk_is_parsed_before_the_stream_waits():
+    async def main():
+        queue = asyncio.Queue()
+
+        async def reader():
+            while True:
+                chunk = await queue.get()
+                if chunk is None:
+                    return
+                yield chunk
+
+        runtime = AsyncRuntime(LALR1Parser.from_grammar(grammar).iterative_parse(emit=[R]), batch_size=256)
+        nodes = runtime.completed_chunks(reader())
+        await queue.put(["n", ";", "n"])
+        # The first record is complete once the next terminal is seen,
+        # far fewer than batch_size terminals have arrived so far.
+        node = await asyncio.wait_for(nodes.__anext__(), 1)
+        assert isinstance(node, R)
+        await queue.put([";"])
+        await queue.put(None)
+        rest = [node async for node in nodes]
+        runtime.finalize()
+        return 1 + len(rest) + len(list(runtime.runtime.completed()))
+
+    assert asyncio.run(main()) == 2
+
+
+def test_ll1_aparse_iterator_chunks():
+    S = Nonterminal("S")
+    parser = LL1Parser(Grammar({"n", ";"}, {S, R}, S, [
+        Production(S, Rule((R, S))),
+        Production(S, Rule(("n", ))),
+        Production(R, Rule((";", ))),
+    ]))
+    stream = chunks(iter([";"] * 10), iter(["n"]))
+    assert isinstance(asyncio.run(parser.aparse_chunks(stream, batch_size=3)), S)
+
+
+def test_terminal_is_parsed_before_the_stream_waits():
+    async def main():
+        queue = asyncio.Queue()
+
+        async def reader():
+            while True:
+                terminal = await queue.get()
+                if terminal is None:
+                    return
+                yield terminal
+
+        runtime = AsyncRuntime(LALR1Parser.from_grammar(grammar).iterative_parse(emit=[R]), batch_size=256)
+        nodes = runtime.completed(reader())
+        for terminal in ("n", ";", "n"):
+            await queue.put(terminal)
+        node = await asyncio.wait_for(nodes.__anext__(), 1)
+        await queue.put(";")
+        await queue.put(None)
+        rest = [node async for node in nodes]
+        runtime.finalize()
+        return [node, *rest, *runtime.runtime.completed()]
+
+    assert all(isinstance(node, R) for node in asyncio.run(main()))
+
+
+def test_event_loop_runs_between_batches():
+    async def main():
+        ticks = []
+
+        async def ticker():
+            while True:
+                ticks.append(len(pushed))
+                await asyncio.sleep(0)
+
+        pushed = []
+
+        async def terminals():
+            # Never suspends on its own, like an already buffered reader.
+            for terminal in ["n", ";"] * 8:
+                pushed.append(terminal)
+                yield terminal
+
+        task = asyncio.ensure_future(ticker())
+        await asyncio.sleep(0)
+        parser = LALR1Parser.from_grammar(grammar)
+        await parser.aparse(terminals(), batch_size=4)
+        task.cancel()
+        return ticks
+
+    # Each batch of 4 is parsed, the first terminal of the next one is read.
+    assert asyncio.run(main())[1:] == [5, 9, 13]
@@ -0,0 +1,55 @@
+import importlib.util
+
+import pytest
+
+from parsergen.parsers import LALR1Parser, codegen
+
+from test_artifact import INPUTS, outcome, parsers, shape_builders
+from test_declarative import declared_grammar
+
+
+def load_module(path):
+    spec = importlib.util.spec_from_file_location(path.stem, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.mark.parametrize("parser, grammar", list(parsers()))
+def test_generated_module_parses_like_parser(parser, grammar, tmp_path):
+    path = tmp_path / "generated_parser.py"
+    codegen.write_module(parser, path, grammar)
+    module = load_module(path)
+    parser.builders = shape_builders(grammar)
+    builders = {str(production): build for production, build in parser.builders.items()}
+    for text in INPUTS:
+        expected = outcome(parser, text)
+        try:
+            result = module.parse(list(text), builders)
+        except module.ParsingError:
+            result = "ParsingError"
+        assert result == expected
+        assert module.recognize(list(text)) == (expected != "ParsingError")
+        ids = [module.TERMINAL_IDS[char] for char in text]
+        if expected != "ParsingError":
+            assert module.parse_ids(ids, builders) == expected
+
+
+def test_generated_module_does_not_import_parsergen(tmp_path):
+    parser, grammar = next(parsers())
+    path = tmp_path / "standalone_parser.py"
+    codegen.write_module(parser, path, grammar)
+    assert "parsergen" not in path.read_text().split("\n", 1)[1]
+    module = load_module(path)
+    assert repr(module.parse(list("n"))).startswith("E(")
+
+
+def test_generated_module_passes_abstract_children_through(tmp_path):
+    grammar = declared_grammar()
+    path = tmp_path / "declared_parser.py"
+    codegen.write_module(LALR1Parser.from_grammar(grammar), path, grammar)
+    module = load_module(path)
+    tree = module.parse(list("(1)"))
+    assert tree.kind == "Sum" and tree.args[1] is None
+    group = tree.args[0]
+    assert group.kind == "Group" and group.args[1].args[0].kind == "Number"
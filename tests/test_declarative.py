@@ -0,0 +1,185 @@
+from __future__ import annotations
+
+from typing import Optional
+
+import pytest
+from typing_extensions import Literal
+
+from parsergen.grammar import Grammar, InvalidProduction, InvalidTerminalClass
+from parsergen.grammar.nonterminals import Nonterminal
+from parsergen.grammar.nonterminals.compact import CompactNode, compact_builders
+from parsergen.grammar.nonterminals.declarative import NonTerminalMeta, nonterminal_base
+from parsergen.grammar.productions import Production, Rule
+from parsergen.grammar.terminals import TerminalClass
+from parsergen.parsers import LALR1Parser, LL1Parser
+from parsergen.parsers.ll import LLkParser
+
+
+class Root(nonterminal_base()):
+    __root__ = True
+
+
+class Sum(Root):
+    left: Product
+    tail: Optional[SumTail]
+
+
+class SumTail(Root):
+    op: Literal["+", "-"]
+    right: Product
+    tail: Optional[SumTail]
+
+
+class Product(Root):
+    __abstract__ = True
+
+
+class Group(Product):
+    open: Literal["("]
+    sum: Sum
+    close: Literal[")"]
+
+
+class Number(Product):
+    digit: Literal["0", "1", "2", "3", "4", "5", "6", "7", "8", "9"]
+
+
+def declared_grammar():
+    return Grammar({*"0123456789", *"+-()"}, Root.get_nonterminals(), Sum, Root.get_productions())
+
+
+def helper(name):
+    nonterminal, = [nt for nt in Root.get_nonterminals() if str(nt) == name]
+    return nonterminal
+
+
+def test_helpers_are_abstract_nonterminals_per_alternatives_set():
+    tail = helper("(SumTail | ε)")
+    productions = Root.get_productions()
+    assert [str(p) for p in productions if p.left is tail] == ["(SumTail | ε) -> SumTail", "(SumTail | ε) -> ε"]
+    assert tail.is_abstract and Product.is_abstract
+    assert not Sum.is_abstract and not Number.is_abstract
+    # A single literal is used raw, not through a helper.
+    group, = [p for p in productions if p.left is Group]
+    assert group.rule == Rule(("(", Sum, ")"))
+    assert [p.rule for p in productions if p.left is Product] == [Rule((Group, )), Rule((Number, ))]
+
+
+def test_literal_sets_become_terminal_classes():
+    productions = Root.get_productions()
+    sum_tail, = [p for p in productions if p.left is SumTail]
+    assert sum_tail.rule[0] == TerminalClass(("+", "-"))
+    number, = [p for p in productions if p.left is Number]
+    assert number.rule == Rule((TerminalClass("0123456789"), ))
+    assert not any(isinstance(nt, NonTerminalMeta) and str(nt).startswith("('") for nt in Root.get_nonterminals())
+
+
+def test_literal_sets_sharing_values_keep_helpers():
+    class Base(nonterminal_base()):
+        __root__ = True
+
+    class Pair(Base):
+        sign: Literal["+", "-"]
+        op: Literal["+", "*"]
+        end: Literal["*"]
+
+    pair, sign, op = Base.get_nonterminals()
+    assert (str(sign), str(op)) == ("('+' | '-')", "('+' | '*')")
+    assert Base.get_productions()[-1].rule == Rule((sign, op, "*"))
+
+
+@pytest.mark.parametrize("make", [LALR1Parser.from_grammar, LL1Parser])
+def test_terminal_classes_share_table_columns(make):
+    parser = make(declared_grammar())
+    table = parser.tables if isinstance(parser, LALR1Parser) else parser.table
+    # eof, "(", ")", the signs and the digits instead of 15 terminals.
+    assert len(table.terminals) == 5
+    assert max(table.terminal_classes) < 5
+    assert table.terminal_ids["7"] == table.terminal_ids[TerminalClass("0123456789")]
+
+
+def test_grammar_folds_class_members():
+    grammar = declared_grammar()
+    digits = TerminalClass("0123456789")
+    assert grammar.terminals == {"(", ")", TerminalClass("+-"), digits}
+    assert grammar.member_classes["7"] == digits and grammar.member_classes["-"] == TerminalClass("+-")
+    E = Nonterminal("E")
+    with pytest.raises(InvalidProduction):
+        Grammar({"a"}, {E}, E, [Production(E, Rule((TerminalClass("ab"), )))])
+    with pytest.raises(InvalidTerminalClass):
+        Grammar({"a", "b"}, {E}, E, [Production(E, Rule((TerminalClass("ab"), "a")))])
+    with pytest.raises(InvalidTerminalClass):
+        Grammar({"a", "b"}, {E}, E, [Production(E, Rule((TerminalClass("ab"), TerminalClass("ba"))))])
+
+
+def test_llk_matches_class_members():
+    parser = LLkParser(declared_grammar(), k=2)
+    tree = parser.parse(list("4+(5)"))
+    assert tree.args[0].args == ("4", )
+    assert tree.args[1].args[0] == "+" and tree.args[1].args[1].args[1].args[0].args == ("5", )
+
+
+def test_extraction_is_cached():
+    assert Root.get_productions() == Root.get_productions()
+    assert all(a.left is b.left for a, b in zip(Root.get_productions(), Root.get_productions()))
+    assert helper("(SumTail | ε)") is helper("(SumTail | ε)")
+
+
+@pytest.mark.parametrize("make", [LALR1Parser.from_grammar, LL1Parser])
+def test_trees_match_declarations(make):
+    parser = make(declared_grammar())
+    tree = parser.parse(list("1-(2+3)"))
+    assert isinstance(tree, Sum)
+    number, tail = tree.args
+    assert isinstance(number, Number) and number.args == ("1", )
+    assert isinstance(tail, SumTail)
+    op, group, end = tail.args
+    assert op == "-" and end is None
+    assert isinstance(group, Group) and group.args[0] == "(" and group.args[2] == ")"
+    inner = group.args[1]
+    assert isinstance(inner, Sum) and inner.args[0].args == ("2", )
+    assert inner.args[1].args[0] == "+" and inner.args[1].args[1].args == ("3", )
+
+
+def test_compact_nodes_have_declared_field_names_and_no_dict():
+    builders = compact_builders(Root.get_productions())
+    group, = [cls for production, cls in builders.items() if production.left is Group]
+    assert group.fields == ("open", "sum", "close")
+    assert group.__slots__ == ()
+    node = group("(", None, ")")
+    assert isinstance(node, CompactNode) and node.kind is Group
+    assert (node.open, node.sum, node.close) == node.args == ("(", None, ")")
+    assert not hasattr(node, "__dict__")
+
+
+def test_compact_nodes_without_declared_fields_are_positional():
+    E = Nonterminal("E")
+    grammar = Grammar({"+", "n"}, {E}, E, [
+        Production(E, Rule((E, "+", "n"))),
+        Production(E, Rule(("n", ))),
+    ])
+    parser = LALR1Parser.from_grammar(grammar)
+    parser.builders = builders = compact_builders(grammar.productions)
+    assert builders[grammar.productions[0]] is not builders[grammar.productions[1]]
+    tree = parser.parse(["n", "+", "n"])
+    assert tree._fields == ("_0", "_1", "_2")
+    assert tree._0 == ("n", ) and tree._0.kind is E
+    assert tree == (("n", ), "+", "n")
+
+
+def test_compact_tree_of_a_declared_grammar():
+    grammar = declared_grammar()
+    parser = LALR1Parser.from_grammar(grammar)
+    parser.builders = compact_builders(grammar.productions)
+    tree = parser.parse(list("(1)"))
+    assert tree.kind is Sum and tree.fields == ("left", "tail")
+    assert tree.tail is None
+    group = tree.left
+    assert group.kind is Group
+    assert group.open == "(" and group.close == ")"
+    assert group.sum.kind is Sum and group.sum.left.kind is Number and group.sum.left.digit == "1"
+
+
+def test_abstract_nonterminals_have_no_compact_nodes():
+    builders = compact_builders(Root.get_productions())
+    assert not any(production.left.is_abstract for production in builders)
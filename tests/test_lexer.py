@@ -0,0 +1,96 @@
+import mmap
+
+import pytest
+
+from parsergen.lexer import Lexer, LexingError, Token, literal
+from parsergen.tokenizer import PatternError, compile_patterns
+
+
+def texts(lexer, source):
+    return [(lexer.terminals[token.id], token.text(source)) for token in lexer.tokens(source)]
+
+
+def test_longest_match_and_priority_on_ties():
+    lexer = Lexer({"if": "if", "name": "[a-z]+", "space": " +"}, skip=["space"])
+    assert texts(lexer, "if iffy i") == [("if", "if"), ("name", "iffy"), ("name", "i")]
+    reordered = Lexer({"name": "[a-z]+", "if": "if", "space": " +"}, skip=["space"])
+    assert texts(reordered, "if") == [("name", "if")]
+
+
+def test_skip_terminals_are_dropped():
+    lexer = Lexer({"n": r"\d+", "space": r"\s+", "comment": "#[^\n]*"}, skip=["space", "comment"])
+    assert texts(lexer, "1 # one\n\t22") == [("n", "1"), ("n", "22")]
+
+
+@pytest.mark.parametrize("pattern, matches, rejects", [
+    (r"[a-c]x", ["ax", "cx"], ["dx"]),
+    (r"[^a-c]", ["d", "-"], ["b"]),
+    (r"[a\-]", ["a", "-"], ["b"]),
+    (r"\d{2,3}", ["12", "123"], ["1"]),
+    (r"a{2}", ["aa"], ["a"]),
+    (r"a{2,}", ["aa", "aaaa"], ["a"]),
+    (r"(?:ab|c)+", ["ab", "cabc"], ["b"]),
+    (r"\x41é\.\n", ["Aé.\n"], ["Aéx\n"]),
+    (r"\w+\S", ["ab_1!"], ["a b"]),
+    (literal("a+(b)"), ["a+(b)"], ["aab"]),
+])
+def test_pattern_features(pattern, matches, rejects):
+    lexer = Lexer({"token": pattern})
+    for text in matches:
+        assert [token.length for token in lexer.tokens(text)] == [len(text)]
+    for text in rejects:
+        with pytest.raises(LexingError):
+            list(lexer.tokens(text))
+
+
+@pytest.mark.parametrize("pattern, position", [
+    ("(", 1), ("a)", 1), ("[a", 2), ("a{3,1}", 2), ("a{", 2),
+    ("*a", 0), ("a**", 2), (r"\x4", 2), ("[b-a]", 4),
+])
+def test_malformed_patterns(pattern, position):
+    with pytest.raises(PatternError) as raised:
+        compile_patterns([pattern])
+    assert raised.value.position == position
+
+
+def test_patterns_matching_the_empty_string_are_rejected():
+    with pytest.raises(ValueError):
+        compile_patterns(["a*"])
+
+
+def test_dfa_is_minimized():
+    assert len(compile_patterns(["(a|b)*abb"])) == 4
+    assert len(compile_patterns(["ab|cb", "(d|e)f"])) == 5
+
+
+def test_str_bytes_and_memoryview_sources(tmp_path):
+    lexer = Lexer({"n": "[0-9]+", "op": r"[+*]", "space": " "}, skip=["space"])
+    expected = [Token(0, 0, 2), Token(1, 3, 1), Token(0, 5, 3)]
+    text = "12 + 345"
+    assert list(lexer.tokens(text)) == expected
+    assert list(lexer.tokens(text.encode())) == expected
+    assert list(lexer.tokens(memoryview(text.encode()))) == expected
+    path = tmp_path / "input.txt"
+    path.write_text(text)
+    with open(path, "rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        view = memoryview(mapped)
+        assert list(lexer.tokens(view, 3)) == expected[1:]
+        assert expected[2].text(view) == b"345"
+        view.release()
+    assert list(lexer.ids(text)) == [0, 1, 0]
+
+
+def test_error_position():
+    lexer = Lexer({"n": "[0-9]+", "space": " "}, skip=["space"])
+    with pytest.raises(LexingError) as raised:
+        list(lexer.tokens("12 3x4"))
+    assert raised.value.position == 4
+
+
+def test_bind_to_terminal_ids():
+    lexer = Lexer({"n": "[0-9]+", "+": literal("+"), "space": " "}, skip=["space"])
+    bound = lexer.bind({"+": 7, "n": 3})
+    assert list(bound.ids("1 + 2")) == [3, 7, 3]
+    assert list(lexer.ids("1 + 2")) == [0, 1, 0]
+    with pytest.raises(ValueError, match="'\\+'"):
+        lexer.bind({"n": 3})
@@ -0,0 +1,185 @@
+from array import array
+
+import pytest
+
+from parsergen.grammar import Grammar
+from parsergen.grammar.nonterminals import Nonterminal, eof, epsilon
+from parsergen.grammar.productions import Production, Rule
+from parsergen.lexer import Lexer, Token, literal
+from parsergen.parsers import LL1Parser
+from parsergen.parsers.base import CallbackTracer, ParsingError
+from parsergen.parsers.ll import LLkParser
+
+
+E, E2, T = Nonterminal("E"), Nonterminal("E'"), Nonterminal("T")
+start, add, end, number = [
+    Production(E, Rule((T, E2))),
+    Production(E2, Rule(("+", T, E2))),
+    Production(E2, Rule((epsilon, ))),
+    Production(T, Rule(("n", ))),
+]
+grammar = Grammar({"+", "n"}, {E, E2, T}, E, [start, add, end, number])
+parsers = [LL1Parser, lambda grammar, tracer=None: LLkParser(grammar, tracer, k=2)]
+
+
+@pytest.mark.parametrize("make", parsers)
+def test_tracer_reports_expand_shift_epsilon_pop(make):
+    events = []
+    parser = make(grammar, CallbackTracer(lambda kind, args: events.append((kind, args))))
+    parser.parse(["n", "+", "n"])
+    assert events == [
+        ("expand", (start, )),
+        ("expand", (number, )),
+        ("shift", ("n", None, None)),
+        ("expand", (add, )),
+        ("shift", ("+", None, None)),
+        ("expand", (number, )),
+        ("shift", ("n", None, None)),
+        ("expand", (end, )),
+        ("epsilon_pop", (E2, )),
+    ]
+
+
+@pytest.mark.parametrize("make", parsers)
+def test_runtime_tracer_replaces_parser_tracer(make):
+    default, own = [], []
+    parser = make(grammar, CallbackTracer(lambda *event: default.append(event)))
+    runtime = parser.iterative_parse(tracer=CallbackTracer(lambda *event: own.append(event)))
+    runtime.push_many(["n"])
+    runtime.finalize()
+    assert [kind for kind, _ in own] == ["expand", "expand", "shift", "expand", "epsilon_pop"]
+    assert default == []
+
+
+S, R = Nonterminal("S"), Nonterminal("R")
+records = Grammar({"n", ";"}, {S, R}, S, [
+    Production(S, Rule((R, S))),
+    Production(S, Rule((epsilon, ))),
+    Production(R, Rule(("n", ";"))),
+])
+
+
+@pytest.mark.parametrize("make", parsers)
+def test_emitted_nodes_are_handed_out_and_dropped_from_the_tree(make):
+    runtime = make(records).iterative_parse(emit=[R])
+    runtime.push_many(["n", ";"])
+    first, = runtime.completed()
+    assert isinstance(first, R) and first.args == ("n", ";")
+    runtime.push_many(["n", ";"])
+    assert len(list(runtime.completed())) == 1
+    result = runtime.finalize()
+    assert list(runtime.completed()) == []
+    assert result.args[0] is None
+    assert result.args[1].args[0] is None
+
+
+def shape(node):
+    return (type(node).__name__, *map(shape, node.args)) if isinstance(node, (E, E2, T)) else node
+
+
+def test_push_push_many_and_feed_agree():
+    parser = LL1Parser(grammar)
+    expected = shape(parser.parse(["n", "+", "n"]))
+    runtime = parser.iterative_parse()
+    for terminal in ["n", "+", "n"]:
+        runtime.push(terminal)
+    assert shape(runtime.finalize()) == expected
+    ids = [parser.terminal_ids[terminal] for terminal in ["n", "+", "n"]]
+    for batch in (ids, array("i", ids), memoryview(array("i", ids))):
+        runtime = parser.iterative_parse()
+        runtime.push("n")
+        runtime.feed(batch[1:])
+        assert shape(runtime.finalize()) == expected
+
+
+@pytest.mark.parametrize("feed", [
+    lambda runtime, ids: runtime.feed([ids["n"], 0, ids["+"]]),
+    lambda runtime, ids: runtime.feed([ids["n"], 99]),
+    lambda runtime, ids: runtime.feed([ids["n"], -1]),
+    lambda runtime, ids: runtime.push_many(["n", eof, "+"]),
+])
+def test_bad_input_raises_parsing_error(feed):
+    parser = LL1Parser(grammar)
+    runtime = parser.iterative_parse()
+    with pytest.raises(ParsingError):
+        feed(runtime, parser.terminal_ids)
+        runtime.finalize()
+
+
+@pytest.mark.parametrize("make", parsers)
+def test_input_after_finalize_raises_parsing_error(make):
+    parser = make(grammar)
+    assert not parser.recognize(["n", eof, "+"])
+    runtime = parser.iterative_parse()
+    runtime.push_many(["n"])
+    runtime.finalize()
+    with pytest.raises(ParsingError):
+        runtime.finalize()
+    with pytest.raises(ParsingError):
+        runtime.push("+")
+
+
+def test_parse_file_maps_and_lexes_the_file(tmp_path):
+    path = tmp_path / "records.txt"
+    path.write_bytes(b"n;\nn ;")
+    lexer = Lexer({"n": "n", ";": literal(";"), "space": r"\s+"}, skip=["space"])
+    parser = LL1Parser(records)
+    first, rest = parser.parse_file(path, lexer).args
+    second = rest.args[0]
+    assert all(isinstance(token, Token) for token in first.args + second.args)
+    assert [parser.table.terminals[token.id] for token in first.args] == ["n", ";"]
+    assert [(token.offset, token.length) for token in first.args + second.args] == [(0, 1), (1, 1), (3, 1), (5, 1)]
+
+
+def test_parse_file_on_an_empty_file(tmp_path):
+    path = tmp_path / "empty.txt"
+    path.write_bytes(b"")
+    result = LL1Parser(records).parse_file(path, Lexer({"n": "n", ";": literal(";")}))
+    assert isinstance(result, S) and result.args == (None, )
+
+
+def count_builders():
+    return {
+        start: lambda term, tail: term + tail,
+        add: lambda plus, term, tail: term + tail,
+        end: lambda nothing: 0,
+        number: lambda n: 1,
+    }
+
+
+@pytest.mark.parametrize("make", parsers)
+def test_builders_compute_values_without_a_tree(make):
+    parser = make(grammar)
+    assert parser.parse(["n", "+", "n", "+", "n"], builders=count_builders()) == 3
+    assert isinstance(parser.parse(["n"]), E)
+
+
+@pytest.mark.parametrize("make", parsers)
+def test_concurrent_runtimes_keep_their_own_builders(make):
+    parser = make(grammar)
+    counting = parser.iterative_parse(builders=count_builders())
+    tree = parser.iterative_parse()
+    for runtime in (counting, tree, counting, tree):
+        runtime.push_many(["n", "+"])
+    counting.push("n")
+    tree.push("n")
+    assert counting.finalize() == 3
+    assert isinstance(tree.finalize(), E)
+
+
+@pytest.mark.parametrize("make", parsers)
+@pytest.mark.parametrize("terminals, accepted", [
+    (["n", "+", "n"], True),
+    (["n", "+"], False),
+    (["n", "n"], False),
+    (["n", "-", "n"], False),
+    (["n", eof], False),
+    ([], False),
+])
+def test_recognize_never_builds_nor_raises(make, terminals, accepted):
+    def fail(*args):
+        raise AssertionError("recognize built a node")
+
+    parser = make(grammar)
+    parser.builders = dict.fromkeys(grammar.productions, fail)
+    assert parser.recognize(terminals) is accepted
@@ -0,0 +1,246 @@
+from array import array
+
+import pytest
+
+from parsergen.grammar import Grammar
+from parsergen.grammar.nonterminals import Nonterminal, eof, epsilon
+from parsergen.grammar.productions import Production, Rule
+from parsergen.lexer import Lexer, Token, literal
+from parsergen.parsers import LALR1Parser, LR0Parser, LR1Parser, SLR1Parser
+from parsergen.parsers.base import CallbackTracer, ParsingError
+from parsergen.parsers.lr import ConflictError, Reduce, Shift
+
+
+S, A, B = Nonterminal("S"), Nonterminal("A"), Nonterminal("B")
+
+
+@pytest.mark.parametrize("cls", [LR0Parser, SLR1Parser, LALR1Parser, LR1Parser])
+def test_non_generating_start_rejects_everything(cls):
+    grammar = Grammar({"a"}, {S, A}, S, [
+        Production(S, Rule((A, S, A))),
+        Production(A, Rule((epsilon, ))),
+    ])
+    parser = cls.from_grammar(grammar)
+    assert not parser.recognize([])
+    assert not parser.recognize(["a"])
+
+
+@pytest.mark.parametrize("cls", [SLR1Parser, LALR1Parser, LR1Parser])
+def test_non_generating_alternative_is_ignored(cls):
+    grammar = Grammar({"a", "b"}, {S, B}, S, [
+        Production(S, Rule(("a", ))),
+        Production(S, Rule(("b", B))),
+        Production(B, Rule(("b", B))),
+    ])
+    parser = cls.from_grammar(grammar)
+    assert parser.recognize(["a"])
+    assert not parser.recognize(["b", "b"])
+
+
+E, N = Nonterminal("E"), Nonterminal("N")
+
+
+def test_shift_reduce_conflict_is_reported():
+    grammar = Grammar({"+", "n"}, {E}, E, [
+        Production(E, Rule((E, "+", E))),
+        Production(E, Rule(("n", ))),
+    ])
+    conflicts = []
+    SLR1Parser.from_grammar(grammar, conflicts=conflicts)
+    assert conflicts
+    conflict = conflicts[0]
+    assert conflict.kind == "shift/reduce"
+    assert conflict.symbol == "+"
+    assert {type(action) for action in conflict.actions} == {Shift, Reduce}
+    with pytest.raises(ConflictError) as raised:
+        SLR1Parser.from_grammar(grammar)
+    assert raised.value.conflict == conflict
+
+
+def test_reduce_reduce_conflict_is_reported():
+    grammar = Grammar({"n"}, {S, A, N}, S, [
+        Production(S, Rule((A, ))),
+        Production(S, Rule((N, ))),
+        Production(A, Rule(("n", ))),
+        Production(N, Rule(("n", ))),
+    ])
+    conflicts = []
+    LALR1Parser.from_grammar(grammar, conflicts=conflicts)
+    assert [conflict.kind for conflict in conflicts] == ["reduce/reduce"]
+    assert all(isinstance(action, Reduce) for action in conflicts[0].actions)
+
+
+sum_grammar = Grammar({"+", "n"}, {E}, E, [
+    Production(E, Rule((E, "+", "n"))),
+    Production(E, Rule(("n", ))),
+])
+
+
+def test_tracer_reports_shift_reduce_goto():
+    events = []
+    tracer = CallbackTracer(lambda kind, args: events.append((kind, args)))
+    parser = LALR1Parser.from_grammar(sum_grammar, tracer=tracer)
+    parser.parse(["n", "+", "n"])
+    sum_rule, number_rule = sum_grammar.productions
+    assert events == [
+        ("shift", ("n", 0, 2)),
+        ("reduce", (number_rule, 2)),
+        ("goto", (E, 0, 1)),
+        ("shift", ("+", 1, 3)),
+        ("shift", ("n", 3, 4)),
+        ("reduce", (sum_rule, 4)),
+        ("goto", (E, 0, 1)),
+    ]
+
+
+def test_runtime_tracer_replaces_parser_tracer():
+    default, own = [], []
+    parser = SLR1Parser.from_grammar(sum_grammar, tracer=CallbackTracer(lambda *event: default.append(event)))
+    assert parser.recognize(["n"], tracer=CallbackTracer(lambda *event: own.append(event)))
+    assert [kind for kind, _ in own] == ["shift", "reduce", "goto"]
+    assert default == []
+    parser.parse(["n"])
+    assert default == own
+
+
+L, R = Nonterminal("L"), Nonterminal("R")
+records = Grammar({"n", ";"}, {L, R}, L, [
+    Production(L, Rule((L, R))),
+    Production(L, Rule((R, ))),
+    Production(R, Rule(("n", ";"))),
+])
+
+
+def test_emitted_nodes_are_handed_out_and_dropped_from_the_tree():
+    runtime = LALR1Parser.from_grammar(records).iterative_parse(emit=[R])
+    runtime.push_many(["n", ";"])
+    assert list(runtime.completed()) == []
+    runtime.push("n")
+    first, = runtime.completed()
+    assert isinstance(first, R) and first.args == ("n", ";")
+    runtime.push_many([";", "n", ";"])
+    assert len(list(runtime.completed())) == 1
+    result = runtime.finalize()
+    assert len(list(runtime.completed())) == 1
+    assert result.args[1] is None
+    assert result.args[0].args[1] is None
+    assert result.args[0].args[0].args == (None, )
+
+
+def test_emitted_root_is_kept_as_the_result():
+    runtime = LALR1Parser.from_grammar(records).iterative_parse(emit=[L])
+    runtime.push_many(["n", ";", "n", ";"])
+    result = runtime.finalize()
+    assert isinstance(result, L)
+    assert result.args[0] is None
+    assert [isinstance(node, L) for node in runtime.completed()] == [True]
+
+
+def shape(node):
+    return (type(node).__name__, *map(shape, node.args)) if isinstance(node, E) else node
+
+
+def test_push_push_many_and_feed_agree():
+    parser = LALR1Parser.from_grammar(sum_grammar)
+    expected = shape(parser.parse(["n", "+", "n", "+", "n"]))
+    runtime = parser.iterative_parse()
+    for terminal in ["n", "+", "n", "+", "n"]:
+        runtime.push(terminal)
+    assert shape(runtime.finalize()) == expected
+    ids = [parser.terminal_ids[terminal] for terminal in ["n", "+", "n", "+", "n"]]
+    for batch in (ids, array("i", ids), memoryview(array("i", ids))):
+        runtime = parser.iterative_parse()
+        runtime.push("n")
+        runtime.feed(batch[1:])
+        assert shape(runtime.finalize()) == expected
+
+
+@pytest.mark.parametrize("feed", [
+    lambda runtime, ids: runtime.feed([ids["n"], 0, ids["+"]]),
+    lambda runtime, ids: runtime.feed([ids["n"], 99]),
+    lambda runtime, ids: runtime.feed([ids["n"], -1]),
+    lambda runtime, ids: runtime.push_many(["n", eof, "+"]),
+    lambda runtime, ids: runtime.push_many(["n", "-"]),
+])
+def test_bad_input_raises_parsing_error(feed):
+    parser = LALR1Parser.from_grammar(sum_grammar)
+    runtime = parser.iterative_parse()
+    with pytest.raises(ParsingError):
+        feed(runtime, parser.terminal_ids)
+        runtime.finalize()
+    assert not parser.recognize(["n", eof, "+"])
+
+
+def test_input_after_finalize_raises_parsing_error():
+    runtime = LALR1Parser.from_grammar(sum_grammar).iterative_parse()
+    runtime.push("n")
+    runtime.finalize()
+    with pytest.raises(ParsingError):
+        runtime.finalize()
+    with pytest.raises(ParsingError):
+        runtime.push("+")
+
+
+def leaves(node):
+    if isinstance(node, E):
+        for child in node.args:
+            yield from leaves(child)
+    else:
+        yield node
+
+
+def test_parse_file_maps_and_lexes_the_file(tmp_path):
+    path = tmp_path / "sum.txt"
+    path.write_bytes(b"12 + 3 +\n456")
+    lexer = Lexer({"n": "[0-9]+", "+": literal("+"), "space": r"\s+"}, skip=["space"])
+    tokens = list(leaves(LALR1Parser.from_grammar(sum_grammar).parse_file(path, lexer)))
+    assert all(isinstance(token, Token) for token in tokens)
+    assert [token.text(path.read_bytes()) for token in tokens] == [b"12", b"+", b"3", b"+", b"456"]
+
+
+def test_parse_file_on_an_empty_file(tmp_path):
+    path = tmp_path / "empty.txt"
+    path.write_bytes(b"")
+    lexer = Lexer({"n": "[0-9]+", "+": literal("+")})
+    with pytest.raises(ParsingError):
+        LALR1Parser.from_grammar(sum_grammar).parse_file(path, lexer)
+
+
+def count_builders():
+    sum_rule, number_rule = sum_grammar.productions
+    return {sum_rule: lambda left, plus, number: left + 1, number_rule: lambda number: 1}
+
+
+def test_builders_compute_values_without_a_tree():
+    parser = LALR1Parser.from_grammar(sum_grammar)
+    assert parser.parse(["n", "+", "n", "+", "n"], builders=count_builders()) == 3
+    assert isinstance(parser.parse(["n"]), E)
+
+
+def test_concurrent_runtimes_keep_their_own_builders():
+    parser = LALR1Parser.from_grammar(sum_grammar)
+    counting = parser.iterative_parse(builders=count_builders())
+    tree = parser.iterative_parse()
+    for runtime in (counting, tree, counting, tree):
+        runtime.push_many(["n", "+"])
+    counting.push("n")
+    tree.push("n")
+    assert counting.finalize() == 3
+    assert isinstance(tree.finalize(), E)
+
+
+@pytest.mark.parametrize("terminals, accepted", [
+    (["n", "+", "n"], True),
+    (["n", "+"], False),
+    (["n", "n"], False),
+    (["n", "-", "n"], False),
+    (["n", eof], False),
+    ([], False),
+])
+def test_recognize_never_builds_nor_raises(terminals, accepted):
+    def fail(*args):
+        raise AssertionError("recognize built a node")
+
+    parser = LALR1Parser.from_grammar(sum_grammar)
+    parser.builders = dict.fromkeys(sum_grammar.productions, fail)
+    assert parser.recognize(terminals) is accepted
@@ -0,0 +1,49 @@
+import pytest
+
+from parsergen.grammar import Grammar
+from parsergen.grammar.nonterminals import Nonterminal
+from parsergen.grammar.productions import Production, Rule
+from parsergen.parsers import LALR1Parser
+from parsergen.parsers.base import ParsingError
+from parsergen.parsers.parallel import expand, parse_chunks, parse_many
+
+
+R, E, T = Nonterminal("R"), Nonterminal("E"), Nonterminal("T")
+productions = [
+    Production(R, Rule((E, ";"))),
+    Production(E, Rule((E, "+", T))),
+    Production(E, Rule((T, ))),
+    Production(T, Rule((T, "*", "n"))),
+    Production(T, Rule(("n", ))),
+]
+grammar = Grammar({"+", "*", "n", ";"}, {R, E, T}, R, productions)
+parser = LALR1Parser.from_grammar(grammar)
+
+
+def shape(node):
+    if isinstance(node, str):
+        return node
+    return (type(node).__name__, tuple(shape(child) for child in node.args))
+
+
+def test_results_in_order():
+    chunks = [list("n+n;"), list("n*n;"), list("n;")] * 5
+    results = list(parse_chunks(parser, grammar, chunks, workers=2, batch_size=4))
+    assert len(results) == len(chunks)
+    for chunk, result in zip(chunks, results):
+        assert shape(expand(parser, result)) == shape(parser.parse(chunk))
+
+
+@pytest.mark.parametrize("batch_size", [1, 3, 64])
+def test_bad_chunk_in_the_middle_of_a_batch(batch_size):
+    chunks = [list("n+n;"), list("n*;"), list("n;")]
+    results = []
+    with pytest.raises(ParsingError, match="Chunk 1"):
+        for result in parse_chunks(parser, grammar, chunks, workers=2, batch_size=batch_size):
+            results.append(result)
+    assert len(results) == 1
+
+
+def test_recognize_records():
+    results = list(parse_many(parser, grammar, list("n+n;n*;n;n"), {";"}, workers=2, recognize=True))
+    assert results == [True, False, True, False]
@@ -0,0 +1,139 @@
+import random
+from itertools import product
+
+import pytest
+
+from parsergen.grammar import Grammar
+from parsergen.grammar.nonterminals import NonTerminalBase, Nonterminal, epsilon
+from parsergen.grammar.productions import Production, Rule
+from parsergen.parsers import LALR1Parser, LL1Parser, LR0Parser, LR1Parser, SLR1Parser
+from parsergen.parsers.automaton import LR0Automaton, LR1Automaton
+from parsergen.parsers.lalr import lalr1_lookaheads
+from parsergen.parsers.ll import IncompatibleGrammar, LLkParser
+
+
+TERMINALS = ("a", "b", "c")
+NONTERMINALS = tuple(Nonterminal(name) for name in "SABC")
+SEEDS = range(2000)
+MAX_LENGTH = 4
+
+
+def random_grammar(seed):
+    """
+    Small random grammar with every nonterminal generating and reachable,
+    or None when the draw does not give one.
+    """
+    rng = random.Random(seed)
+    nonterminals = NONTERMINALS[:rng.randint(2, len(NONTERMINALS))]
+    symbols = TERMINALS + nonterminals
+    productions = []
+    for nt in nonterminals:
+        for _ in range(rng.randint(1, 3)):
+            rule = tuple(rng.choice(symbols) for _ in range(rng.randint(0, 3)))
+            production = Production(nt, Rule(rule or (epsilon, )))
+            if production not in productions:
+                productions.append(production)
+    grammar = Grammar(TERMINALS, nonterminals, nonterminals[0], productions)
+    if set(nonterminals) - set(grammar.generating) or set(nonterminals) - set(grammar.reachable):
+        return None
+    return grammar
+
+
+def earley(grammar, word):
+    nullable = grammar.nullable
+    rules = {}
+    for production in grammar.productions:
+        rule = tuple(symbol for symbol in production.rule if symbol is not epsilon)
+        rules.setdefault(production.left, []).append(rule)
+    goal = (None, (grammar.start_symbol, ), 1, 0)
+    sets = [set() for _ in range(len(word) + 1)]
+    sets[0].add((None, (grammar.start_symbol, ), 0, 0))
+    for position, items in enumerate(sets):
+        agenda = list(items)
+
+        def add(item):
+            if item not in items:
+                items.add(item)
+                agenda.append(item)
+
+        while agenda:
+            left, rule, dot, origin = agenda.pop()
+            if dot < len(rule):
+                symbol = rule[dot]
+                if isinstance(symbol, NonTerminalBase):
+                    for predicted in rules.get(symbol, ()):
+                        add((symbol, predicted, 0, position))
+                    if symbol in nullable:
+                        add((left, rule, dot + 1, origin))
+                elif position < len(word) and word[position] == symbol:
+                    sets[position + 1].add((left, rule, dot + 1, origin))
+            else:
+                for waiting, waiting_rule, waiting_dot, waiting_origin in list(sets[origin]):
+                    if waiting_dot < len(waiting_rule) and waiting_rule[waiting_dot] == left:
+                        add((waiting, waiting_rule, waiting_dot + 1, waiting_origin))
+    return goal in sets[-1]
+
+
+WORDS = [word for length in range(MAX_LENGTH + 1) for word in product(TERMINALS, repeat=length)]
+
+
+def lr_parsers(grammar):
+    for name, build in [
+        ("LR(0)", lambda conflicts: LR0Parser.from_grammar(grammar, conflicts=conflicts)),
+        ("SLR(1)", lambda conflicts: SLR1Parser.from_grammar(grammar, conflicts=conflicts)),
+        ("LALR(1)", lambda conflicts: LALR1Parser.from_grammar(grammar, conflicts=conflicts)),
+        ("LR(1)", lambda conflicts: LR1Parser.from_grammar(grammar, conflicts=conflicts)),
+        ("Pager LR(1)", lambda conflicts: LR1Parser.from_grammar(grammar, merge_states=True, conflicts=conflicts)),
+    ]:
+        conflicts = []
+        parser = build(conflicts)
+        if not conflicts:
+            yield name, parser
+
+
+def ll_parsers(grammar):
+    for name, build in [
+        ("LL(1)", lambda: LL1Parser(grammar)),
+        ("LL(2)", lambda: LLkParser(grammar, k=2)),
+        ("LL(3)", lambda: LLkParser(grammar, k=3)),
+    ]:
+        try:
+            yield name, build()
+        except IncompatibleGrammar:
+            continue
+
+
+GRAMMARS = [grammar for grammar in map(random_grammar, SEEDS) if grammar is not None]
+
+
+@pytest.mark.parametrize("grammar", GRAMMARS)
+def test_parsers_agree_with_earley(grammar):
+    expected = [earley(grammar, word) for word in WORDS]
+    for name, parser in [*lr_parsers(grammar), *ll_parsers(grammar)]:
+        for word, accepted in zip(WORDS, expected):
+            assert parser.recognize(word) == accepted, (name, word, grammar.productions)
+
+
+@pytest.mark.parametrize("grammar", GRAMMARS)
+def test_lalr_lookaheads_are_merged_lr1_lookaheads(grammar):
+    lr0 = LR0Automaton(grammar)
+    lr1 = LR1Automaton(lr0, grammar.nullable)
+    merged = {}
+    for state in range(len(lr1)):
+        for production_no, bits in lr1.reductions(state):
+            if production_no:
+                key = (lr1.cores[state], production_no)
+                merged[key] = merged.get(key, 0) | bits
+    lalr = {key: bits for key, bits in lalr1_lookaheads(lr0).items() if key[1] and bits}
+    assert {key: bits for key, bits in merged.items() if bits} == lalr
+
+
+@pytest.mark.parametrize("grammar", GRAMMARS)
+def test_pager_merging_adds_no_conflicts(grammar):
+    canonical = []
+    LR1Parser.from_grammar(grammar, conflicts=canonical)
+    if canonical:
+        return
+    merged = []
+    LR1Parser.from_grammar(grammar, merge_states=True, conflicts=merged)
+    assert merged == []